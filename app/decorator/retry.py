@@ -1,8 +1,11 @@
+import logging
 import time
 from functools import wraps
 from selenium.common.exceptions import StaleElementReferenceException
 from typing import TypeVar, Type
 
+logger = logging.getLogger(__name__)
+
 T = TypeVar("T", bound=Exception)
 
 
@@ -27,7 +30,7 @@ def retry(
                 try:
                     return func(*args, **kwargs)
                 except exception as e:
-                    print(e)
+                    logger.warning("%s", e)
                     attempts -= 1
                     if attempts == 0:
                         raise
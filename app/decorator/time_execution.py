@@ -1,18 +1,41 @@
-import time
 from functools import wraps
 
-def time_execution(func):
+from app.utils.metrics import metrics
+
+
+def time_execution(
+    func=None,
+    *,
+    source: str = "app",
+    operation: str | None = None,
+    none_outcome: str | None = None,
+):
     """
-    A decorator that calculates and logs the execution time of a function.
+    A decorator that records the execution time and outcome of a function
+    in the metrics registry (``call_seconds`` / ``calls_total``).
 
-    :param func: The function whose execution time will be measured.
+    Usable bare (``@time_execution``) or with labels
+    (``@time_execution(source="g2g", none_outcome="empty")``).
+
+    :param source: Source label (itemku/g2g/fun/dd/bij/sheets/push).
+    :param operation: Operation label, defaults to the function name.
+    :param none_outcome: Outcome label to use when the function returns None,
+        for functions that swallow their errors.
     """
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.time()  # Record the start time
-        result = func(*args, **kwargs)  # Call the original function
-        end_time = time.time()  # Record the end time
-        execution_time = end_time - start_time
-        print(f"Function '{func.__name__}' executed in {execution_time:.4f} seconds.")
-        return result
-    return wrapper
+
+    def decorator(func):
+        _operation = operation or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.track(source, _operation) as outcome:
+                result = func(*args, **kwargs)
+                if result is None and none_outcome is not None:
+                    outcome.value = none_outcome
+                return result
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
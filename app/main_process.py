@@ -1,21 +1,34 @@
-import random
+import logging
+import hashlib
+import json
+import os
 import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
 
-import constants
-from app.models.crwl_api_models import Product as CrwlProduct
+from app.models.crwl_api_models import CrwlAPIRes, Product as CrwlProduct
 from app.models.gsheet_model import Product
 from app.processes.crwl import extract_data
 from app.processes.crwl_api import crwl_api
-from app.processes.itemku_api import itemku_api
-from app.shared.consts import KEYWORD_SPLIT_BY_CHARACTER
-from app.utils.ggsheet import GSheet
-from app.utils.gsheet import worksheet
-from app.utils.stock_fake import calculate_price_stock_fake, get_row
+from app.processes.price_push_queue import price_push_queue, PushResult
+from app.processes.pricing import decide_price, min_or_max_target_price
+from app.utils.gsheet import get_gsheet, get_worksheet
+from app.utils.offer_archive import archive_offers
+from app.utils.price_history import get_price_history
+from app.utils.round_journal import get_round_journal
+from app.utils.tracing import shared_executor, tracer
+from app.utils.stock_fake import calculate_price_stock_fake, get_row, get_usd_idr_rate
 from app.utils.update_messages import (
     update_with_min_price_message,
     update_with_comparing_seller_message,
+    push_failed_message,
+    last_update_message as last_update_text,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def __filter_lower_than_target_price(
     products: list[CrwlProduct],
@@ -24,18 +37,111 @@ def __filter_lower_than_target_price(
     return [product for product in products if product.price < target_price]
 
 
+def is_dry_run() -> bool:
+    # DRY_RUN=1 decides prices without pushing them or writing the sheet
+    return os.getenv("DRY_RUN", "0") == "1"
+
+
 def update_product_price(
     product_id: int,
     target_price: int,
+    on_done: Callable[[PushResult], None] | None = None,
 ):
-    itemku_api.update_price(
+    if is_dry_run():
+        logger.info("Dry run, not pushing %s to product %s", target_price, product_id)
+        return
+
+    price_push_queue.submit(
         product_id=product_id,
         new_price=target_price,
+        on_done=on_done,
     )
 
+    # PRICE_PUSH_ASYNC=0 keeps the old blocking behaviour
+    if os.getenv("PRICE_PUSH_ASYNC", "1") == "0":
+        price_push_queue.flush()
+
     return
 
 
+def deferred_note_writer(
+    product: Product,
+    note_message: str,
+    last_update_message: str,
+    fingerprint: str | None = None,
+) -> Callable[[PushResult], None]:
+    def on_done(result: PushResult):
+        if result.superseded:
+            # The newer push writes its own Note
+            logger.debug("Push of %s to row %s superseded, Note not written", result.new_price, product.index)
+            return
+        if result.success:
+            get_round_journal().record_push(product.index, result.product_id, result.new_price)
+            if fingerprint is not None:
+                get_round_journal().record_decision(product.index, fingerprint, result.new_price)
+            product.Note = note_message
+        else:
+            product.Note = push_failed_message(result.attempts, result.error) + note_message
+        product.Last_update = last_update_message
+        product.update()
+
+    return on_done
+
+
+def decision_fingerprint(
+    product: Product,
+    min_price: int,
+    max_price: int | None,
+    competitors: list[CrwlProduct] | None = None,
+    od_min_price: float | None = None,
+) -> str:
+    """Hash of everything the row's price decision depends on."""
+    top_k = int(os.getenv("DECISION_TOP_K", "5"))
+    top_competitors = sorted(
+        (competitor.price, competitor.seller.shop_name) for competitor in competitors or []
+    )[:top_k]
+    decision_inputs = [
+        product.Product_link,
+        product.CHECK_PRODUCT_COMPARE,
+        min_price,
+        max_price,
+        product.DONGIAGIAM_MIN,
+        product.DONGIAGIAM_MAX,
+        product.INCLUDE_KEYWORD,
+        product.EXCLUDE_KEYWORD,
+        top_competitors,
+        od_min_price,
+    ]
+    return hashlib.sha1(json.dumps(decision_inputs).encode("utf-8")).hexdigest()
+
+
+def skip_unchanged_decision(
+    product: Product,
+    fingerprint: str,
+) -> bool:
+    """
+    When the inputs match the last successfully pushed decision, skip the
+    push and the Note rewrite and only bump Last_update. The full path
+    still runs at least every DECISION_MEMO_MAX_AGE seconds.
+    """
+    if os.getenv("DECISION_MEMO", "1") != "1" or is_dry_run():
+        return False
+
+    last_decision = get_round_journal().last_decision(product.index)
+    if last_decision is None:
+        return False
+    last_fingerprint, last_price, decided_at = last_decision
+    if last_fingerprint != fingerprint:
+        return False
+    if time.time() - decided_at > int(os.getenv("DECISION_MEMO_MAX_AGE", "3600")):
+        return False
+
+    logger.info("Inputs unchanged, keep price %s", last_price)
+    product.Last_update = last_update_text(datetime.now())
+    product.update_fields("Last_update")
+    return True
+
+
 def extract_product_id_from_product_link(
     product_link: str,
 ) -> int:
@@ -53,211 +159,218 @@ def update_by_min_price_or_max_price(
     product: Product,
     min_price: int,
     max_price: int | None,
+    on_done: Callable[[PushResult], None] | None = None,
 ) -> int:
-    if max_price:
-        target_price = max_price
-
-    else:
-        target_price = min_price
-
-    # Make sure price % 100 == 0
-    target_price = itemku_api.valid_price(target_price)
+    target_price = min_or_max_target_price(min_price, max_price)
 
     product_id = extract_product_id_from_product_link(product.Product_link)
 
     update_product_price(
         product_id=product_id,
         target_price=target_price,
+        on_done=on_done,
     )
 
     return target_price
 
 
-def calculate_competitive_price(
+@dataclass
+class RowInputs:
+    min_price: int
+    max_price: int | None
+    blacklist: list[str] = field(default_factory=list)
+    crwl_api_res: CrwlAPIRes | None = None
+    order_site_min_price: tuple | None = None
+    stock_fake_items: list | None = None
+    usd_rate: float | None = None
+
+
+def fetch_row_inputs(
+    sb,
     product: Product,
-    min_price: int,
-    compare_price: int,
-) -> int:
-    if compare_price - product.DONGIAGIAM_MAX >= min_price:
-        min_target = compare_price - product.DONGIAGIAM_MAX
-    else:
-        min_target = min_price
-    if compare_price - product.DONGIAGIAM_MIN >= min_price:
-        max_target = compare_price - product.DONGIAGIAM_MIN
-    else:
-        max_target = min_price
+    index: int | None = None,
+) -> RowInputs:
+    """
+    Everything a row's price decision reads from the network. The Sheets
+    references and the order sites are fetched while the itemku page is
+    crawled.
+    """
+    if product.CHECK_PRODUCT_COMPARE != 1:
+        return RowInputs(
+            min_price=product.min_price(),
+            max_price=product.max_price(),
+        )
 
-    target_price = random.randint(min_target, max_target)
+    executor = shared_executor("row-inputs", int(os.getenv("ROW_INPUT_THREADS", "16")))
+    with tracer.span("fetch_row_inputs"):
+        min_future = executor.submit(product.min_price)
+        max_future = executor.submit(product.max_price)
+        blacklist_future = executor.submit(product.blacklist)
+        # The rate is fetched in the same task, a task waiting on a sibling could starve the pool
+        order_site_future = executor.submit(fetch_order_site_price, index)
+
+        crwl_api_res = extract_data(
+            sb,
+            api=crwl_api,
+            url=product.PRODUCT_COMPARE,
+        )
+        archive_offers("itemku", product.index, crwl_api_res.data.data)
+        usd_rate, (order_site_min_price, stock_fake_items) = order_site_future.result()
+
+        return RowInputs(
+            min_price=min_future.result(),
+            max_price=max_future.result(),
+            blacklist=blacklist_future.result(),
+            crwl_api_res=crwl_api_res,
+            order_site_min_price=order_site_min_price,
+            stock_fake_items=stock_fake_items,
+            usd_rate=usd_rate,
+        )
+
+
+def fetch_order_site_price(
+    index: int | None = None,
+) -> tuple[float, tuple]:
+    rate = get_usd_idr_rate()
+    return rate, calculate_order_site_price(index, rate=rate)
 
-    valid_target_price = itemku_api.valid_price(target_price)
 
-    return valid_target_price
+def record_price_history(
+    product: Product,
+    inputs: RowInputs,
+    pushed_price: int | None = None,
+):
+    if is_dry_run():
+        return
+    price_history = get_price_history()
+    if price_history is None:
+        return
+    try:
+        product_id = extract_product_id_from_product_link(product.Product_link)
+    except Exception:
+        product_id = None
+    price_history.record_row(
+        index=product.index,
+        product_id=product_id,
+        competitors=inputs.crwl_api_res.data.data if inputs.crwl_api_res else [],
+        order_site_items=[item for item in inputs.stock_fake_items or [] if item],
+        min_price=inputs.min_price,
+        max_price=inputs.max_price,
+        od_min_price=inputs.order_site_min_price[0] if inputs.order_site_min_price else None,
+        usd_rate=inputs.usd_rate,
+        pushed_price=pushed_price,
+        blacklist=inputs.blacklist,
+        settings={
+            "DONGIAGIAM_MIN": product.DONGIAGIAM_MIN,
+            "DONGIAGIAM_MAX": product.DONGIAGIAM_MAX,
+            "INCLUDE_KEYWORD": product.INCLUDE_KEYWORD,
+            "EXCLUDE_KEYWORD": product.EXCLUDE_KEYWORD,
+        },
+    )
 
 
 def check_product_compare_flow(
     sb,
     product: Product,
     index: int | None = None,
+    inputs: RowInputs | None = None,
 ):
-    min_price = product.min_price()
-    max_price = product.max_price()
-    blacklist = product.blacklist()
-
-    crwl_api_res = extract_data(
-        sb,
-        api=crwl_api,
-        url=product.PRODUCT_COMPARE,
-    )
+    if inputs is None:
+        inputs = fetch_row_inputs(sb, product, index)
 
-    products = crwl_api_res.data.data
-
-    valid_products = []
-
-    valid_keywords_products: list[CrwlProduct] = []
-
-    min_price_product: CrwlProduct | None = None
-
-    for _product in products:
-        # Check shopname not in backlist
-        if _product.seller.shop_name not in blacklist:
-            # Check Include and Exclude keyword in product name
-            if (
-                (
-                    product.INCLUDE_KEYWORD
-                    and all(
-                    (
-                        keyword.lower()
-                        in _product.name.lower() + _product.server_name.lower()
-                        if _product.server_name
-                        else ""
-                    )
-                    for keyword in product.INCLUDE_KEYWORD.split(
-                        KEYWORD_SPLIT_BY_CHARACTER
-                    )
-                )
-                )
-                or product.INCLUDE_KEYWORD is None
-            ) and (
-                product.EXCLUDE_KEYWORD
-                and not any(
-                (
-                    keyword.lower()
-                    in _product.name.lower() + _product.server_name.lower()
-                    if _product.server_name
-                    else ""
-                )
-                for keyword in product.EXCLUDE_KEYWORD.split(
-                    KEYWORD_SPLIT_BY_CHARACTER
-                )
-            )
-                or product.EXCLUDE_KEYWORD is None
-            ):
-                # print(f"VALID: {_product}")
-                valid_keywords_products.append(_product)
-                # Check product price in valid range
-                if (max_price and min_price <= _product.price <= max_price) or (
-                    max_price is None and min_price <= _product.price
-                ):
-                    valid_products.append(_product)
-                    if (
-                        min_price_product is None
-                        or _product.price < min_price_product.price
-                    ):
-                        min_price_product = _product
-
-    print(f"Number of product: {len(products)}")
-    print(f"Valid products: {len(valid_products)}")
+    min_price = inputs.min_price
+    max_price = inputs.max_price
+    blacklist = inputs.blacklist
+
+    products = inputs.crwl_api_res.data.data
 
     # project add order site price
     # get price in order site then compare with product price
-    order_site_min_price, stock_fake_items = calculate_order_site_price(index)
-    new_min_price = min_price
+    with tracer.span("decide_price"):
+        decision = decide_price(
+            product=product,
+            offers=products,
+            min_price=min_price,
+            max_price=max_price,
+            blacklist=blacklist,
+            order_site_min_price=inputs.order_site_min_price,
+        )
+
+    logger.info("Number of product: %s", len(products))
+    logger.info("Valid products: %s", len(decision.valid_products))
+
     stock_fake_str = ""
-    od_min_price = None
-    od_seller = None
-    od_site = None
-    if order_site_min_price is not None:
-        od_min_price = order_site_min_price[0]
-        od_seller = order_site_min_price[1]
-        od_site = order_site_min_price[2]
-        stock_fake_str = f"Order site min price: {od_min_price} - {od_seller} - {od_site}\n"
+    if decision.od_min_price is not None:
+        stock_fake_str = (
+            f"Order site min price: {decision.od_min_price} - {decision.od_seller} - {decision.od_site}\n"
+        )
         stock_fake_str += "Order site items:\n"
-        for item in stock_fake_items:
+        for item in inputs.stock_fake_items:
             stock_fake_str += f"{item[0]} - {item[1]} - {item[2]}\n"
     # ==================
 
-    if min_price_product is None:
-        if od_min_price is not None and od_min_price > min_price:
-            print(f"No valid product found but order site have better price: {od_min_price} > min price: {min_price}")
-            print(f"Set {new_min_price} to product")
-            new_min_price = min_price
-        target_price = update_by_min_price_or_max_price(
-            product=product,
-            min_price=new_min_price,
-            max_price=max_price,
-        )
+    fingerprint = decision_fingerprint(
+        product, min_price, max_price, decision.valid_products, decision.od_min_price
+    )
+    if skip_unchanged_decision(product, fingerprint):
+        record_price_history(product, inputs)
+        return
+
+    lower_min_price_products = __filter_lower_than_target_price(
+        products=decision.valid_keywords_products, target_price=decision.target_price
+    )
+    if decision.min_price_product is None:
+        if decision.od_min_price is not None and decision.od_min_price > min_price:
+            logger.info(
+                "No valid product found but order site have better price: %s > min price: %s",
+                decision.od_min_price,
+                min_price,
+            )
+            logger.info("Set %s to product", min_price)
 
         note_message, last_update_message = update_with_min_price_message(
-            price=target_price,
+            price=decision.target_price,
             price_min=min_price,
             price_max=max_price,
-            lower_min_price_products=__filter_lower_than_target_price(
-                products=valid_keywords_products, target_price=target_price
-            ),
+            lower_min_price_products=lower_min_price_products,
         )
-        print(note_message)
-        product.Note = note_message + stock_fake_str
-        product.Last_update = last_update_message
-        product.update()
     else:
-        target_price = calculate_competitive_price(
-            product=product,
-            min_price=new_min_price,
-            compare_price=min_price_product.price,
-        )
-
-        if od_min_price is not None and target_price > od_min_price and min_price < od_min_price:
-            new_min_price = min_price
-            _compare_price = od_min_price
-            _compare_seller = f"{od_seller} ({od_site})"
-        else:
-            _compare_price = min_price_product.price
-            _compare_seller = min_price_product.seller.shop_name
-
-        update_product_price(
-            product_id=extract_product_id_from_product_link(
-                product_link=product.Product_link
-            ),
-            target_price=new_min_price,
-        )
-
         note_message, last_update_message = update_with_comparing_seller_message(
-            price=target_price,
+            price=decision.target_price,
             price_min=min_price,
             price_max=max_price,
-            comparing_price=_compare_price,
-            comparing_seller=_compare_seller,
-            lower_min_price_products=__filter_lower_than_target_price(
-                products=valid_keywords_products, target_price=target_price
-            ),
+            comparing_price=decision.compare_price,
+            comparing_seller=decision.compare_seller,
+            lower_min_price_products=lower_min_price_products,
         )
-        print(note_message)
-        product.Note = note_message + stock_fake_str
-        product.Last_update = last_update_message
-        product.update()
+
+    logger.info("%s", note_message)
+    update_product_price(
+        product_id=extract_product_id_from_product_link(
+            product_link=product.Product_link
+        ),
+        target_price=decision.pushed_price,
+        on_done=deferred_note_writer(
+            product, note_message + stock_fake_str, last_update_message, fingerprint
+        ),
+    )
+    record_price_history(product, inputs, decision.pushed_price)
 
 
 def no_check_product_compare_flow(
     product: Product,
+    inputs: RowInputs | None = None,
 ):
-    min_price = product.min_price()
-    max_price = product.max_price()
+    if inputs is None:
+        inputs = fetch_row_inputs(None, product)
 
-    update_by_min_price_or_max_price(
-        product=product,
-        min_price=min_price,
-        max_price=None,
-    )
+    min_price = inputs.min_price
+    max_price = inputs.max_price
+
+    fingerprint = decision_fingerprint(product, min_price, max_price)
+    if skip_unchanged_decision(product, fingerprint):
+        record_price_history(product, inputs)
+        return
 
     note_message, last_update_message = update_with_min_price_message(
         price=min_price,
@@ -265,14 +378,18 @@ def no_check_product_compare_flow(
         price_max=max_price,
     )
 
-    print(note_message)
-    product.Note = note_message
-    product.Last_update = last_update_message
-    product.update()
+    logger.info("%s", note_message)
+    target_price = update_by_min_price_or_max_price(
+        product=product,
+        min_price=min_price,
+        max_price=None,
+        on_done=deferred_note_writer(product, note_message, last_update_message, fingerprint),
+    )
+    record_price_history(product, inputs, target_price)
 
 
-def calculate_order_site_price(index: int | None = None):
-    gsheet = GSheet(constants.KEY_PATH)
+def calculate_order_site_price(index: int | None = None, rate: float | None = None):
+    gsheet = get_gsheet()
 
     # g2g = G2G.get(worksheet, index)
     # bij = BIJ.get(worksheet, index)
@@ -294,14 +411,14 @@ def calculate_order_site_price(index: int | None = None):
     #     s4=p4,
     # )
     row = get_row(
-        worksheet=worksheet,
+        worksheet=get_worksheet(),
         row_index=index
     )
     stock_fake_price_tuple, stock_fake_items = calculate_price_stock_fake(
-        gsheet=gsheet, row=row, hostdata=constants.BIJ_HOST_DATA
+        gsheet=gsheet, row=row, rate=rate
     )
     if stock_fake_price_tuple is None or stock_fake_price_tuple[0] <= 0:  # Ensure valid price
-        print("Stock fake price is None or not positive.")
+        logger.info("Stock fake price is None or not positive.")
         return None, None
 
     return stock_fake_price_tuple, stock_fake_items
@@ -311,11 +428,12 @@ def process(
     sb,
     product: Product,
     index: int | None = None,
+    inputs: RowInputs | None = None,
 ):
     if product.CHECK_PRODUCT_COMPARE == 1:
-        print("Check product compare flow")
-        check_product_compare_flow(sb, product, index)
+        logger.info("Check product compare flow")
+        check_product_compare_flow(sb, product, index, inputs)
 
     else:
-        print("No check product compare flow")
-        no_check_product_compare_flow(product)
+        logger.info("No check product compare flow")
+        no_check_product_compare_flow(product, inputs)
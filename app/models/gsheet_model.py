@@ -7,6 +7,8 @@ from app.shared.consts import COL_META_FIELD_NAME
 from app.shared.exceptions import SheetError
 from app.utils.ggsheet import GSheet
 from app.utils.google_api import StockManager
+from app.utils.host_limits import host_limiter
+from app.utils.metrics import metrics
 
 IS_UPDATE_META: Final[str] = "is_update"
 
@@ -60,7 +62,8 @@ class ColSheetModel(BaseModel):
             "worksheet": worksheet,
         }
 
-        query_results = worksheet.batch_get(query_value)
+        with metrics.track("sheets", "batch_get"), host_limiter.limit("sheets"):
+            query_results = worksheet.batch_get(query_value)
         count = 0
         for k, _ in mapping_dict.items():
             model_dict[k] = query_results[count].first()
@@ -84,7 +87,26 @@ class ColSheetModel(BaseModel):
                 }
             )
 
-        self.worksheet.batch_update(update_batch)
+        with metrics.track("sheets", "batch_update"), host_limiter.limit("sheets"):
+            self.worksheet.batch_update(update_batch)
+
+    def update_fields(
+            self,
+            *field_names: str,
+    ) -> None:
+        mapping_dict = self.update_mapping_fields()
+        model_dict = self.model_dump(mode="json")
+
+        update_batch = [
+            {
+                "range": f"{mapping_dict[k]}{self.index}",
+                "values": [[model_dict[k]]],
+            }
+            for k in field_names
+        ]
+
+        with metrics.track("sheets", "batch_update"), host_limiter.limit("sheets"):
+            self.worksheet.batch_update(update_batch)
 
 
 class FlexibleColSheetModel(ColSheetModel):
@@ -103,7 +125,8 @@ class FlexibleColSheetModel(ColSheetModel):
         }
 
         try:
-            query_results = worksheet.batch_get(query_value)
+            with metrics.track("sheets", "batch_get"), host_limiter.limit("sheets"):
+                query_results = worksheet.batch_get(query_value)
         except Exception as e:
             raise ValueError(f"Failed to batch_get values: {e}")
 
@@ -131,7 +154,8 @@ class FlexibleColSheetModel(ColSheetModel):
                 })
 
         if update_batch:
-            self.worksheet.batch_update(update_batch)
+            with metrics.track("sheets", "batch_update"), host_limiter.limit("sheets"):
+                self.worksheet.batch_update(update_batch)
 
 
 class Product(ColSheetModel):
@@ -1,4 +1,10 @@
+import json
+import logging
+import os
 import time
+import uuid
+from typing import Final
+
 from bs4 import BeautifulSoup
 
 
@@ -6,16 +12,130 @@ from ..shared.exceptions import CrwlError
 from ..models.crwl_models import NextData1st, NextData2nd
 from ..models.crwl_api_models import CrwlAPIRes
 from .crwl_api import CrwlAPI
+from ..decorator.time_execution import time_execution
 from ..utils.decorators import retry_on_fail
+from ..utils.metrics import navigation_bytes_total, navigation_seconds
+from ..utils.page_pool import acquire_page
+
+logger = logging.getLogger(__name__)
+
+
+# Nothing below is needed to read #__NEXT_DATA__ from the server-rendered page
+BLOCKED_URL_PATTERNS: Final[list[str]] = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm", "*.mp3",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*facebook.com/tr*",
+    "*connect.facebook*", "*analytics.tiktok.com*", "*hotjar.com*",
+    "*clarity.ms*", "*sentry.io*", "*newrelic.com*", "*nr-data.net*",
+    "*mixpanel.com*", "*amplitude.com*", "*segment.io*", "*moengage.com*",
+]
+
+# Set on the document shown before a navigation, the next document does not have it
+NAVIGATION_MARKER: Final[str] = "__crwlNavigation"
+
+TRANSFER_SIZE_JS: Final[str] = (
+    "performance.getEntriesByType('navigation')"
+    ".concat(performance.getEntriesByType('resource'))"
+    ".reduce((total, entry) => total + (entry.transferSize || 0), 0)"
+)
+
+
+def enable_resource_blocking(
+    page,
+) -> None:
+    if getattr(page, "_resource_blocking", False):
+        return
+    import mycdp
+
+    cdp_page = page.cdp.page
+    page.cdp.loop.run_until_complete(cdp_page.send(mycdp.network.enable()))
+    page.cdp.loop.run_until_complete(
+        cdp_page.send(mycdp.network.set_blocked_ur_ls(urls=BLOCKED_URL_PATTERNS))
+    )
+    page._resource_blocking = True
+
+
+def mark_document(
+    page,
+) -> str | None:
+    """Tag the current document, so ``wait_for_next_data`` can tell the next one from it."""
+    marker = uuid.uuid4().hex
+    try:
+        page.cdp.evaluate(f"document.{NAVIGATION_MARKER} = {json.dumps(marker)}")
+    except Exception as e:
+        logger.debug("Can't mark the current document: %s", e)
+        return None
+    return marker
+
+
+def wait_for_next_data(
+    page,
+    timeout: float,
+    marker: str | None = None,
+    poll_interval: float = 0.1,
+) -> bool:
+    """
+    Wait until a document other than the one tagged with ``marker`` has
+    been parsed with its #__NEXT_DATA__, so the previous product's payload
+    is never read while the new page is still loading.
+    """
+    check = "document.readyState !== 'loading' && document.getElementById('__NEXT_DATA__') !== null"
+    if marker is not None:
+        check = f"document.{NAVIGATION_MARKER} !== {json.dumps(marker)} && {check}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if page.cdp.evaluate(check):
+                return True
+        except Exception:
+            # The old document is being replaced
+            pass
+        time.sleep(poll_interval)
+    return False
+
+
+def navigate_fast(
+    page,
+    url: str,
+    timeout: float,
+) -> None:
+    try:
+        enable_resource_blocking(page)
+    except Exception as e:
+        logger.warning("Can't enable resource blocking: %s", e)
+
+    marker = mark_document(page)
+    started_at = time.perf_counter()
+    page.cdp.get(url)
+    found = wait_for_next_data(page, timeout, marker)
+    elapsed = time.perf_counter() - started_at
+
+    try:
+        transferred = int(page.cdp.evaluate(TRANSFER_SIZE_JS) or 0)
+    except Exception:
+        transferred = 0
+    navigation_seconds.observe(elapsed, outcome="found" if found else "missing")
+    navigation_bytes_total.inc(transferred)
+    logger.debug(
+        "Navigation: %.2fs, %.1f KB%s",
+        elapsed,
+        transferred / 1024,
+        "" if found else ", __NEXT_DATA__ not found",
+    )
 
 
 def get_soup(
     sb,
     url: str,
 ) -> BeautifulSoup:
-    sb.cdp.get(url)
-    time.sleep(1)
-    page_source = sb.cdp.get_page_source()
+    with acquire_page(sb) as page:
+        if os.getenv("FAST_NAVIGATION", "1") == "1":
+            navigate_fast(page, url, timeout=float(os.getenv("NAVIGATION_TIMEOUT", "10")))
+        else:
+            page.cdp.get(url)
+            time.sleep(1)
+        page_source = page.cdp.get_page_source()
 
     # try:
     #     res.raise_for_status()
@@ -116,6 +236,7 @@ def find_keyword(
 
 
 @retry_on_fail(max_retries=3, sleep_interval=2)
+@time_execution(source="itemku")
 def extract_data(
     sb,
     api: CrwlAPI,
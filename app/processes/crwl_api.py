@@ -1,7 +1,6 @@
-import requests
-
 from ..shared.consts import CRWL_API_BASE_URL
 from ..models.crwl_api_models import CrwlAPIRes
+from ..utils.host_limits import host_limiter
 
 
 class CrwlAPI:
@@ -49,7 +48,10 @@ class CrwlAPI:
 
         filtered_query_string = {k: v for k, v in query_string.items() if v is not None}
 
-        res = requests.get(f"{CRWL_API_BASE_URL}/product", params=filtered_query_string)
+        with host_limiter.limit("itemku"):
+            res = host_limiter.session("itemku").get(
+                f"{CRWL_API_BASE_URL}/product", params=filtered_query_string
+            )
 
         res.raise_for_status()
 
@@ -58,7 +60,8 @@ class CrwlAPI:
     def expansion_country(
         self,
     ):
-        res = requests.get(f"{CRWL_API_BASE_URL}/expansion-country")
+        with host_limiter.limit("itemku"):
+            res = host_limiter.session("itemku").get(f"{CRWL_API_BASE_URL}/expansion-country")
         res.raise_for_status()
 
         return res.json()
@@ -73,7 +76,10 @@ class CrwlAPI:
             "target_currency": target_currency,
         }
 
-        res = requests.get(f"{CRWL_API_BASE_URL}/foreign-exchange/rate", params=params)
+        with host_limiter.limit("itemku"):
+            res = host_limiter.session("itemku").get(
+                f"{CRWL_API_BASE_URL}/foreign-exchange/rate", params=params
+            )
         res.raise_for_status()
 
         return res.json()["data"][0]["exchange_rate"]
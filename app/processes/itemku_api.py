@@ -1,5 +1,5 @@
+import logging
 import os
-import requests
 
 from datetime import datetime
 
@@ -10,6 +10,11 @@ import hashlib
 
 import json
 
+from ..decorator.time_execution import time_execution
+from ..shared.consts import ITEMKU_API_BASE_URL
+from ..utils.host_limits import host_limiter
+
+logger = logging.getLogger(__name__)
 
 
 def base64_url_encode(data):
@@ -45,21 +50,90 @@ def generate_jwt_token(nonce, payload):
     return f"{unsigned_token}.{encoded_signature}"
 
 
+class JwtSigner:
+    """
+    HS256 signer with the key schedule and the constant header parts
+    precomputed, so signing one price update is a single HMAC over the
+    payload.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+    ) -> None:
+        self.api_key = api_key
+        self._hmac = hmac.new(secret_key.encode("utf-8"), digestmod=hashlib.sha256)
+        # Same layout as json.dumps({"X-Api-Key": ..., "Nonce": ..., "alg": "HS256"})
+        self._header_prefix = '{"X-Api-Key": ' + json.dumps(api_key) + ', "Nonce": '
+        self._header_suffix = ', "alg": "HS256"}'
+        # (nonce, encoded header), swapped as one object since the push workers share the signer
+        self._header: tuple[str | None, str] = (None, "")
+
+    def encoded_header(
+        self,
+        nonce: str,
+    ) -> str:
+        # Nonce is a unix timestamp, so consecutive updates share the header
+        cached_nonce, encoded_header = self._header
+        if nonce != cached_nonce:
+            header = self._header_prefix + json.dumps(nonce) + self._header_suffix
+            encoded_header = base64_url_encode(header.encode("utf-8"))
+            self._header = (nonce, encoded_header)
+        return encoded_header
+
+    def sign(
+        self,
+        nonce: str,
+        payload: dict,
+    ) -> str:
+        encoded_payload = base64_url_encode(json.dumps(payload).encode("utf-8"))
+        unsigned_token = f"{self.encoded_header(nonce)}.{encoded_payload}"
+
+        mac = self._hmac.copy()
+        mac.update(unsigned_token.encode("utf-8"))
+        return f"{unsigned_token}.{base64_url_encode(mac.digest())}"
+
+    def sign_batch(
+        self,
+        nonce: str,
+        payloads: list[dict],
+    ) -> list[str]:
+        return [self.sign(nonce, payload) for payload in payloads]
+
+    @staticmethod
+    def from_env() -> "JwtSigner":
+        return JwtSigner(
+            api_key=os.environ["ITEMKU_API_KEY"],
+            secret_key=os.environ["ITEMKU_SECRET_KEY"],
+        )
+
+
 class ItemkuAPI:
     def __init__(
         self,
     ) -> None:
-        pass
+        self._signer: JwtSigner | None = None
+
+    @property
+    def signer(self) -> JwtSigner:
+        if self._signer is None:
+            self._signer = JwtSigner.from_env()
+        return self._signer
+
+    def reset_signer(self) -> None:
+        self._signer = None
 
     def valid_price(self, price: int) -> int:
         return int(round(float(price) / 10, 0) * 10)
 
+    @time_execution(source="push")
     def update_price(
         self,
         product_id: int,
         new_price: int,
     ):
-        print("Call api update price")
+        logger.debug("Call api update price")
         nonce = str(int(datetime.now().timestamp()))
 
         payload = {
@@ -67,23 +141,25 @@ class ItemkuAPI:
             "new_price": new_price,
         }
 
-        token = generate_jwt_token(
+        signer = self.signer
+        token = signer.sign(
             nonce=nonce,
             payload=payload,
         )
 
         header = {
-            "X-Api-Key": os.environ["ITEMKU_API_KEY"],
+            "X-Api-Key": signer.api_key,
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
             "Nonce": nonce,
         }
 
-        res = requests.post(
-            url="https://tokoku-gateway.itemku.com/api/product/price/update",
-            headers=header,
-            json=payload,
-        )
+        with host_limiter.limit("tokoku"):
+            res = host_limiter.session("tokoku").post(
+                url=f"{ITEMKU_API_BASE_URL}/product/price/update",
+                headers=header,
+                json=payload,
+            )
         res.raise_for_status()
 
         return res.json()
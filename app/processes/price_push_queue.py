@@ -0,0 +1,269 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from .itemku_api import itemku_api
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PushResult:
+    product_id: int
+    new_price: int
+    success: bool
+    attempts: int
+    coalesced: int = 0
+    error: str | None = None
+    superseded: bool = False
+
+
+@dataclass
+class PushJob:
+    product_id: int
+    new_price: int
+    on_done: Callable[[PushResult], None] | None = None
+    attempts: int = 0
+    coalesced: int = 0
+    not_before: float = 0.0
+
+
+class PricePushQueue:
+    """
+    Background queue for itemku price updates.
+
+    Pending prices for the same product_id are coalesced to the latest one, a
+    product is never pushed by two workers at once, and failed pushes are
+    retried with exponential backoff. ``on_done`` is called from the worker
+    thread once the push succeeded or gave up. A job replaced by a newer
+    price before it was taken is reported from ``submit()`` with
+    ``superseded=True`` and is never pushed; a failed job replaced while
+    it was in flight is reported the same way instead of being retried.
+    """
+
+    def __init__(
+        self,
+        push_func: Callable[[int, int], object] | None = None,
+        workers: int = 2,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ) -> None:
+        self.push_func = push_func or (
+            lambda product_id, new_price: itemku_api.update_price(
+                product_id=product_id,
+                new_price=new_price,
+            )
+        )
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._pending: dict[int, PushJob] = {}
+        self._in_flight: set[int] = set()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._stopped = False
+
+    def submit(
+        self,
+        product_id: int,
+        new_price: int,
+        on_done: Callable[[PushResult], None] | None = None,
+    ) -> None:
+        with self._cond:
+            previous = self._pending.get(product_id)
+            job = PushJob(
+                product_id=product_id,
+                new_price=new_price,
+                on_done=on_done,
+            )
+            if previous is not None:
+                # Latest price wins, the older Note is never written
+                job.coalesced = previous.coalesced + 1
+                logger.debug("Coalesced price push for %s: %s -> %s", product_id, previous.new_price, new_price)
+            self._pending[product_id] = job
+            self._ensure_workers()
+            self._cond.notify_all()
+
+        if previous is not None:
+            # Outside the lock, the callback may write to the sheet
+            self._callback(
+                previous,
+                PushResult(
+                    product_id=product_id,
+                    new_price=previous.new_price,
+                    success=False,
+                    attempts=previous.attempts,
+                    coalesced=previous.coalesced,
+                    error="superseded",
+                    superseded=True,
+                ),
+            )
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending) + len(self._in_flight)
+
+    def flush(
+        self,
+        timeout: float | None = None,
+    ) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._in_flight:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(
+        self,
+        timeout: float | None = None,
+    ) -> None:
+        self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def resize(
+        self,
+        workers: int,
+    ) -> None:
+        """Surplus workers exit once they are idle, missing ones start with the next job."""
+        with self._cond:
+            self.workers = max(1, workers)
+            if self._pending:
+                self._ensure_workers()
+            self._cond.notify_all()
+
+    def _retire(self) -> bool:
+        # Called with self._cond held
+        current = threading.current_thread()
+        if len(self._threads) > self.workers and current in self._threads:
+            self._threads.remove(current)
+            return True
+        return False
+
+    def _ensure_workers(self) -> None:
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        self._stopped = False
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"price-push-{len(self._threads)}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _take_job(self) -> PushJob | None:
+        with self._cond:
+            while True:
+                if self._stopped or self._retire():
+                    return None
+                now = time.monotonic()
+                next_wake = None
+                for product_id, job in self._pending.items():
+                    if product_id in self._in_flight:
+                        continue
+                    if job.not_before <= now:
+                        del self._pending[product_id]
+                        self._in_flight.add(product_id)
+                        return job
+                    if next_wake is None or job.not_before < next_wake:
+                        next_wake = job.not_before
+                self._cond.wait(None if next_wake is None else next_wake - now)
+
+    def _finish(
+        self,
+        job: PushJob,
+        result: PushResult | None,
+    ) -> None:
+        superseded = False
+        with self._cond:
+            self._in_flight.discard(job.product_id)
+            if result is None:
+                if job.product_id in self._pending:
+                    # A newer price came in during the failed push, it replaces the retry
+                    superseded = True
+                else:
+                    delay = min(self.backoff * 2 ** (job.attempts - 1), self.max_backoff)
+                    job.not_before = time.monotonic() + delay
+                    self._pending[job.product_id] = job
+            self._cond.notify_all()
+
+        if superseded:
+            self._callback(
+                job,
+                PushResult(
+                    product_id=job.product_id,
+                    new_price=job.new_price,
+                    success=False,
+                    attempts=job.attempts,
+                    coalesced=job.coalesced,
+                    error="superseded",
+                    superseded=True,
+                ),
+            )
+
+    def _worker(self) -> None:
+        while True:
+            job = self._take_job()
+            if job is None:
+                return
+
+            job.attempts += 1
+            result = None
+            try:
+                self.push_func(job.product_id, job.new_price)
+                result = PushResult(
+                    product_id=job.product_id,
+                    new_price=job.new_price,
+                    success=True,
+                    attempts=job.attempts,
+                    coalesced=job.coalesced,
+                )
+            except Exception as e:
+                logger.warning("Price push failed for %s (attempt %s): %s", job.product_id, job.attempts, e)
+                if job.attempts > self.max_retries:
+                    result = PushResult(
+                        product_id=job.product_id,
+                        new_price=job.new_price,
+                        success=False,
+                        attempts=job.attempts,
+                        coalesced=job.coalesced,
+                        error=str(e),
+                    )
+
+            if result is not None:
+                self._callback(job, result)
+            self._finish(job, result)
+
+    @staticmethod
+    def _callback(
+        job: PushJob,
+        result: PushResult,
+    ) -> None:
+        if job.on_done is None:
+            return
+        try:
+            job.on_done(result)
+        except Exception as e:
+            logger.warning("Price push callback failed for %s: %s", job.product_id, e)
+
+
+price_push_queue = PricePushQueue(
+    workers=int(os.getenv("PRICE_PUSH_WORKERS", "2")),
+    max_retries=int(os.getenv("PRICE_PUSH_MAX_RETRIES", "3")),
+)
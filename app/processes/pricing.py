@@ -0,0 +1,201 @@
+import random
+from dataclasses import dataclass, field
+
+from ..models.crwl_api_models import Product as CrwlProduct
+from ..models.gsheet_model import Product
+from ..shared.consts import KEYWORD_SPLIT_BY_CHARACTER
+from .itemku_api import itemku_api
+
+
+def matches_keywords(
+    product: Product,
+    offer: CrwlProduct,
+) -> bool:
+    """INCLUDE_KEYWORD / EXCLUDE_KEYWORD check against the offer name and server."""
+    return (
+        (
+            product.INCLUDE_KEYWORD
+            and all(
+            (
+                keyword.lower()
+                in offer.name.lower() + offer.server_name.lower()
+                if offer.server_name
+                else ""
+            )
+            for keyword in product.INCLUDE_KEYWORD.split(
+                KEYWORD_SPLIT_BY_CHARACTER
+            )
+        )
+        )
+        or product.INCLUDE_KEYWORD is None
+    ) and (
+        product.EXCLUDE_KEYWORD
+        and not any(
+        (
+            keyword.lower()
+            in offer.name.lower() + offer.server_name.lower()
+            if offer.server_name
+            else ""
+        )
+        for keyword in product.EXCLUDE_KEYWORD.split(
+            KEYWORD_SPLIT_BY_CHARACTER
+        )
+    )
+        or product.EXCLUDE_KEYWORD is None
+    )
+
+
+def filter_competitors(
+    product: Product,
+    offers: list[CrwlProduct],
+    blacklist: list[str],
+    min_price: int,
+    max_price: int | None,
+) -> tuple[list[CrwlProduct], list[CrwlProduct], CrwlProduct | None]:
+    """
+    Returns (offers passing blacklist and keywords, those also within
+    [min_price, max_price], the cheapest of the latter).
+    """
+    valid_keywords_products: list[CrwlProduct] = []
+    valid_products: list[CrwlProduct] = []
+    min_price_product: CrwlProduct | None = None
+
+    for offer in offers:
+        # Check shopname not in backlist
+        if offer.seller.shop_name in blacklist:
+            continue
+        # Check Include and Exclude keyword in product name
+        if not matches_keywords(product, offer):
+            continue
+        valid_keywords_products.append(offer)
+        # Check product price in valid range
+        if (max_price and min_price <= offer.price <= max_price) or (
+            max_price is None and min_price <= offer.price
+        ):
+            valid_products.append(offer)
+            if min_price_product is None or offer.price < min_price_product.price:
+                min_price_product = offer
+
+    return valid_keywords_products, valid_products, min_price_product
+
+
+def min_or_max_target_price(
+    min_price: int,
+    max_price: int | None,
+) -> int:
+    if max_price:
+        target_price = max_price
+
+    else:
+        target_price = min_price
+
+    # Make sure price % 100 == 0
+    return itemku_api.valid_price(target_price)
+
+
+def calculate_competitive_price(
+    product: Product,
+    min_price: int,
+    compare_price: int,
+    rng: random.Random | None = None,
+) -> int:
+    if compare_price - product.DONGIAGIAM_MAX >= min_price:
+        min_target = compare_price - product.DONGIAGIAM_MAX
+    else:
+        min_target = min_price
+    if compare_price - product.DONGIAGIAM_MIN >= min_price:
+        max_target = compare_price - product.DONGIAGIAM_MIN
+    else:
+        max_target = min_price
+
+    target_price = (rng or random).randint(min_target, max_target)
+
+    valid_target_price = itemku_api.valid_price(target_price)
+
+    return valid_target_price
+
+
+@dataclass
+class PriceDecision:
+    target_price: int
+    pushed_price: int
+    compare_price: float | None = None
+    compare_seller: str | None = None
+    compared_to_order_site: bool = False
+    min_price_product: CrwlProduct | None = None
+    valid_products: list[CrwlProduct] = field(default_factory=list)
+    valid_keywords_products: list[CrwlProduct] = field(default_factory=list)
+    od_min_price: float | None = None
+    od_seller: str | None = None
+    od_site: str | None = None
+
+
+def decide_price(
+    product: Product,
+    offers: list[CrwlProduct],
+    min_price: int,
+    max_price: int | None,
+    blacklist: list[str] | None = None,
+    order_site_min_price: tuple | None = None,
+    rng: random.Random | None = None,
+) -> PriceDecision:
+    """
+    The compare-flow price decision, free of network and sheet access so
+    the live loop and the offline replay run the same code.
+    """
+    valid_keywords_products, valid_products, min_price_product = filter_competitors(
+        product, offers, blacklist or [], min_price, max_price
+    )
+
+    new_min_price = min_price
+    od_min_price = None
+    od_seller = None
+    od_site = None
+    if order_site_min_price is not None:
+        od_min_price, od_seller, od_site = order_site_min_price[:3]
+
+    if min_price_product is None:
+        target_price = min_or_max_target_price(
+            min_price=new_min_price,
+            max_price=max_price,
+        )
+        return PriceDecision(
+            target_price=target_price,
+            pushed_price=target_price,
+            valid_products=valid_products,
+            valid_keywords_products=valid_keywords_products,
+            od_min_price=od_min_price,
+            od_seller=od_seller,
+            od_site=od_site,
+        )
+
+    target_price = calculate_competitive_price(
+        product=product,
+        min_price=new_min_price,
+        compare_price=min_price_product.price,
+        rng=rng,
+    )
+
+    if od_min_price is not None and target_price > od_min_price and min_price < od_min_price:
+        new_min_price = min_price
+        compare_price = od_min_price
+        compare_seller = f"{od_seller} ({od_site})"
+        compared_to_order_site = True
+    else:
+        compare_price = min_price_product.price
+        compare_seller = min_price_product.seller.shop_name
+        compared_to_order_site = False
+
+    return PriceDecision(
+        target_price=target_price,
+        pushed_price=new_min_price,
+        compare_price=compare_price,
+        compare_seller=compare_seller,
+        compared_to_order_site=compared_to_order_site,
+        min_price_product=min_price_product,
+        valid_products=valid_products,
+        valid_keywords_products=valid_keywords_products,
+        od_min_price=od_min_price,
+        od_seller=od_seller,
+        od_site=od_site,
+    )
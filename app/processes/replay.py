@@ -0,0 +1,252 @@
+import argparse
+import json
+import random
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from ..models.crwl_api_models import Product as CrwlProduct, Seller
+from ..models.gsheet_model import Product
+from .pricing import PriceDecision, decide_price
+
+# Row settings a replay may override; the rest of Product is not read by decide_price
+SETTING_FIELDS = ("DONGIAGIAM_MIN", "DONGIAGIAM_MAX", "INCLUDE_KEYWORD", "EXCLUDE_KEYWORD")
+
+
+@dataclass
+class RowSnapshot:
+    ts: int
+    round_id: int | None
+    row_index: int
+    product_id: int | None
+    min_price: int
+    max_price: int | None
+    pushed_price: int | None
+    offers: list[CrwlProduct] = field(default_factory=list)
+    order_site_min_price: tuple | None = None
+    # Row settings (SETTING_FIELDS) and blacklist in force when recorded
+    settings: dict = field(default_factory=dict)
+    blacklist: list[str] | None = None
+    # False when compacted or recorded before every offer was kept
+    complete: bool = True
+
+
+@dataclass
+class ReplayResult:
+    snapshot: RowSnapshot
+    decision: PriceDecision
+
+
+@dataclass
+class ReplayReport:
+    results: list[ReplayResult]
+    elapsed: float
+    skipped: int = 0
+
+    def summary(self) -> str:
+        decided = len(self.results)
+        recorded = [r for r in self.results if r.snapshot.pushed_price is not None]
+        changed = sum(1 for r in recorded if r.decision.pushed_price != r.snapshot.pushed_price)
+        competitive = sum(1 for r in self.results if r.decision.min_price_product is not None)
+        order_site = sum(1 for r in self.results if r.decision.compared_to_order_site)
+        rate = decided / self.elapsed if self.elapsed else 0.0
+        return (
+            f"Replayed {decided} row-rounds in {self.elapsed:.2f}s ({rate:.0f}/s): "
+            f"{competitive} undercut a competitor, {order_site} compared to an order site, "
+            f"{changed}/{len(recorded)} pushed a different price than recorded; "
+            f"skipped {self.skipped} compacted or incomplete row-rounds"
+        )
+
+
+def load_snapshots(
+    db_path: str,
+    since: int | None = None,
+    until: int | None = None,
+    rows: Iterable[int] | None = None,
+) -> Iterator[RowSnapshot]:
+    """
+    Rebuild each recorded row decision from the price history store
+    (see ``app.utils.price_history``), in recording order. Snapshots whose
+    offers were compacted away come back with ``complete=False``.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    snapshot_columns = {column[1] for column in conn.execute("PRAGMA table_info(row_snapshots)")}
+    # Stores written before the settings were recorded lack these columns
+    extra_columns = ", ".join(
+        column if column in snapshot_columns else f"NULL AS {column}"
+        for column in (
+            "dongiagiam_min", "dongiagiam_max", "include_keyword", "exclude_keyword",
+            "blacklist", "offers_complete",
+        )
+    )
+    conditions = ["ts >= ?", "ts <= ?"]
+    params: list = [since or 0, until or 2 ** 62]
+    if rows is not None:
+        rows = list(rows)
+        conditions.append(f"row_index IN ({', '.join('?' * len(rows))})")
+        params.extend(rows)
+    where = " AND ".join(conditions)
+
+    sellers = dict(conn.execute("SELECT seller_id, name FROM sellers"))
+
+    offers: dict[tuple, list[CrwlProduct]] = {}
+    for ts, round_id, row_index, seller_id, price, stock, name, server_name in conn.execute(
+        f"SELECT ts, round_id, row_index, seller_id, price, stock, name, server_name "
+        f"FROM competitor_offers WHERE {where} ORDER BY ts, row_index, rank",
+        params,
+    ):
+        # model_construct skips validation, which dominates replay time otherwise
+        offers.setdefault((round_id, row_index, ts), []).append(
+            CrwlProduct.model_construct(
+                id=0,
+                name=name or "",
+                min_order=1,
+                price=price,
+                server_name=server_name,
+                stock=stock or 0,
+                base_unit=1,
+                seller=Seller.model_construct(id=seller_id, shop_name=sellers[seller_id]),
+            )
+        )
+
+    order_sites: dict[tuple, tuple] = {}
+    for ts, round_id, row_index, site, seller_id, price in conn.execute(
+        f"SELECT ts, round_id, row_index, site, seller_id, price FROM order_site_prices WHERE {where}",
+        params,
+    ):
+        key = (round_id, row_index, ts)
+        current = order_sites.get(key)
+        # Like calculate_price_stock_fake, only positive prices count
+        if price > 0 and (current is None or price < current[0]):
+            order_sites[key] = (price, sellers[seller_id], site)
+
+    for (
+        ts, round_id, row_index, product_id, min_price, max_price, pushed_price,
+        dongiagiam_min, dongiagiam_max, include_keyword, exclude_keyword, blacklist, offers_complete,
+    ) in conn.execute(
+        f"SELECT ts, round_id, row_index, product_id, min_price, max_price, pushed_price, {extra_columns} "
+        f"FROM row_snapshots WHERE {where} ORDER BY ts, row_index",
+        params,
+    ):
+        settings = {
+            "DONGIAGIAM_MIN": dongiagiam_min,
+            "DONGIAGIAM_MAX": dongiagiam_max,
+            "INCLUDE_KEYWORD": include_keyword,
+            "EXCLUDE_KEYWORD": exclude_keyword,
+        }
+        yield RowSnapshot(
+            ts=ts,
+            round_id=round_id,
+            row_index=row_index,
+            product_id=product_id,
+            min_price=min_price,
+            max_price=max_price,
+            pushed_price=pushed_price,
+            offers=offers.get((round_id, row_index, ts), []),
+            order_site_min_price=order_sites.get((round_id, row_index, ts)),
+            settings={name: value for name, value in settings.items() if value is not None},
+            blacklist=None if blacklist is None else json.loads(blacklist),
+            complete=bool(offers_complete),
+        )
+    conn.close()
+
+
+def replay(
+    snapshots: Iterable[RowSnapshot],
+    settings: dict[int, dict],
+    default_settings: dict | None = None,
+    blacklists: dict[int, list[str]] | None = None,
+    seed: int = 0,
+) -> ReplayReport:
+    """
+    Run recorded snapshots through ``decide_price`` with the row settings
+    (DONGIAGIAM_MIN/MAX, INCLUDE/EXCLUDE_KEYWORD) and blacklist recorded
+    with them. ``default_settings``, then ``settings`` per row, override the
+    recorded settings and ``blacklists`` the recorded blacklist, so an
+    experiment only names what it changes. Incomplete snapshots are
+    skipped: their filtered-out offers are gone. No network, and the same
+    seed gives the same decisions.
+    """
+    rng = random.Random(seed)
+    default_settings = default_settings or {}
+    blacklists = blacklists or {}
+    results = []
+    skipped = 0
+
+    started_at = time.perf_counter()
+    for snapshot in snapshots:
+        if not snapshot.complete:
+            skipped += 1
+            continue
+        row_settings = {
+            "DONGIAGIAM_MIN": 0,
+            "DONGIAGIAM_MAX": 0,
+            **snapshot.settings,
+            **default_settings,
+            **settings.get(snapshot.row_index, {}),
+        }
+        product = Product.model_construct(
+            index=snapshot.row_index,
+            **{name: row_settings.get(name) for name in SETTING_FIELDS},
+        )
+
+        decision = decide_price(
+            product=product,
+            offers=snapshot.offers,
+            min_price=snapshot.min_price,
+            max_price=snapshot.max_price,
+            blacklist=blacklists.get(snapshot.row_index, snapshot.blacklist),
+            order_site_min_price=snapshot.order_site_min_price,
+            rng=rng,
+        )
+        results.append(ReplayResult(snapshot=snapshot, decision=decision))
+
+    return ReplayReport(results=results, elapsed=time.perf_counter() - started_at, skipped=skipped)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded rows through the pricing strategy")
+    parser.add_argument("--db", default="storage/price_history.db")
+    parser.add_argument(
+        "--settings",
+        help='JSON file: {"default": {...}, "rows": {"12": {...}}, "blacklists": {"12": [...]}}',
+    )
+    parser.add_argument("--dongiagiam-min", type=int)
+    parser.add_argument("--dongiagiam-max", type=int)
+    parser.add_argument("--include-keyword")
+    parser.add_argument("--exclude-keyword")
+    parser.add_argument("--row", type=int, action="append", help="Only replay these rows")
+    parser.add_argument("--since", type=int, help="Unix timestamp")
+    parser.add_argument("--until", type=int, help="Unix timestamp")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    config = {}
+    if args.settings:
+        with open(args.settings, encoding="utf-8") as f:
+            config = json.load(f)
+
+    # Only what the experiment changes, the rest comes from the recorded snapshot
+    default_settings = dict(config.get("default", {}))
+    for name, value in (
+        ("DONGIAGIAM_MIN", args.dongiagiam_min),
+        ("DONGIAGIAM_MAX", args.dongiagiam_max),
+        ("INCLUDE_KEYWORD", args.include_keyword),
+        ("EXCLUDE_KEYWORD", args.exclude_keyword),
+    ):
+        if value is not None:
+            default_settings[name] = value
+
+    report = replay(
+        load_snapshots(args.db, since=args.since, until=args.until, rows=args.row),
+        settings={int(k): v for k, v in config.get("rows", {}).items()},
+        default_settings=default_settings,
+        blacklists={int(k): v for k, v in config.get("blacklists", {}).items()},
+        seed=args.seed,
+    )
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
+import os
 from typing import Final
 
 
 COL_META_FIELD_NAME: Final[str] = "col_name_xxx"
 
-CRWL_API_BASE_URL: Final[str] = "https://api-gateway.itemku.com/v1"
+# Base URLs can be pointed at local stand-ins (benchmarks/fake_services.py)
+CRWL_API_BASE_URL: Final[str] = os.getenv("CRWL_API_BASE_URL", "https://api-gateway.itemku.com/v1")
 
-ITEMKU_API_BASE_URL: Final[str] = "https://tokoku-gateway.itemku.com/api"
+ITEMKU_API_BASE_URL: Final[str] = os.getenv("ITEMKU_API_BASE_URL", "https://tokoku-gateway.itemku.com/api")
+
+G2G_API_URL: Final[str] = os.getenv("G2G_API_URL", "https://sls.g2g.com/offer/search")
+
+BIJIAQI_BASE_URL: Final[str] = os.getenv("BIJIAQI_BASE_URL", "https://www.bijiaqi.com")
+
+# Root of the Google Sheets API, e.g. http://127.0.0.1:8765
+SHEETS_API_URL: Final[str | None] = os.getenv("SHEETS_API_URL") or None
 
 KEYWORD_SPLIT_BY_CHARACTER: Final[str] = ","
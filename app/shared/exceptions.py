@@ -4,3 +4,7 @@ class CrwlError(Exception):
 
 class SheetError(Exception):
     pass
+
+
+class BrowserError(Exception):
+    pass
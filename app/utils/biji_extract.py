@@ -1,3 +1,4 @@
+import logging
 import csv
 from typing import List, Optional, Dict, Any
 
@@ -6,6 +7,11 @@ from pydantic import BaseModel, Field, field_validator, ConfigDict, ValidationIn
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
 
 from app.models.gsheet_model import BIJ
+from app.shared.consts import BIJIAQI_BASE_URL
+from app.utils.host_limits import host_limiter
+from app.utils.offer_archive import archive_offers
+
+logger = logging.getLogger(__name__)
 
 
 class FlexibleBaseModel(BaseModel):
@@ -126,6 +132,7 @@ def bij_lowest_price(
     data.BIJ_NAME = str(data.BIJ_NAME) + " "
     try:
         item_list = get_price_list(BIJ_HOST_DATA, int(data.BIJ_SERVER))
+        archive_offers("bijiaqi", data.index, item_list)
         lowest_price = get_the_lowest_price(item_list, data.BIJ_DELIVERY_METHOD, data.BIJ_STOCKMIN, data.BIJ_STOCKMAX,
             black_list)
         return lowest_price
@@ -138,13 +145,13 @@ def get_price_list(server_map: dict, server_id: int) -> list[ShopDemand] | None:
 
     game_id = find_game_id(server_map, server_id)
     if not game_id:
-        print(f"Could not find a gameId for server_id: {server_id}")
+        logger.warning("Could not find a gameId for server_id: %s", server_id)
         return None
 
     response = game_service.fetch_shop_demand(game_id, server_id)
 
     if not response or not response.list:
-        print(f"No items found for game {game_id}, server {server_id}.")
+        logger.info("No items found for game %s, server %s.", game_id, server_id)
         return None
 
     return response.list
@@ -182,7 +189,7 @@ def get_the_lowest_price(
 
 
 class GameService:
-    API_BASE_URL = "https://www.bijiaqi.com/api/v1/any/shop"
+    API_BASE_URL = f"{BIJIAQI_BASE_URL}/api/v1/any/shop"
     HEADERS = {'Content-Type': 'application/json'}
 
     def __init__(self):
@@ -228,17 +235,18 @@ class GameService:
 
     def _fetch_games_from_api(self) -> List[Dict[str, Any]]:
         url = f"{self.API_BASE_URL}/home/games"
-        print(f"Fetching games from API: {url}...")
+        logger.debug("Fetching games from API: %s...", url)
 
         try:
-            response = requests.post(url, headers=self.HEADERS, json={}, timeout=10)
+            with host_limiter.limit("bijiaqi"):
+                response = host_limiter.session("bijiaqi").post(url, headers=self.HEADERS, json={}, timeout=10)
             response.raise_for_status()
             games_data = response.json()
-            print(f"Fetched {len(games_data)} games from API.")
+            logger.debug("Fetched %s games from API.", len(games_data))
             return games_data
 
         except requests.exceptions.RequestException as e:
-            print(f"Error fetching games from API: {e}")
+            logger.warning("Error fetching games from API: %s", e)
             return []
 
     def _fetch_servers_from_api(self, game_id: int) -> List[Dict[str, Any]]:
@@ -252,20 +260,21 @@ class GameService:
             url = f"{self.API_BASE_URL}/home/servers"
             payload = {"gameId": game_id}
 
-            print(f"▶️  Calling API for servers of game ID {game_id} from: {url}...")
+            logger.debug("▶️  Calling API for servers of game ID %s from: %s...", game_id, url)
 
-            response = requests.post(url, headers=self.HEADERS, json=payload, timeout=30)
+            with host_limiter.limit("bijiaqi"):
+                response = host_limiter.session("bijiaqi").post(url, headers=self.HEADERS, json=payload, timeout=30)
             response.raise_for_status()
 
             servers_data = response.json()
-            print(f"✅  Successfully retrieved {len(servers_data)} servers for game ID {game_id}.")
+            logger.debug("✅  Successfully retrieved %s servers for game ID %s.", len(servers_data), game_id)
             return servers_data
 
         try:
             result = _make_api_call()
             return result if result is not None else []
         except Exception as e:
-            print(f"❌  All retry attempts failed for game ID {game_id}: {e}")
+            logger.warning("❌  All retry attempts failed for game ID %s: %s", game_id, e)
             return []
 
     def get_final_result(self) -> List[Dict[str, Any]]:
@@ -279,7 +288,7 @@ class GameService:
         reraise=False  # Do not re-raise the exception after the last attempt fails
     )
     def fetch_shop_demand(self, game_id: int, server_id: int) -> Optional['ShopDemandResponse']:
-        url = "https://www.bijiaqi.com/api/shop/demand/listShopDemand"
+        url = f"{BIJIAQI_BASE_URL}/api/shop/demand/listShopDemand"
         payload = {
             "page": 1,
             "limit": 100,
@@ -293,7 +302,8 @@ class GameService:
         # print(f"Calling API for shop demand for game {game_id}, server {server_id}...")
 
         try:
-            response = requests.post(url, headers=self.HEADERS, json=payload, timeout=10)
+            with host_limiter.limit("bijiaqi"):
+                response = host_limiter.session("bijiaqi").post(url, headers=self.HEADERS, json=payload, timeout=10)
 
             # This will trigger a retry if the status code is 4xx or 5xx
             response.raise_for_status()
@@ -305,12 +315,12 @@ class GameService:
             return validated_response
 
         except requests.exceptions.RequestException as e:
-            print(f"API call failed: {e}. Retrying if possible...")
+            logger.warning("API call failed: %s. Retrying if possible...", e)
             raise
 
         except Exception as e:
             # Catch other errors (like Pydantic validation) that should NOT be retried.
-            print(f"Error processing shop demand data: {e}")
+            logger.warning("Error processing shop demand data: %s", e)
             return None
 
 
@@ -327,9 +337,9 @@ def load_server_map_from_csv(filepath: str) -> dict:
                         server_id = int(row[1])
                         server_map[server_id] = game_id
                     except ValueError:
-                        print(f"Ignoring {row[0]} as it is not a number.")
+                        logger.debug("Ignoring %s as it is not a number.", row[0])
     except FileNotFoundError:
-        print(f"Can't find {filepath}.")
+        logger.warning("Can't find %s.", filepath)
         return {}
     return server_map
 
@@ -0,0 +1,156 @@
+import logging
+import os
+import shutil
+import socket
+
+from app.utils.paths import SRC_PATH
+
+logger = logging.getLogger(__name__)
+
+# Cache folders Chrome rebuilds on its own; cookies and Local State are kept
+CACHE_DIRS = [
+    os.path.join("Default", "Cache"),
+    os.path.join("Default", "Code Cache"),
+    os.path.join("Default", "GPUCache"),
+    os.path.join("Default", "Service Worker", "CacheStorage"),
+    os.path.join("Default", "Service Worker", "ScriptCache"),
+    "GrShaderCache",
+    "ShaderCache",
+]
+
+# Left behind when Chrome is killed, they block the next launch on the profile
+SINGLETON_FILES = ["SingletonLock", "SingletonCookie", "SingletonSocket"]
+
+# Tried in turn (profile-1, profile-2, ...) while another live Chrome holds the profile
+MAX_PROFILE_FALLBACKS = 8
+
+
+def dir_size(
+    path: str,
+) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for file_name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file_name))
+            except OSError:
+                pass
+    return total
+
+
+def lock_owner(
+    profile_dir: str,
+) -> tuple[str, int] | None:
+    """(host, pid) of the Chrome holding the profile, read from the SingletonLock symlink."""
+    try:
+        target = os.readlink(os.path.join(profile_dir, "SingletonLock"))
+    except (OSError, NotImplementedError):
+        return None
+    host, _, pid = target.rpartition("-")
+    if not host or not pid.isdigit():
+        return None
+    return host, int(pid)
+
+
+def pid_alive(
+    pid: int,
+) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def profile_in_use(
+    profile_dir: str,
+) -> bool:
+    """
+    Whether another Chrome may still be using the profile: its owner is
+    alive on this host, on another host sharing the folder, or unknown.
+    """
+    lockfile = os.path.join(profile_dir, "lockfile")
+    if os.name == "nt" and os.path.exists(lockfile):
+        # Chrome on Windows keeps this file open while it runs
+        try:
+            os.remove(lockfile)
+        except PermissionError:
+            return True
+    if not os.path.lexists(os.path.join(profile_dir, "SingletonLock")):
+        return False
+    owner = lock_owner(profile_dir)
+    if owner is None:
+        return True
+    host, pid = owner
+    if host != socket.gethostname():
+        return True
+    return pid_alive(pid)
+
+
+def claim_profile(
+    profile_dir: str,
+) -> str:
+    """
+    ``profile_dir``, or the first free ``profile_dir-N`` when a live
+    Chrome (a hung one, or a second node on the same folder) holds it.
+    Singleton files are only removed once their owner is known to be dead.
+    """
+    candidates = [profile_dir] + [f"{profile_dir}-{n}" for n in range(1, MAX_PROFILE_FALLBACKS + 1)]
+    for candidate in candidates:
+        os.makedirs(candidate, exist_ok=True)
+        if profile_in_use(candidate):
+            logger.warning("Chrome profile %s is held by %s, trying the next one", candidate, lock_owner(candidate))
+            continue
+        for file_name in SINGLETON_FILES:
+            path = os.path.join(candidate, file_name)
+            if os.path.lexists(path):
+                os.remove(path)
+        return candidate
+    raise RuntimeError(f"Every Chrome profile {profile_dir}[-1..{MAX_PROFILE_FALLBACKS}] is in use")
+
+
+def prepare_profile(
+    profile_dir: str,
+    max_cache_mb: int,
+) -> str:
+    """Claim the profile (see ``claim_profile``) and trim its caches. Returns the directory to use."""
+    profile_dir = claim_profile(profile_dir)
+
+    size_mb = dir_size(profile_dir) / 1024 / 1024
+    if size_mb <= max_cache_mb:
+        return profile_dir
+
+    logger.info("Chrome profile is %.0f MB (cap %s MB), clearing caches", size_mb, max_cache_mb)
+    for cache_dir in CACHE_DIRS:
+        shutil.rmtree(os.path.join(profile_dir, cache_dir), ignore_errors=True)
+    return profile_dir
+
+
+def browser_options(
+    profile_dir: str | None = None,
+    max_cache_mb: int | None = None,
+) -> dict:
+    """
+    Keyword arguments for ``SB(...)``. With a profile directory, cookies,
+    Cloudflare clearance and the HTTP cache survive browser relaunches.
+    BROWSER_PROFILE_DIR="" disables the persistent profile.
+    """
+    if profile_dir is None:
+        profile_dir = os.getenv(
+            "BROWSER_PROFILE_DIR",
+            str(SRC_PATH.joinpath("storage", "chrome_profile")),
+        )
+    if max_cache_mb is None:
+        max_cache_mb = int(os.getenv("BROWSER_CACHE_MB", "300"))
+
+    options = {"headless": True, "uc": True}
+    if not profile_dir:
+        return options
+
+    options["user_data_dir"] = prepare_profile(profile_dir, max_cache_mb)
+    options["chromium_arg"] = f"--disk-cache-size={max_cache_mb * 1024 * 1024}"
+    return options
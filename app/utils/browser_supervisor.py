@@ -0,0 +1,94 @@
+import logging
+import time
+from typing import Callable, TypeVar
+
+from app.shared.exceptions import BrowserError
+from app.utils.browser_profile import browser_options
+from app.utils.memory_watchdog import memory_watchdog
+from app.utils.page_pool import PagePool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BrowserSupervisor:
+    """
+    Owns the UC Chrome lifetime for the main loop.
+
+    Row and round failures keep the browser alive; it is only relaunched
+    when the health probe says Chrome is gone (``BrowserError``), after
+    ``max_pages`` navigations or when the memory watchdog asks for it, so a
+    bad row no longer costs a 30s restart.
+    """
+
+    def __init__(
+        self,
+        url: str = "https://www.itemku.com/",
+        max_pages: int = 500,
+        relaunch_delay: float = 30,
+        round_error_delay: float = 10,
+    ) -> None:
+        self.url = url
+        self.max_pages = max_pages
+        self.relaunch_delay = relaunch_delay
+        self.round_error_delay = round_error_delay
+        self.launches = 0
+
+    def run(
+        self,
+        round_func: Callable[[PagePool], None],
+    ) -> None:
+        from seleniumbase import SB
+
+        memory_watchdog.start()
+        while True:
+            try:
+                with SB(**browser_options()) as sb:
+                    sb.activate_cdp_mode(self.url)
+                    memory_watchdog.reset()
+                    self.launches += 1
+                    logger.info("Browser launched (%s)", self.launches)
+                    self._run_browser(PagePool(sb), round_func)
+            except BrowserError as e:
+                logger.warning("Browser died, relaunching: %s", e)
+                time.sleep(self.round_error_delay)
+            except Exception as e:
+                logger.warning("Browser launch failed: %s", e)
+                time.sleep(self.relaunch_delay)
+
+    def run_once(
+        self,
+        func: Callable[[PagePool], T],
+    ) -> T:
+        """Launch the browser, run ``func`` once and close it, without relaunching on errors."""
+        from seleniumbase import SB
+
+        with SB(**browser_options()) as sb:
+            sb.activate_cdp_mode(self.url)
+            self.launches += 1
+            logger.info("Browser launched (%s)", self.launches)
+            return func(PagePool(sb))
+
+    def _run_browser(
+        self,
+        page_pool: PagePool,
+        round_func: Callable[[PagePool], None],
+    ) -> None:
+        while True:
+            try:
+                round_func(page_pool)
+            except BrowserError:
+                raise
+            except Exception as e:
+                logger.warning("Round failed: %s", e)
+                if not page_pool.is_alive():
+                    raise BrowserError(e) from e
+                time.sleep(self.round_error_delay)
+
+            if page_pool.pages >= self.max_pages:
+                logger.info("Recycling browser after %s pages", page_pool.pages)
+                return
+            if memory_watchdog.recycle_requested:
+                logger.info("Recycling browser, memory: %s", memory_watchdog.summary())
+                return
@@ -1,7 +1,10 @@
+import logging
 import os
 
 from app.utils.google_api import StockManager
 
+logger = logging.getLogger(__name__)
+
 
 def getCNYRate() -> float:
     try:
@@ -13,5 +16,5 @@ def getCNYRate() -> float:
         # return gs.load_cell_value(_rate_sheet, _rate_worksheet, _cell)
         return cell_value
     except Exception as e:
-        print(f"Error reading CNY rate: {e}")
+        logger.warning("Error reading CNY rate: %s", e)
         return 1
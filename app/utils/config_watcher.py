@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+from typing import Callable
+
+from dotenv import dotenv_values
+
+logger = logging.getLogger(__name__)
+
+# Read once at startup by module-level singletons that cannot be swapped live
+RESTART_KEYS: frozenset[str] = frozenset({
+    "CRWL_API_BASE_URL",
+    "ITEMKU_API_BASE_URL",
+    "G2G_API_URL",
+    "BIJIAQI_BASE_URL",
+    "SHEETS_API_URL",
+    "METRICS_PORT",
+    "METRICS_HOST",
+    "TRACING",
+    "TRACE_FILE",
+    "TRACE_MAX_MB",
+    "TRACE_BACKUP_COUNT",
+    "PRICE_HISTORY_DB",
+    "OFFER_ARCHIVE_DIR",
+    "ROUND_JOURNAL_DB",
+    "SHARD_LEASE_DB",
+    "SHARD_NODE_ID",
+    "SHARD_LEASE_TTL",
+    "LOG_LEVEL",
+    "LOG_DIR",
+    "LOG_CONSOLE",
+    "LOG_MAX_MB",
+    "LOG_BACKUP_COUNT",
+})
+
+
+def _matches(
+    key: str,
+    patterns: tuple[str, ...],
+) -> bool:
+    return any(key.startswith(pattern[:-1]) if pattern.endswith("*") else key == pattern for pattern in patterns)
+
+
+class ConfigWatcher:
+    """
+    Hot reload of ``setting.env`` without restarting the process (and
+    UC Chrome). ``poll()`` is called at round boundaries: when the file's
+    mtime moved, the keys whose value changed are copied into
+    ``os.environ`` and handed to the subscribers that cache them.
+
+    Settings read with ``os.getenv`` on every use (ROW_WORKERS,
+    RELAX_TIME_EACH_ROUND, the rate sheets, ...) need no subscriber.
+    """
+
+    def __init__(
+        self,
+        path: str,
+    ) -> None:
+        self.path = path
+        self.reloads = 0
+        self._values: dict[str, str | None] = {}
+        self._mtime = self._stat()
+        self._values = self._read()
+        self._subscribers: list[tuple[tuple[str, ...], Callable[[set[str]], None]]] = []
+
+    def subscribe(
+        self,
+        callback: Callable[[set[str]], None],
+        *keys: str,
+    ) -> None:
+        """Call ``callback`` with the changed keys among ``keys`` (``PREFIX_*`` matches a prefix)."""
+        self._subscribers.append((keys, callback))
+
+    def _stat(self) -> int | None:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read(self) -> dict[str, str | None]:
+        if self._mtime is None:
+            return {}
+        try:
+            return dict(dotenv_values(self.path))
+        except OSError as e:
+            logger.warning("Reading %s failed: %s", self.path, e)
+            return dict(self._values)
+
+    def poll(self) -> set[str]:
+        mtime = self._stat()
+        if mtime == self._mtime:
+            return set()
+        self._mtime = mtime
+        values = self._read()
+        changed = {
+            key for key in values.keys() | self._values.keys()
+            if values.get(key) != self._values.get(key)
+        }
+        previous, self._values = self._values, values
+        if not changed:
+            return set()
+
+        for key in changed:
+            if values.get(key) is not None:
+                os.environ[key] = values[key]
+            elif os.environ.get(key) == previous.get(key):
+                # Removed from the file: fall back to the default, unless the shell set it
+                os.environ.pop(key, None)
+        self.reloads += 1
+        logger.info("Reloaded %s: %s", self.path, ", ".join(sorted(changed)))
+
+        for keys, callback in self._subscribers:
+            matched = {key for key in changed if _matches(key, keys)}
+            if not matched:
+                continue
+            try:
+                callback(matched)
+            except Exception as e:
+                logger.warning("Applying %s failed: %s", ", ".join(sorted(matched)), e)
+
+        restart = sorted(changed & RESTART_KEYS)
+        if restart:
+            logger.warning("Restart to apply: %s", ", ".join(restart))
+        return changed
+
+    @staticmethod
+    def from_env() -> "ConfigWatcher":
+        return ConfigWatcher(os.getenv("SETTINGS_FILE", "setting.env"))
+
+
+_lock = threading.Lock()
+_config_watcher: ConfigWatcher | None = None
+
+
+def get_config_watcher() -> ConfigWatcher:
+    """Watcher of SETTINGS_FILE, created on first use."""
+    global _config_watcher
+    with _lock:
+        if _config_watcher is None:
+            _config_watcher = ConfigWatcher.from_env()
+        return _config_watcher
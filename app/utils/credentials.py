@@ -0,0 +1,108 @@
+import datetime
+import functools
+import logging
+import os
+import threading
+
+import constants
+from app.utils.paths import SRC_PATH
+
+logger = logging.getLogger(__name__)
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+
+@functools.cache
+def _shared_credentials_class():
+    # google-auth is only imported once a sheet is actually opened
+    from google.oauth2 import service_account
+
+    class SharedCredentials(service_account.Credentials):
+        """Service account credentials that refresh once for all threads and clients."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._refresh_lock = threading.Lock()
+
+        def seconds_left(self) -> float | None:
+            if self.token is None or self.expiry is None:
+                return None
+            now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            return (self.expiry - now).total_seconds()
+
+        def refresh(self, request):
+            with self._refresh_lock:
+                # Another thread may have refreshed while this one waited
+                if self.token is not None and self.valid:
+                    return
+                super().refresh(request)
+
+        def refresh_before(self, request, margin: float) -> bool:
+            with self._refresh_lock:
+                seconds_left = self.seconds_left()
+                if seconds_left is not None and seconds_left > margin:
+                    return False
+                super().refresh(request)
+                return True
+
+    return SharedCredentials
+
+
+class CredentialManager:
+    """
+    One service-account key, read once, and one access token shared by the
+    gspread clients (``gsheet``, ``GSheet``) and the Sheets API client
+    (``StockManager``). Every client authorizes with the same credentials
+    object, so the token is fetched once and refreshed by whichever
+    request first finds it about to expire.
+    """
+
+    def __init__(
+        self,
+        key_path: str | None = None,
+        refresh_margin: float = 300,
+    ) -> None:
+        self.key_path = key_path
+        self.refresh_margin = refresh_margin
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._credentials = None
+
+    def credentials(self):
+        with self._lock:
+            if self._credentials is None:
+                # KEYS_PATH is resolved on first use, after setting.env was loaded
+                self._credentials = _shared_credentials_class().from_service_account_file(
+                    self.key_path or self.key_path_from_env(),
+                    scopes=SCOPES,
+                )
+            return self._credentials
+
+    def ensure_fresh(self) -> None:
+        """Refresh ahead of time when the token expires within ``refresh_margin`` seconds."""
+        from google.auth.transport.requests import Request
+
+        if self.credentials().refresh_before(Request(), self.refresh_margin):
+            self.refreshes += 1
+            logger.debug("Refreshed the service account token")
+
+    def reset(self) -> None:
+        """Drop the cached key and token, e.g. after KEYS_PATH changed."""
+        with self._lock:
+            self._credentials = None
+
+    @staticmethod
+    def key_path_from_env() -> str:
+        return str(SRC_PATH.joinpath(os.getenv("KEYS_PATH") or constants.KEY_PATH))
+
+    @staticmethod
+    def from_env() -> "CredentialManager":
+        return CredentialManager(
+            refresh_margin=float(os.getenv("CREDENTIALS_REFRESH_MARGIN", "300")),
+        )
+
+
+credential_manager = CredentialManager.from_env()
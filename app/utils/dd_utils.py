@@ -2,11 +2,12 @@ import copy
 import re
 from dataclasses import dataclass, asdict
 
-import requests
 from bs4 import BeautifulSoup, Tag
 from typing import List, Dict, Any, Optional, Tuple
 
 from app.models.gsheet_model import DD
+from app.utils.host_limits import host_limiter
+from app.utils.offer_archive import archive_offers
 
 
 class FilterParams:
@@ -145,10 +146,16 @@ def get_dd373_listings(url: str) -> List[DD373Product]:
     # Extract domain for complete URLs
     domain = url.split('/s-')[0] if '/s-' in url else 'https://www.dd373.com'
 
-    response = requests.get(url, headers=headers)
+    with host_limiter.limit("dd373"):
+        response = host_limiter.session("dd373").get(url, headers=headers)
     response.raise_for_status()
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+    return parse_dd373_listings(response.text, domain)
+
+
+def parse_dd373_listings(html: str, domain: str = "https://www.dd373.com") -> List[DD373Product]:
+    """Product listings of an already fetched DD373 search page."""
+    soup = BeautifulSoup(html, 'html.parser')
 
     # Find all product listings
     goods_list_items = soup.select('div.goods-list-item')
@@ -188,6 +195,7 @@ def get_dd_min_price(dd: DD) -> Optional[Tuple[float, str]]:
     _filterParams.level_min = dd.DD_LEVELMIN
     list_offers = []
     list_offers = get_dd373_listings(dd.DD_PRODUCT_COMPARE)
+    archive_offers("dd373", dd.index, list_offers)
     filter_list = _filter_valid_offer_item(list_offers, _filterParams)
 
     if not filter_list:
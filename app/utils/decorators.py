@@ -1,6 +1,9 @@
+import logging
 import time
 from typing import Callable
 
+logger = logging.getLogger(__name__)
+
 
 def retry_on_fail(max_retries: int = 3, sleep_interval: float = 0.5):
     def wrapper(func: Callable):
@@ -11,9 +14,7 @@ def retry_on_fail(max_retries: int = 3, sleep_interval: float = 0.5):
                 except Exception as e:
                     if i == max_retries:
                         raise e
-                    print(
-                        f"Retry: {func.__name__}, {i + 1} times, failed reason: {e}"
-                    )
+                    logger.warning("Retry: %s, %s times, failed reason: %s", func.__name__, i + 1, e)
                     time.sleep(sleep_interval)
 
         return inner
@@ -1,12 +1,15 @@
-import requests
+import logging
 from bs4 import BeautifulSoup, Tag
 from pydantic import BaseModel
 from requests.exceptions import HTTPError
 
 from app.decorator.retry import retry
 from .exceptions import FUNCrawlerError
+from .host_limits import host_limiter
 from ..models.gsheet_model import FUN
 
+logger = logging.getLogger(__name__)
+
 
 class FUNOfferItem(BaseModel):
     seller: str
@@ -60,7 +63,8 @@ def __get_soup(url: str) -> BeautifulSoup:
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
-    res = requests.get(url=url, cookies={"cy": "usd"}, headers=headers)
+    with host_limiter.limit("funpay"):
+        res = host_limiter.session("funpay").get(url=url, cookies={"cy": "usd"}, headers=headers)
     res.raise_for_status()
     return BeautifulSoup(res.text, "html.parser")
 
@@ -84,7 +88,7 @@ def __extract_filters_data(
             filter_value_text = filter_str.split("_", 1)[1].lower()
         except IndexError:
             # Skip malformed filters that don't contain an underscore
-            print(f"Skipping malformed filter: {filter_str}")
+            logger.warning("Skipping malformed filter: %s", filter_str)
             continue
 
         found_filter = False
@@ -173,13 +177,20 @@ def fun_extract_offer_items(
     Extracts offer items from a FunPay URL, applying a list of filters.
     Handles both data-attribute filters and description-based text search filters.
     """
+    soup = __get_soup(url)
+    return fun_offer_items_from_soup(soup, filters)
+
+
+def fun_offer_items_from_soup(
+        soup: BeautifulSoup,
+        filters: list[str],
+) -> list[FUNOfferItem]:
+    """Offer items of an already fetched FunPay lot page, see ``fun_extract_offer_items``."""
     # 1. Separate filters for data-attributes (e.g., 'f-method_trade')
     #    from filters for description text search (e.g., 'desc_Raccoon').
     data_filters = [f for f in filters if not f.startswith("desc_")]
     desc_keywords = [f.split("_", 1)[1].lower() for f in filters if f.startswith("desc_")]
 
-    soup = __get_soup(url)
-
     # 2. Build the CSS selector from the data-attribute filters.
     filters_data = __extract_filters_data(soup, data_filters)
     filter_data_txt = ""
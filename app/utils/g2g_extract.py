@@ -1,3 +1,4 @@
+import logging
 from enum import Enum
 from typing import Final
 from urllib.parse import urlparse, parse_qs, urlencode, unquote
@@ -8,6 +9,10 @@ from requests import HTTPError
 
 from app.decorator.retry import retry
 from app.models.gsheet_model import G2G
+from app.shared.consts import G2G_API_URL
+from app.utils.host_limits import host_limiter
+
+logger = logging.getLogger(__name__)
 
 
 class Seller(BaseModel):
@@ -158,7 +163,7 @@ def build_g2g_request_details(user_url: str, currency: str = 'JPY', country: str
     sort_value = query_params.get('sort', [''])[0]
 
     # Construct the API request URL with required parameters
-    api_base_url = 'https://sls.g2g.com/offer/search'
+    api_base_url = G2G_API_URL
     api_params = {
         'seo_term': seo_term,
         'filter_attr': filter_attr_value,  # Note: 'fa' is renamed to 'filter_attr'
@@ -206,7 +211,8 @@ def fetch_g2g_offers(user_url: str, currency: str = 'JPY', country: str = 'JP')
     # print("[*] Đang gửi yêu cầu đến máy chủ G2G...")
     try:
         # Send the GET request to the API endpoint
-        response = requests.get(api_url, headers=headers, timeout=10)
+        with host_limiter.limit("g2g"):
+            response = host_limiter.session("g2g").get(api_url, headers=headers, timeout=10)
 
         # Raise an exception for bad status codes (4xx or 5xx)
         response.raise_for_status()
@@ -217,10 +223,10 @@ def fetch_g2g_offers(user_url: str, currency: str = 'JPY', country: str = 'JP')
         return response.json()
 
     except requests.exceptions.HTTPError as http_err:
-        print(f"[LỖI] Lỗi HTTP xảy ra: {http_err}")
-        print(f"Nội dung phản hồi: {response.text}")
+        logger.warning("[LỖI] Lỗi HTTP xảy ra: %s", http_err)
+        logger.warning("Nội dung phản hồi: %s", response.text)
     except requests.exceptions.RequestException as err:
-        print(f"[LỖI] Đã xảy ra lỗi khi gửi yêu cầu: {err}")
+        logger.warning("[LỖI] Đã xảy ra lỗi khi gửi yêu cầu: %s", err)
 
     return None
 
@@ -273,7 +279,7 @@ def g2g_extract_offer_items(
     if offer_items_raw is not None:
         offer_items = extract_offer_items_from_response(offer_items_raw)
     else:
-        print("[LỖI] Không thể lấy dữ liệu từ G2G.")
+        logger.warning("[LỖI] Không thể lấy dữ liệu từ G2G.")
     return offer_items
 
 
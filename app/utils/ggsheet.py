@@ -1,23 +1,19 @@
 import gspread.urls
 import gspread.utils
-from oauth2client.service_account import ServiceAccountCredentials
 import gspread
 
+from app.utils.credentials import credential_manager
+from app.utils.sheets_endpoint import SheetsHTTPClient
+
 
 class GSheet:
     client: gspread.client.Client
 
-    def __init__(self, keypath="keys.json"):
-        self.client = self.__get_gspread(keypath)
-
-    def __get_gspread(self, keypath="keys.json"):
-        scope = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-        ]
-        creds = ServiceAccountCredentials.from_json_keyfile_name(keypath, scope)  # type: ignore
-        client = gspread.auth.authorize(creds)  # type: ignore
-        return client
+    def __init__(self, client: gspread.client.Client | None = None):
+        self.client = client or self.__get_gspread()
+
+    def __get_gspread(self):
+        return gspread.auth.authorize(credential_manager.credentials(), http_client=SheetsHTTPClient)
 
     def get_sheet(
             self,
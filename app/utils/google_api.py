@@ -1,30 +1,52 @@
+import logging
+import threading
 import time
 
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from app.utils.credentials import credential_manager
+from app.utils.host_limits import host_limiter
+from app.utils.metrics import metrics
+from app.utils.sheets_endpoint import google_api_client_options
+
+logger = logging.getLogger(__name__)
+
+# httplib2 connections are not thread-safe, so each thread builds its own service once
+_services = threading.local()
+
+
+def sheets_service():
+    """Sheets API service of this thread, rebuilt after ``credential_manager.reset()``."""
+    credentials = credential_manager.credentials()
+    if getattr(_services, "credentials", None) is not credentials:
+        # googleapiclient takes ~0.3s to import, only pay it when a sheet is read
+        from googleapiclient.discovery import build
+
+        _services.service = build(
+            'sheets',
+            'v4',
+            credentials=credentials,
+            client_options=google_api_client_options(),
+        )
+        _services.credentials = credentials
+    return _services.service
 
 
 class StockManager:
     def __init__(self, spreadsheet_id: str):
-        self.credentials_file = "keys.json"
         self.spreadsheet_id = spreadsheet_id
         # time.sleep(1)
-        self.service = self._initialize_service()
+        self.service = sheets_service()
 
-    def _initialize_service(self):
-        credentials = Credentials.from_service_account_file(
-            self.credentials_file,
-            scopes=["https://www.googleapis.com/auth/spreadsheets.readonly"]
-        )
-        return build('sheets', 'v4', credentials=credentials)
+    @staticmethod
+    def _execute(request) -> dict:
+        with metrics.track("sheets", "read"), host_limiter.limit("sheets"):
+            return request.execute()
 
     def get_cell_float_value(self, range_name: str) -> float:
         try:
-            result = (
+            result = self._execute(
                 self.service.spreadsheets()
                 .values()
                 .get(spreadsheetId=self.spreadsheet_id, range=range_name)
-                .execute()
             )
             cell_value = result.get('values', [[]])[0][0]
             # Remove commas and convert to float
@@ -32,36 +54,34 @@ class StockManager:
             stock_value = float(cell_value_clean)
             return stock_value
         except ValueError as ve:
-            print(f"ValueError for range {range_name}: {cell_value} is not a valid number.")
+            logger.warning("ValueError for range %s: %s is not a valid number.", range_name, cell_value)
             raise Exception(f"Invalid stock value: {cell_value}")
         except Exception as e:
-            print(f"Error retrieving stock from range {range_name}: {e}")
+            logger.warning("Error retrieving stock from range %s: %s", range_name, e)
             raise Exception(f"Error getting stock from {range_name}")
 
     def get_cell_stock(self, range_name: str) -> float:
         try:
-            result = (
+            result = self._execute(
                 self.service.spreadsheets()
                 .values()
                 .get(spreadsheetId=self.spreadsheet_id, range=range_name)
-                .execute()
             )
             cell_value = result.get('values', [[]])[0][0]
             # Convert to integer after handling float-like values
             stock_value = float(cell_value)
             return stock_value
         except Exception as e:
-            print(f"Error retrieving stock from range {range_name}: {e}")
+            logger.warning("Error retrieving stock from range %s: %s", range_name, e)
             return -1
 
     def get_multiple_cells(self, ranges: list[str]) -> list[int]:
         try:
             # Make a batch request for multiple ranges
-            result = (
+            result = self._execute(
                 self.service.spreadsheets()
                 .values()
                 .batchGet(spreadsheetId=self.spreadsheet_id, ranges=ranges)
-                .execute()
             )
             values = result.get("valueRanges", [])
             # Extract values from the response, convert to integers if possible
@@ -78,18 +98,17 @@ class StockManager:
     def get_multiple_str_cells(self, range_str: str) -> list[str]:
         try:
             # Make a request for the single range
-            result = (
+            result = self._execute(
                 self.service.spreadsheets()
                 .values()
                 .get(spreadsheetId=self.spreadsheet_id, range=range_str)
-                .execute()
             )
             values = result.get("values", [])
             # Extract values from the response as strings
             cell_values = [str(cell[0]) for cell in values if cell]
             return cell_values
         except Exception as e:
-            print(f"Error retrieving values from range {range_str}: {e}")
+            logger.warning("Error retrieving values from range %s: %s", range_str, e)
             raise Exception(f"Error getting values from range {range_str}")
 
 
@@ -1,13 +1,73 @@
 import os
+import threading
 
 from dotenv import load_dotenv
-from gspread.auth import service_account
+from gspread import Client, Spreadsheet, Worksheet
+from gspread.auth import authorize
 
-from app.utils.paths import SRC_PATH
+from app.utils.credentials import credential_manager
+from app.utils.ggsheet import GSheet
+from app.utils.sheets_endpoint import SheetsHTTPClient
 
-load_dotenv("setting.env")
-g_client = service_account(SRC_PATH.joinpath(os.getenv("KEYS_PATH")))
+_lock = threading.Lock()
+_client: Client | None = None
+_spreadsheet: Spreadsheet | None = None
+_worksheet: Worksheet | None = None
+_gsheet: GSheet | None = None
 
-spreadsheet = g_client.open_by_key(os.environ["SPREADSHEET_KEY"])
 
-worksheet = spreadsheet.worksheet(os.environ["SHEET_NAME"])
+def get_client() -> Client:
+    """gspread client of the main spreadsheet, authenticated on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            load_dotenv("setting.env")
+            _client = authorize(credential_manager.credentials(), http_client=SheetsHTTPClient)
+        return _client
+
+
+def get_spreadsheet() -> Spreadsheet:
+    global _spreadsheet
+    client = get_client()
+    with _lock:
+        if _spreadsheet is None:
+            _spreadsheet = client.open_by_key(os.environ["SPREADSHEET_KEY"])
+        return _spreadsheet
+
+
+def get_worksheet() -> Worksheet:
+    """The control worksheet (SHEET_NAME), opened on first use."""
+    global _worksheet
+    spreadsheet = get_spreadsheet()
+    with _lock:
+        if _worksheet is None:
+            _worksheet = spreadsheet.worksheet(os.environ["SHEET_NAME"])
+        return _worksheet
+
+
+def get_gsheet() -> GSheet:
+    """``GSheet`` for the per-row sheet lookups, sharing the client above."""
+    global _gsheet
+    client = get_client()
+    with _lock:
+        if _gsheet is None:
+            _gsheet = GSheet(client)
+        return _gsheet
+
+
+def reset() -> None:
+    """Forget the client and sheets, the next access reconnects with the current settings."""
+    global _client, _spreadsheet, _worksheet, _gsheet
+    with _lock:
+        _client = _spreadsheet = _worksheet = _gsheet = None
+
+
+def __getattr__(name: str):
+    # Keeps ``from app.utils.gsheet import worksheet`` working for scripts
+    if name == "g_client":
+        return get_client()
+    if name == "spreadsheet":
+        return get_spreadsheet()
+    if name == "worksheet":
+        return get_worksheet()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
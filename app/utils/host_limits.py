@@ -0,0 +1,95 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+import requests
+
+# Max concurrent requests per site, override with HOST_LIMIT_<NAME>=n
+DEFAULT_HOST_LIMITS: dict[str, int] = {
+    "itemku": 2,
+    "tokoku": 2,
+    "g2g": 2,
+    "funpay": 2,
+    "dd373": 1,
+    "bijiaqi": 2,
+    "sheets": 4,
+}
+
+
+class HostLimiter:
+    """
+    Per-site concurrency caps and pooled HTTP sessions shared by all row
+    workers, so running rows concurrently does not multiply the request
+    rate against any single site.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, int],
+    ) -> None:
+        self.limits = dict(limits)
+        self._semaphores = {
+            host: threading.BoundedSemaphore(limit) for host, limit in self.limits.items()
+        }
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def limit(
+        self,
+        host: str,
+    ) -> Iterator[None]:
+        semaphore = self._semaphore(host)
+        with semaphore:
+            yield
+
+    def session(
+        self,
+        host: str,
+    ) -> requests.Session:
+        # requests.Session is not thread-safe, keep one per thread and host
+        sessions = getattr(self._local, "sessions", None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+        if host not in sessions:
+            sessions[host] = requests.Session()
+        return sessions[host]
+
+    def _semaphore(
+        self,
+        host: str,
+    ) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self.limits[host] = 1
+                self._semaphores[host] = threading.BoundedSemaphore(1)
+            return self._semaphores[host]
+
+    def set_limit(
+        self,
+        host: str,
+        limit: int,
+    ) -> None:
+        # Requests holding the old semaphore release it as usual
+        with self._lock:
+            if self.limits.get(host) == limit:
+                return
+            self.limits[host] = limit
+            self._semaphores[host] = threading.BoundedSemaphore(limit)
+
+    def apply_env(self) -> None:
+        """Re-read HOST_LIMIT_<NAME> for every known host."""
+        for host, limit in HostLimiter.from_env().limits.items():
+            self.set_limit(host, limit)
+
+    @staticmethod
+    def from_env() -> "HostLimiter":
+        limits = {
+            host: int(os.getenv(f"HOST_LIMIT_{host.upper()}", str(limit)))
+            for host, limit in DEFAULT_HOST_LIMITS.items()
+        }
+        return HostLimiter(limits)
+
+
+host_limiter = HostLimiter.from_env()
@@ -0,0 +1,147 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+import constants
+from app.utils.paths import SRC_PATH
+from app.utils.tracing import current_row
+
+_round_id: contextvars.ContextVar[int | None] = contextvars.ContextVar("log_round_id", default=None)
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def set_round(
+    round_id: int | None,
+) -> None:
+    """Tag records logged from this context (and pools started from it) with the round id."""
+    _round_id.set(round_id)
+
+
+class ContextFilter(logging.Filter):
+    """Adds ``round`` and ``row`` to records, on the thread that logs them."""
+
+    def filter(
+        self,
+        record: logging.LogRecord,
+    ) -> bool:
+        record.round = _round_id.get()
+        record.row = current_row()
+        return True
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Keeps the traceback apart from the message so the writer can put it in ``exc``."""
+
+    def prepare(
+        self,
+        record: logging.LogRecord,
+    ) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(
+        self,
+        record: logging.LogRecord,
+    ) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "round": getattr(record, "round", None),
+            "row": getattr(record, "row", None),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextTextFormatter(logging.Formatter):
+    """LOG_FORMAT, prefixed with the row when the record has one."""
+
+    def format(
+        self,
+        record: logging.LogRecord,
+    ) -> str:
+        row = getattr(record, "row", None)
+        text = super().format(record)
+        return f"[row {row}] {text}" if row is not None else text
+
+
+def configure_logging(
+    level: str | None = None,
+    log_dir: str | None = None,
+    console: bool | None = None,
+) -> None:
+    """
+    Route all logging through a ``QueueHandler``: the calling thread only
+    enqueues the record, a ``QueueListener`` thread writes JSON lines to a
+    rotating file in ``logs/`` and plain lines to stdout.
+
+    LOG_LEVEL, LOG_DIR, LOG_CONSOLE (1/0), LOG_MAX_MB and LOG_BACKUP_COUNT
+    override the defaults from ``constants``.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = level or os.getenv("LOG_LEVEL", constants.LOG_LEVEL)
+    log_dir = log_dir or os.getenv("LOG_DIR", str(SRC_PATH.joinpath("logs")))
+    if console is None:
+        console = os.getenv("LOG_CONSOLE", "1") == "1"
+
+    handlers: list[logging.Handler] = []
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, constants.LOG_FILE),
+        maxBytes=int(float(os.getenv("LOG_MAX_MB", "20")) * 1024 * 1024),
+        backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+        encoding="utf-8",
+        delay=True,
+    )
+    file_handler.setFormatter(JsonFormatter())
+    handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(ContextTextFormatter(constants.LOG_FORMAT))
+        handlers.append(console_handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = ContextQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Drain the queue and stop the writer thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
@@ -0,0 +1,179 @@
+import gc
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - listed in requirements.txt, /proc is the fallback
+    psutil = None
+
+
+def _proc_rss_mb(
+    pid: int | str,
+) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _proc_children(
+    pid: int,
+) -> list[int]:
+    parents: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+
+    children, stack = [], [pid]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            children.append(child)
+            stack.append(child)
+    return children
+
+
+def sample_memory() -> tuple[float, float] | None:
+    """
+    RSS in MB of this Python process and of all its child processes
+    (chromedriver and Chrome). None when the platform can't be sampled.
+    """
+    if psutil is not None:
+        process = psutil.Process()
+        browser_rss = 0
+        for child in process.children(recursive=True):
+            try:
+                browser_rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return process.memory_info().rss / 1024 / 1024, browser_rss / 1024 / 1024
+
+    if os.path.exists("/proc/self/status"):
+        browser_rss = 0.0
+        for child in _proc_children(os.getpid()):
+            try:
+                browser_rss += _proc_rss_mb(child)
+            except OSError:
+                pass
+        return _proc_rss_mb("self"), browser_rss
+
+    return None
+
+
+class MemoryWatchdog:
+    """
+    Background thread sampling the Python and browser RSS. When the browser
+    exceeds its threshold it only raises ``recycle_requested``; the main
+    loop recycles the browser at the next safe point between rows. A
+    relaunched browser is not recycled again for ``recycle_cooldown``
+    seconds, even when a fresh Chrome is already over the limit.
+
+    A browser recycle does not lower the Python RSS, so going over
+    ``python_max_mb`` runs a garbage collection and warns instead. It warns
+    again only after the RSS dropped below 90% of the limit.
+    """
+
+    def __init__(
+        self,
+        browser_max_mb: float = 1500,
+        python_max_mb: float = 1000,
+        interval: float = 15,
+        recycle_cooldown: float = 300,
+    ) -> None:
+        self.browser_max_mb = browser_max_mb
+        self.python_max_mb = python_max_mb
+        self.interval = interval
+        self.recycle_cooldown = recycle_cooldown
+        self._reset_at = time.monotonic()
+        self.python_mb = 0.0
+        self.browser_mb = 0.0
+        self.peak_python_mb = 0.0
+        self.peak_browser_mb = 0.0
+        self.recycle_requested = False
+        self.python_over_limit = False
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if sample_memory() is None:
+            logger.warning("Memory watchdog disabled: install psutil (requirements.txt) to sample memory on this platform")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def sample(self) -> None:
+        sampled = sample_memory()
+        if sampled is None:
+            return
+        self.python_mb, self.browser_mb = sampled
+        self.peak_python_mb = max(self.peak_python_mb, self.python_mb)
+        self.peak_browser_mb = max(self.peak_browser_mb, self.browser_mb)
+
+        if (
+            not self.recycle_requested
+            and self.browser_mb > self.browser_max_mb
+            and time.monotonic() - self._reset_at >= self.recycle_cooldown
+        ):
+            logger.warning(
+                "Browser memory over limit (%.0f MB > %.0f MB), browser recycle requested",
+                self.browser_mb,
+                self.browser_max_mb,
+            )
+            self.recycle_requested = True
+
+        if self.python_mb > self.python_max_mb and not self.python_over_limit:
+            self.python_over_limit = True
+            collected = gc.collect()
+            logger.warning(
+                "Python memory over limit (%.0f MB > %.0f MB), collected %s objects",
+                self.python_mb,
+                self.python_max_mb,
+                collected,
+            )
+        elif self.python_mb < self.python_max_mb * 0.9:
+            self.python_over_limit = False
+
+    def reset(self) -> None:
+        """Called after the browser was relaunched."""
+        self.recycle_requested = False
+        self.peak_browser_mb = 0.0
+        self._reset_at = time.monotonic()
+
+    def summary(self) -> str:
+        return (
+            f"python {self.python_mb:.0f} MB (peak {self.peak_python_mb:.0f}), "
+            f"browser {self.browser_mb:.0f} MB (peak {self.peak_browser_mb:.0f})"
+        )
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning("Memory sample failed: %s", e)
+            self._stop.wait(self.interval)
+
+
+memory_watchdog = MemoryWatchdog(
+    browser_max_mb=float(os.getenv("BROWSER_MAX_RSS_MB", "1500")),
+    python_max_mb=float(os.getenv("PYTHON_MAX_RSS_MB", "1000")),
+    interval=float(os.getenv("MEMORY_SAMPLE_INTERVAL", "15")),
+    recycle_cooldown=float(os.getenv("BROWSER_RECYCLE_COOLDOWN", "300")),
+)
@@ -0,0 +1,372 @@
+import logging
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+from app.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(
+    value: str,
+) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(
+    labelnames: tuple[str, ...],
+    labelvalues: tuple[str, ...],
+    extra: str = "",
+) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(
+    value: float,
+) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], object] = {}
+
+    def _key(
+        self,
+        labels: dict,
+    ) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(
+        self,
+        key: tuple[str, ...],
+        value,
+    ) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(
+        self,
+        amount: float = 1,
+        **labels,
+    ) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(
+        self,
+        **labels,
+    ) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(
+        self,
+        value: float,
+        **labels,
+    ) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(
+        self,
+        amount: float = 1,
+        **labels,
+    ) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(
+        self,
+        amount: float = 1,
+        **labels,
+    ) -> None:
+        self.inc(-amount, **labels)
+
+    def value(
+        self,
+        **labels,
+    ) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(
+        self,
+        value: float,
+        **labels,
+    ) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts..., +Inf count, sum]
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[bisect.bisect_left(self.buckets, value)] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(
+        self,
+        **labels,
+    ) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def _render_sample(
+        self,
+        key: tuple[str, ...],
+        value,
+    ) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), value[:-1]):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(value[-1])}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and histograms, exported in the Prometheus
+    text format by ``serve``. Metric names get the ``itemku_`` prefix.
+    """
+
+    def __init__(
+        self,
+        prefix: str = "itemku_",
+    ) -> None:
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+        self._server: ThreadingHTTPServer | None = None
+
+    def _register(
+        self,
+        cls: type[_Metric],
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        **kwargs,
+    ):
+        name = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def serve(
+        self,
+        port: int,
+        host: str = "127.0.0.1",
+    ) -> None:
+        """Expose ``/metrics`` on a background thread."""
+        if self._server is not None:
+            return
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        logger.info("Metrics on http://%s:%s/metrics", host, port)
+
+    @contextmanager
+    def track(
+        self,
+        source: str,
+        operation: str,
+    ) -> Iterator["CallOutcome"]:
+        """
+        Time one external call into ``call_seconds`` and count it into
+        ``calls_total``, inside a ``source.operation`` trace span. The
+        outcome is ``error`` when the block raises, otherwise whatever the
+        block set on the yielded object (``ok``).
+        """
+        outcome = CallOutcome()
+        started_at = time.perf_counter()
+        try:
+            with tracer.span(f"{source}.{operation}") as span:
+                yield outcome
+                if span is not None and outcome.value != "ok":
+                    span.status = outcome.value
+        except BaseException:
+            outcome.value = "error"
+            raise
+        finally:
+            call_seconds.observe(
+                time.perf_counter() - started_at,
+                source=source, operation=operation, outcome=outcome.value,
+            )
+            calls_total.inc(source=source, operation=operation, outcome=outcome.value)
+
+
+class CallOutcome:
+    def __init__(self) -> None:
+        self.value = "ok"
+
+
+metrics = MetricsRegistry()
+
+call_seconds = metrics.histogram(
+    "call_seconds",
+    "Latency of external calls by source (itemku/g2g/fun/dd/bij/sheets/push).",
+    ("source", "operation", "outcome"),
+)
+calls_total = metrics.counter(
+    "calls_total",
+    "External calls by source, operation and outcome.",
+    ("source", "operation", "outcome"),
+)
+rows_total = metrics.counter(
+    "rows_total",
+    "Processed rows by row index and outcome.",
+    ("row", "outcome"),
+)
+row_seconds = metrics.histogram(
+    "row_seconds",
+    "Wall time to process one row.",
+    ("outcome",),
+)
+row_last_seconds = metrics.gauge(
+    "row_last_seconds",
+    "Wall time of the last run of each row.",
+    ("row",),
+)
+round_rows_per_minute = metrics.gauge(
+    "round_rows_per_minute",
+    "Throughput of the last finished round.",
+)
+navigation_seconds = metrics.histogram(
+    "navigation_seconds",
+    "Browser navigation time until __NEXT_DATA__ is present (outcome found/missing).",
+    ("outcome",),
+)
+navigation_bytes_total = metrics.counter(
+    "navigation_bytes_total",
+    "Bytes transferred by browser navigations, document and resources.",
+)
+
+
+def serve_from_env() -> None:
+    """METRICS_PORT (default 9108) on METRICS_HOST (default 127.0.0.1); port 0 disables."""
+    port = int(os.getenv("METRICS_PORT", "9108"))
+    if port <= 0:
+        return
+    try:
+        metrics.serve(port, os.getenv("METRICS_HOST", "127.0.0.1"))
+    except OSError as e:
+        logger.warning("Metrics endpoint not started: %s", e)
@@ -0,0 +1,222 @@
+import importlib.util
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from app.utils.paths import SRC_PATH
+
+logger = logging.getLogger(__name__)
+
+# Raw offer object -> (seller, server, title, price, stock, currency)
+OFFER_FIELDS: dict[str, Callable[[Any], tuple]] = {
+    "itemku": lambda offer: (
+        offer.seller.shop_name, offer.server_name, offer.name, offer.price, offer.stock, "IDR",
+    ),
+    "g2g": lambda offer: (
+        offer.seller_name, None, None, offer.price_per_unit, offer.stock, "USD",
+    ),
+    "fun": lambda offer: (
+        offer.seller, None, None, offer.price, offer.in_stock, "USD",
+    ),
+    # The DD373 listing parser has no seller field
+    "dd373": lambda offer: (
+        None, offer.server_info, offer.title, offer.price, offer.stock, "CNY",
+    ),
+    "bijiaqi": lambda offer: (
+        offer.merchant.store_name, offer.game_name, offer.title, offer.price, offer.sum_quantity, "CNY",
+    ),
+}
+
+
+def _pyarrow():
+    # Imported by the writer thread on the first write, never at app import
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    return pa, pq
+
+
+def _schema(pa):
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("ts", pa.timestamp("s", tz="UTC")),
+        ("round_id", pa.int64()),
+        ("row_index", pa.int32()),
+        ("source", text),
+        ("seller", text),
+        ("server", text),
+        ("title", pa.string()),
+        ("price", pa.float64()),
+        ("stock", pa.int64()),
+        ("currency", text),
+    ])
+
+
+class OfferArchive:
+    """
+    Rolling Parquet archive of every raw offer seen by the crawlers
+    (itemku, G2G, FunPay, DD373, bijiaqi), for offline analysis.
+
+    Offers are buffered in memory and written by a background thread as
+    part files under ``dt=YYYY-MM-DD/hour=HH/`` (hive partitioning, UTC),
+    so ``pyarrow.dataset.dataset(root, partitioning="hive")`` can scan
+    months of prices. Seller, server, source and currency are
+    dictionary-encoded.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        flush_interval: float = 300,
+        max_buffered_rows: int = 50000,
+    ) -> None:
+        self.root = root
+        self.flush_interval = flush_interval
+        self.max_buffered_rows = max_buffered_rows
+        self.round_id: int | None = None
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def begin_round(
+        self,
+        round_id: int,
+    ) -> None:
+        self.round_id = round_id
+
+    def record(
+        self,
+        source: str,
+        row_index: int | None,
+        offers: list | None,
+    ) -> None:
+        if not offers:
+            return
+        to_fields = OFFER_FIELDS[source]
+        ts = int(time.time())
+        rows = []
+        for offer in offers:
+            try:
+                rows.append((ts, self.round_id, row_index, source) + to_fields(offer))
+            except AttributeError:
+                continue
+        self._ensure_writer()
+        self._queue.put(rows)
+
+    def flush(
+        self,
+        timeout: float | None = None,
+    ) -> None:
+        """Write everything buffered so far to disk."""
+        if self._thread is None:
+            return
+        written = threading.Event()
+        self._queue.put(written)
+        written.wait(timeout)
+
+    def _ensure_writer(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._writer, name="offer-archive", daemon=True)
+            self._thread.start()
+
+    def _write(
+        self,
+        rows: list[tuple],
+    ) -> None:
+        pa, pq = _pyarrow()
+        schema = _schema(pa)
+        partitions: dict[str, list[tuple]] = {}
+        for row in rows:
+            hour = datetime.fromtimestamp(row[0], timezone.utc)
+            partitions.setdefault(hour.strftime("dt=%Y-%m-%d/hour=%H"), []).append(row)
+
+        for partition, partition_rows in partitions.items():
+            columns = list(zip(*partition_rows))
+            columns[0] = [datetime.fromtimestamp(ts, timezone.utc) for ts in columns[0]]
+            table = pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            )
+            directory = os.path.join(self.root, partition)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet")
+            pq.write_table(table, path + ".tmp", compression="zstd")
+            os.replace(path + ".tmp", path)
+
+    def _writer(self) -> None:
+        buffer: list[tuple] = []
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            flushed = item if isinstance(item, threading.Event) else None
+            if isinstance(item, list):
+                buffer.extend(item)
+
+            if buffer and (
+                flushed is not None
+                or len(buffer) >= self.max_buffered_rows
+                or time.monotonic() - last_flush >= self.flush_interval
+            ):
+                try:
+                    self._write(buffer)
+                except Exception as e:
+                    logger.warning("Offer archive write failed: %s", e)
+                buffer = []
+                last_flush = time.monotonic()
+
+            if flushed is not None:
+                flushed.set()
+
+    @staticmethod
+    def from_env() -> "OfferArchive | None":
+        root = os.getenv(
+            "OFFER_ARCHIVE_DIR",
+            str(SRC_PATH.joinpath("storage", "offer_archive")),
+        )
+        if not root:
+            return None
+        if importlib.util.find_spec("pyarrow") is None:
+            logger.warning("Offer archive disabled: install pyarrow (requirements.txt) to enable it")
+            return None
+        return OfferArchive(
+            root=root,
+            flush_interval=float(os.getenv("OFFER_ARCHIVE_FLUSH_SECONDS", "300")),
+        )
+
+
+_lock = threading.Lock()
+_offer_archive: OfferArchive | None = None
+_loaded = False
+
+
+def get_offer_archive() -> OfferArchive | None:
+    """Archive of OFFER_ARCHIVE_DIR, created on first use. None when disabled or pyarrow is missing."""
+    global _offer_archive, _loaded
+    with _lock:
+        if not _loaded:
+            _offer_archive = OfferArchive.from_env()
+            _loaded = True
+        return _offer_archive
+
+
+def archive_offers(
+    source: str,
+    row_index: int | None,
+    offers: list | None,
+) -> None:
+    """Hand the raw offers of one crawl to the archive, never failing the caller."""
+    offer_archive = get_offer_archive()
+    if offer_archive is None:
+        return
+    try:
+        offer_archive.record(source, row_index, offers)
+    except Exception as e:
+        logger.warning("Offer archive record failed: %s", e)
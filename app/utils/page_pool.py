@@ -0,0 +1,49 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class PagePool:
+    """
+    Shares one CDP-mode browser between row workers.
+
+    SeleniumBase CDP mode drives a single active tab per ``SB`` instance, so
+    navigation is handed out one worker at a time while the rest of each
+    row (itemku API, order sites, Sheets) runs concurrently.
+    """
+
+    def __init__(
+        self,
+        sb,
+    ) -> None:
+        self.sb = sb
+        self.pages = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def page(self) -> Iterator:
+        with self._lock:
+            self.pages += 1
+            yield self.sb
+
+    def is_alive(self) -> bool:
+        """Health probe: a dead Chrome or a lost CDP connection raises here."""
+        try:
+            with self._lock:
+                self.sb.cdp.get_current_url()
+            return True
+        except Exception as e:
+            logger.warning("Browser health probe failed: %s", e)
+            return False
+
+
+@contextmanager
+def acquire_page(sb) -> Iterator:
+    if isinstance(sb, PagePool):
+        with sb.page() as page:
+            yield page
+    else:
+        yield sb
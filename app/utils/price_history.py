@@ -0,0 +1,314 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from app.models.crwl_api_models import Product as CrwlProduct
+from app.utils.paths import SRC_PATH
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sellers (
+    seller_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS competitor_offers (
+    ts INTEGER NOT NULL,
+    round_id INTEGER,
+    row_index INTEGER NOT NULL,
+    product_id INTEGER,
+    rank INTEGER NOT NULL,
+    seller_id INTEGER NOT NULL,
+    price INTEGER NOT NULL,
+    stock INTEGER,
+    name TEXT,
+    server_name TEXT
+);
+CREATE INDEX IF NOT EXISTS competitor_offers_row_ts ON competitor_offers (row_index, ts);
+CREATE INDEX IF NOT EXISTS competitor_offers_product_ts ON competitor_offers (product_id, ts);
+CREATE TABLE IF NOT EXISTS order_site_prices (
+    ts INTEGER NOT NULL,
+    round_id INTEGER,
+    row_index INTEGER NOT NULL,
+    product_id INTEGER,
+    site TEXT NOT NULL,
+    seller_id INTEGER NOT NULL,
+    price REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS order_site_prices_row_ts ON order_site_prices (row_index, ts);
+CREATE INDEX IF NOT EXISTS order_site_prices_product_ts ON order_site_prices (product_id, ts);
+CREATE TABLE IF NOT EXISTS row_snapshots (
+    ts INTEGER NOT NULL,
+    round_id INTEGER,
+    row_index INTEGER NOT NULL,
+    product_id INTEGER,
+    min_price INTEGER,
+    max_price INTEGER,
+    od_min_price REAL,
+    usd_rate REAL,
+    pushed_price INTEGER
+);
+CREATE INDEX IF NOT EXISTS row_snapshots_row_ts ON row_snapshots (row_index, ts);
+CREATE INDEX IF NOT EXISTS row_snapshots_product_ts ON row_snapshots (product_id, ts);
+"""
+
+# Added after the first release, ALTER TABLE adds them to existing stores
+SNAPSHOT_COLUMNS = {
+    "dongiagiam_min": "INTEGER",
+    "dongiagiam_max": "INTEGER",
+    "include_keyword": "TEXT",
+    "exclude_keyword": "TEXT",
+    # JSON list of the blacklisted shop names in force
+    "blacklist": "TEXT",
+    # 1 while every offer decide_price saw is stored, 0 once compacted (or recorded top-N only)
+    "offers_complete": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+class PriceHistoryStore:
+    """
+    Append-only sqlite history of what each row saw and pushed per round:
+    every competitor offer the decision considered (before the blacklist
+    and keyword filters), the row settings and blacklist in force, the
+    order-site prices, the USD rate and the pushed price. That is enough
+    for ``app.processes.replay`` to rerun the decision offline.
+
+    ``record_row`` only enqueues; a background writer batches the inserts
+    in one transaction and applies retention/compaction once a day.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+        retention_days: int = 30,
+        compact_after_days: int = 7,
+    ) -> None:
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.compact_after_days = compact_after_days
+        self.round_id: int | None = None
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._seller_ids: dict[str, int] = {}
+        self._last_compact = 0.0
+
+    def begin_round(
+        self,
+        round_id: int,
+    ) -> None:
+        self.round_id = round_id
+
+    def record_row(
+        self,
+        index: int,
+        product_id: int | None,
+        competitors: list[CrwlProduct],
+        order_site_items: list | None,
+        min_price: int,
+        max_price: int | None,
+        od_min_price: float | None,
+        usd_rate: float | None,
+        pushed_price: int | None,
+        blacklist: list[str] | None = None,
+        settings: dict | None = None,
+    ) -> None:
+        """
+        ``competitors`` are all offers passed to ``decide_price``, in their
+        listing order; ``settings`` holds the row's DONGIAGIAM_MIN/MAX and
+        INCLUDE/EXCLUDE_KEYWORD.
+        """
+        ts = int(time.time())
+        settings = settings or {}
+        offers = [
+            (
+                ts, self.round_id, index, product_id, rank,
+                competitor.seller.shop_name, competitor.price,
+                competitor.stock, competitor.name, competitor.server_name,
+            )
+            for rank, competitor in enumerate(competitors)
+        ]
+        order_sites = [
+            # Converted prices are fractional, stores created with INTEGER columns keep the REAL too
+            (ts, self.round_id, index, product_id, item[2], str(item[1]), float(item[0]))
+            for item in order_site_items or []
+        ]
+        snapshot = (
+            ts, self.round_id, index, product_id, min_price, max_price,
+            None if od_min_price is None else float(od_min_price), usd_rate, pushed_price,
+            settings.get("DONGIAGIAM_MIN"), settings.get("DONGIAGIAM_MAX"),
+            settings.get("INCLUDE_KEYWORD"), settings.get("EXCLUDE_KEYWORD"),
+            json.dumps(blacklist or [], ensure_ascii=False), 1,
+        )
+        self._ensure_writer()
+        self._queue.put((offers, order_sites, snapshot))
+
+    def flush(self) -> None:
+        if self._thread is not None:
+            self._queue.join()
+
+    def _ensure_writer(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._writer, name="price-history", daemon=True)
+            self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.executescript(SCHEMA)
+        existing = {column[1] for column in conn.execute("PRAGMA table_info(row_snapshots)")}
+        for column, column_type in SNAPSHOT_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE row_snapshots ADD COLUMN {column} {column_type}")
+        conn.commit()
+        return conn
+
+    def _seller_id(
+        self,
+        conn: sqlite3.Connection,
+        name: str,
+        new_ids: dict[str, int],
+    ) -> int:
+        seller_id = self._seller_ids.get(name) or new_ids.get(name)
+        if seller_id is None:
+            conn.execute("INSERT OR IGNORE INTO sellers (name) VALUES (?)", (name,))
+            seller_id = new_ids[name] = conn.execute(
+                "SELECT seller_id FROM sellers WHERE name = ?", (name,)
+            ).fetchone()[0]
+        return seller_id
+
+    def _write_batch(
+        self,
+        conn: sqlite3.Connection,
+        batch: list,
+    ) -> None:
+        # Seller ids inserted by this batch are only cached once it is committed
+        new_ids: dict[str, int] = {}
+        offers, order_sites, snapshots = [], [], []
+        for row_offers, row_order_sites, snapshot in batch:
+            for offer in row_offers:
+                offers.append(offer[:5] + (self._seller_id(conn, offer[5], new_ids),) + offer[6:])
+            for order_site in row_order_sites:
+                order_sites.append(
+                    order_site[:5] + (self._seller_id(conn, order_site[5], new_ids),) + order_site[6:]
+                )
+            snapshots.append(snapshot)
+
+        conn.executemany("INSERT INTO competitor_offers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", offers)
+        conn.executemany("INSERT INTO order_site_prices VALUES (?, ?, ?, ?, ?, ?, ?)", order_sites)
+        conn.executemany(
+            "INSERT INTO row_snapshots (ts, round_id, row_index, product_id, min_price, max_price, "
+            "od_min_price, usd_rate, pushed_price, dongiagiam_min, dongiagiam_max, include_keyword, "
+            "exclude_keyword, blacklist, offers_complete) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            snapshots,
+        )
+        conn.commit()
+        self._seller_ids.update(new_ids)
+
+    def compact(
+        self,
+        conn: sqlite3.Connection,
+    ) -> None:
+        """
+        Drop everything older than ``retention_days`` and keep only the
+        cheapest competitor offer for data older than ``compact_after_days``.
+        Compacted snapshots are flagged ``offers_complete = 0`` so the
+        replay skips them; ``compact_after_days`` <= 0 disables compaction.
+        """
+        now = time.time()
+        retention_cutoff = int(now - self.retention_days * 86400)
+        compact_cutoff = int(now - self.compact_after_days * 86400)
+        for table in ("competitor_offers", "order_site_prices", "row_snapshots"):
+            conn.execute(f"DELETE FROM {table} WHERE ts < ?", (retention_cutoff,))
+        if self.compact_after_days > 0:
+            conn.execute(
+                "UPDATE row_snapshots SET offers_complete = 0 WHERE ts < ? AND offers_complete = 1",
+                (compact_cutoff,),
+            )
+            conn.execute(
+                """
+                DELETE FROM competitor_offers WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, ROW_NUMBER() OVER (
+                            PARTITION BY ts, round_id, row_index ORDER BY price, rank
+                        ) AS price_rank
+                        FROM competitor_offers WHERE ts < ?
+                    ) WHERE price_rank > 1
+                )
+                """,
+                (compact_cutoff,),
+            )
+        conn.commit()
+        conn.execute("PRAGMA incremental_vacuum")
+        self._last_compact = now
+
+    def _writer(self) -> None:
+        conn = self._connect()
+        batch: list = []
+        last_flush = time.monotonic()
+        while True:
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            except queue.Empty:
+                pass
+
+            if batch and (
+                len(batch) >= self.batch_size
+                or self._queue.empty()
+                or time.monotonic() - last_flush >= self.flush_interval
+            ):
+                try:
+                    self._write_batch(conn, batch)
+                except Exception as e:
+                    logger.warning("Price history write failed: %s", e)
+                    conn.rollback()
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+                last_flush = time.monotonic()
+
+            if time.time() - self._last_compact > 86400:
+                try:
+                    self.compact(conn)
+                except Exception as e:
+                    logger.warning("Price history compaction failed: %s", e)
+
+    @staticmethod
+    def from_env() -> "PriceHistoryStore | None":
+        db_path = os.getenv(
+            "PRICE_HISTORY_DB",
+            str(SRC_PATH.joinpath("storage", "price_history.db")),
+        )
+        if not db_path:
+            return None
+        return PriceHistoryStore(
+            db_path=db_path,
+            retention_days=int(os.getenv("PRICE_HISTORY_RETENTION_DAYS", "30")),
+            compact_after_days=int(os.getenv("PRICE_HISTORY_COMPACT_DAYS", "7")),
+        )
+
+
+_lock = threading.Lock()
+_price_history: PriceHistoryStore | None = None
+_loaded = False
+
+
+def get_price_history() -> PriceHistoryStore | None:
+    """Store of PRICE_HISTORY_DB, created on first use. None when disabled."""
+    global _price_history, _loaded
+    with _lock:
+        if not _loaded:
+            _price_history = PriceHistoryStore.from_env()
+            _loaded = True
+        return _price_history
@@ -0,0 +1,282 @@
+import logging
+import cProfile
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+
+from app.utils.paths import SRC_PATH
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sample", "cprofile", "memory")
+
+
+class StackSampler:
+    """
+    Samples the stacks of every thread at a fixed interval. Unlike cProfile
+    it sees the row worker and fetch pool threads, and its overhead does not
+    depend on how many calls the code makes.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+    ) -> None:
+        self.interval = interval
+        self.samples = 0
+        self.self_counts: Counter = Counter()
+        self.total_counts: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started_at = 0.0
+        self.elapsed = 0.0
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self._started_at
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                thread_name = names.get(thread_id, str(thread_id)).split("_")[0]
+
+                self.samples += 1
+                self.self_counts[stack[0]] += 1
+                for function in set(stack):
+                    self.total_counts[function] += 1
+                self.stacks[";".join([thread_name] + stack[::-1])] += 1
+
+    def report(
+        self,
+        top_n: int = 40,
+    ) -> str:
+        if not self.samples:
+            return "No samples"
+        lines = [
+            f"{self.samples} thread samples over {self.elapsed:.1f}s every {self.interval * 1000:.0f}ms",
+            "",
+            f"TOP {top_n} BY SELF SAMPLES (where threads were, including waiting):",
+        ]
+        for function, count in self.self_counts.most_common(top_n):
+            lines.append(f"  {count / self.samples:6.1%}  {function}")
+        lines += ["", f"TOP {top_n} BY TOTAL SAMPLES (function on the stack):"]
+        for function, count in self.total_counts.most_common(top_n):
+            lines.append(f"  {count / self.samples:6.1%}  {function}")
+        return "\n".join(lines)
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, the input format of flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+@dataclass
+class ProfiledRound:
+    round_id: int
+    # Set by the caller; a round that processed no rows keeps the request for the next one
+    rows: int = 0
+
+
+class RoundProfiler:
+    """
+    Opt-in profiling of the live loop, requested without a restart by
+    touching the control file (its content picks the modes, default
+    ``sample``) or by ``SIGUSR1`` (sample) / ``SIGUSR2`` (memory).
+
+    The next round that processes at least one row then runs under the
+    requested modes and the reports are written to ``log_dir`` tagged with
+    the round id:
+
+    - ``sample``: stack sampling of all threads
+    - ``cprofile``: deterministic profile of the thread running the round,
+      which covers everything with ROW_WORKERS=1
+    - ``memory``: tracemalloc snapshot diff between round start and end
+    """
+
+    def __init__(
+        self,
+        control_file: str | None,
+        log_dir: str,
+        top_n: int = 40,
+        sample_interval: float = 0.005,
+    ) -> None:
+        self.control_file = control_file
+        self.log_dir = log_dir
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        self._lock = threading.Lock()
+        self._requested: set[str] = set()
+
+    def request(
+        self,
+        *modes: str,
+    ) -> None:
+        with self._lock:
+            self._requested.update(mode for mode in modes if mode in MODES)
+
+    def install_signal_handlers(self) -> None:
+        # Windows has no SIGUSR1/SIGUSR2, the control file works everywhere
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.request("sample"))
+        if hasattr(signal, "SIGUSR2"):
+            signal.signal(signal.SIGUSR2, lambda signum, frame: self.request("memory"))
+
+    def _take_requested(self) -> set[str]:
+        if self.control_file and os.path.exists(self.control_file):
+            try:
+                with open(self.control_file, encoding="utf-8") as f:
+                    modes = f.read().replace(",", " ").split()
+                os.remove(self.control_file)
+            except OSError as e:
+                logger.warning("Profile control file unreadable: %s", e)
+                modes = []
+            self.request(*(modes or ["sample"]))
+
+        with self._lock:
+            requested, self._requested = self._requested, set()
+        return requested
+
+    def _write(
+        self,
+        name: str,
+        content: str,
+    ) -> str:
+        os.makedirs(self.log_dir, exist_ok=True)
+        path = os.path.join(self.log_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    @contextmanager
+    def round(
+        self,
+        round_id: int,
+    ) -> Iterator[ProfiledRound]:
+        profiled = ProfiledRound(round_id)
+        modes = self._take_requested()
+        if not modes:
+            yield profiled
+            return
+
+        logger.info("Profiling round %s: %s", round_id, ", ".join(sorted(modes)))
+        sampler = StackSampler(self.sample_interval) if "sample" in modes else None
+        profile = cProfile.Profile() if "cprofile" in modes else None
+        memory_before = None
+        started_tracemalloc = False
+        if "memory" in modes:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                started_tracemalloc = True
+            memory_before = tracemalloc.take_snapshot()
+
+        if sampler is not None:
+            sampler.start()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield profiled
+        finally:
+            if profile is not None:
+                profile.disable()
+            if sampler is not None:
+                sampler.stop()
+            try:
+                if profiled.rows:
+                    # A round spans several scheduler windows, the time keeps their reports apart
+                    self._report(f"{round_id}-{time.strftime('%Y%m%d-%H%M%S')}", sampler, profile, memory_before)
+                else:
+                    logger.info("Round %s processed no rows, profiling the next one instead", round_id)
+                    self.request(*modes)
+            except Exception as e:
+                logger.warning("Writing profile reports failed: %s", e)
+            finally:
+                if started_tracemalloc:
+                    tracemalloc.stop()
+
+    def _report(
+        self,
+        tag: str,
+        sampler: StackSampler | None,
+        profile: cProfile.Profile | None,
+        memory_before: tracemalloc.Snapshot | None,
+    ) -> None:
+        written = []
+        if sampler is not None:
+            written.append(self._write(f"profile-{tag}-sample.txt", sampler.report(self.top_n)))
+            written.append(self._write(f"profile-{tag}-sample.collapsed", sampler.collapsed()))
+
+        if profile is not None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            prof_path = os.path.join(self.log_dir, f"profile-{tag}-cprofile.prof")
+            profile.dump_stats(prof_path)
+            written.append(prof_path)
+            out = io.StringIO()
+            stats = pstats.Stats(profile, stream=out)
+            stats.sort_stats("cumulative").print_stats(self.top_n)
+            stats.sort_stats("tottime").print_stats(self.top_n)
+            written.append(self._write(f"profile-{tag}-cprofile.txt", out.getvalue()))
+
+        if memory_before is not None:
+            # Leave out what the profilers themselves allocated
+            own = [
+                tracemalloc.Filter(False, module.__file__)
+                for module in (cProfile, pstats, tracemalloc, sys.modules[__name__])
+            ]
+            memory_before = memory_before.filter_traces(own)
+            memory_after = tracemalloc.take_snapshot().filter_traces(own)
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"traced memory: current {current / 1024 / 1024:.1f} MB, peak {peak / 1024 / 1024:.1f} MB", ""]
+            lines.append(f"TOP {self.top_n} GROWTH OVER THE ROUND (by line):")
+            for stat in memory_after.compare_to(memory_before, "lineno")[:self.top_n]:
+                lines.append(f"  {stat}")
+            lines += ["", f"TOP {self.top_n} LIVE ALLOCATIONS AT ROUND END (by file):"]
+            for stat in memory_after.statistics("filename")[:self.top_n]:
+                lines.append(f"  {stat}")
+            written.append(self._write(f"memory-{tag}.txt", "\n".join(lines) + "\n"))
+
+        for path in written:
+            logger.info("Profile report: %s", path)
+
+    @staticmethod
+    def from_env() -> "RoundProfiler":
+        return RoundProfiler(
+            control_file=os.getenv(
+                "PROFILE_CONTROL_FILE",
+                str(SRC_PATH.joinpath("storage", "profile_next_round")),
+            ) or None,
+            log_dir=os.getenv("PROFILE_LOG_DIR", str(SRC_PATH.joinpath("logs"))),
+            top_n=int(os.getenv("PROFILE_TOP_N", "40")),
+            sample_interval=float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005")),
+        )
+
+
+round_profiler = RoundProfiler.from_env()
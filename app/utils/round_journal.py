@@ -0,0 +1,213 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from app.utils.paths import SRC_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class RoundJournal:
+    """
+    Lightweight sqlite checkpoint of the main loop.
+
+    A round is one pass over the CHECK=1 rows; it may span several
+    scheduler windows and is finished once every row ran in it. The journal
+    records each round, the rows completed in it and the last start and
+    price pushed per row. A restart resumes the unfinished round, and the
+    rows it already completed are not due again until their RELAX_TIME is
+    up (``last_refresh`` seeds the scheduler).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+    ) -> None:
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._current_round: int | None = None
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rounds (
+                round_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                total_rows INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS round_rows (
+                round_id INTEGER NOT NULL,
+                row_index INTEGER NOT NULL,
+                started_at REAL NOT NULL,
+                ok INTEGER NOT NULL,
+                PRIMARY KEY (round_id, row_index)
+            );
+            CREATE TABLE IF NOT EXISTS row_decisions (
+                row_index INTEGER PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                price INTEGER NOT NULL,
+                decided_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS row_state (
+                row_index INTEGER PRIMARY KEY,
+                started_at REAL NOT NULL,
+                interval INTEGER,
+                product_id INTEGER,
+                pushed_price INTEGER,
+                pushed_at REAL
+            );
+            """
+        )
+
+    def start_round(
+        self,
+        run_indexes: list[int],
+    ) -> int:
+        """Round id of the unfinished pass, or of a new one. Call it only when rows are due."""
+        with self._lock:
+            unfinished = self._conn.execute(
+                "SELECT round_id FROM rounds WHERE finished_at IS NULL ORDER BY round_id DESC LIMIT 1"
+            ).fetchone()
+            if unfinished is not None:
+                round_id = unfinished[0]
+                done = self._conn.execute(
+                    "SELECT COUNT(*) FROM round_rows WHERE round_id = ?",
+                    (round_id,),
+                ).fetchone()[0]
+                if round_id != self._current_round:
+                    # Left unfinished by a previous process
+                    logger.info("Resuming round %s: %s/%s rows done", round_id, done, len(run_indexes))
+                    self._current_round = round_id
+                self._conn.execute(
+                    "UPDATE rounds SET total_rows = ? WHERE round_id = ?",
+                    (len(run_indexes), round_id),
+                )
+                return round_id
+
+            cursor = self._conn.execute(
+                "INSERT INTO rounds (started_at, total_rows) VALUES (?, ?)",
+                (time.time(), len(run_indexes)),
+            )
+            self._current_round = cursor.lastrowid
+            return cursor.lastrowid
+
+    def complete_row(
+        self,
+        round_id: int,
+        index: int,
+        started_at: float,
+        interval: int | None,
+        ok: bool,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO round_rows VALUES (?, ?, ?, ?)",
+                (round_id, index, started_at, int(ok)),
+            )
+            self._conn.execute(
+                """
+                INSERT INTO row_state (row_index, started_at, interval) VALUES (?, ?, ?)
+                ON CONFLICT (row_index) DO UPDATE SET
+                    started_at = excluded.started_at,
+                    interval = COALESCE(excluded.interval, row_state.interval)
+                """,
+                (index, started_at, interval),
+            )
+
+    def record_push(
+        self,
+        index: int,
+        product_id: int,
+        price: int,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO row_state (row_index, started_at, product_id, pushed_price, pushed_at)
+                VALUES (?, 0, ?, ?, ?)
+                ON CONFLICT (row_index) DO UPDATE SET
+                    product_id = excluded.product_id,
+                    pushed_price = excluded.pushed_price,
+                    pushed_at = excluded.pushed_at
+                """,
+                (index, product_id, price, time.time()),
+            )
+
+    def record_decision(
+        self,
+        index: int,
+        fingerprint: str,
+        price: int,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO row_decisions VALUES (?, ?, ?, ?)",
+                (index, fingerprint, price, time.time()),
+            )
+
+    def last_decision(
+        self,
+        index: int,
+    ) -> tuple[str, int, float] | None:
+        """(fingerprint, pushed price, decided_at) of the row's last successful push."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT fingerprint, price, decided_at FROM row_decisions WHERE row_index = ?",
+                (index,),
+            ).fetchone()
+
+    def finish_round(
+        self,
+        round_id: int,
+        run_indexes: list[int],
+    ) -> bool:
+        """Close the round once every row of ``run_indexes`` completed in it. Returns whether it was closed."""
+        with self._lock:
+            done = {
+                index for index, in self._conn.execute(
+                    "SELECT row_index FROM round_rows WHERE round_id = ?",
+                    (round_id,),
+                )
+            }
+            if not done.issuperset(run_indexes):
+                return False
+            self._conn.execute(
+                "UPDATE rounds SET finished_at = ? WHERE round_id = ?",
+                (time.time(), round_id),
+            )
+        logger.info("Round %s finished: %s rows", round_id, len(done))
+        return True
+
+    def last_refresh(self) -> dict[int, tuple[float, int | None]]:
+        """Row index -> (wall-clock start of its last run, its RELAX_TIME)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row_index, started_at, interval FROM row_state WHERE started_at > 0"
+            ).fetchall()
+        return {index: (started_at, interval) for index, started_at, interval in rows}
+
+    @staticmethod
+    def from_env() -> "RoundJournal":
+        return RoundJournal(
+            os.getenv(
+                "ROUND_JOURNAL_DB",
+                str(SRC_PATH.joinpath("storage", "round_journal.db")),
+            )
+        )
+
+
+_lock = threading.Lock()
+_round_journal: RoundJournal | None = None
+
+
+def get_round_journal() -> RoundJournal:
+    """Journal of ROUND_JOURNAL_DB, opened on first use."""
+    global _round_journal
+    with _lock:
+        if _round_journal is None:
+            _round_journal = RoundJournal.from_env()
+        return _round_journal
@@ -0,0 +1,243 @@
+import logging
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RowLeaseStore:
+    """
+    Lease-based sharding of sheet rows between several ``main.py`` nodes
+    running against the same spreadsheet.
+
+    Leases live in a shared sqlite file. Every node claims at most its fair
+    share of the CHECK=1 rows each round and gives rows back when more nodes
+    join. A heartbeat thread renews the node and its leases every
+    ``ttl / 3`` seconds, so a round longer than ``ttl`` keeps its rows.
+    Leases of a dead node expire after ``ttl`` seconds and are taken over by
+    the survivors; ``release_all`` hands them over at once on shutdown.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        sheet_key: str,
+        node_id: str | None = None,
+        ttl: float = 600,
+    ) -> None:
+        self.db_path = db_path
+        self.sheet_key = sheet_key
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._heartbeat: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS row_leases (
+                    sheet_key TEXT NOT NULL,
+                    row_index INTEGER NOT NULL,
+                    node_id TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (sheet_key, row_index)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS lease_nodes (
+                    sheet_key TEXT NOT NULL,
+                    node_id TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (sheet_key, node_id)
+                )
+                """
+            )
+        finally:
+            conn.close()
+
+    def claim(
+        self,
+        run_indexes: list[int],
+        now: float | None = None,
+    ) -> list[int]:
+        """
+        Renew this node's leases and claim free or expired rows up to the
+        fair share. Returns the rows this node owns for the next round.
+        """
+        now = time.time() if now is None else now
+        expires_at = now + self.ttl
+        self._start_heartbeat()
+        with self._lock:
+            return self._claim(run_indexes, now, expires_at)
+
+    def _claim(
+        self,
+        run_indexes: list[int],
+        now: float,
+        expires_at: float,
+    ) -> list[int]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO lease_nodes VALUES (?, ?, ?)",
+                (self.sheet_key, self.node_id, expires_at),
+            )
+            live_nodes = conn.execute(
+                "SELECT COUNT(*) FROM lease_nodes WHERE sheet_key = ? AND expires_at > ?",
+                (self.sheet_key, now),
+            ).fetchone()[0]
+            share = math.ceil(len(run_indexes) / max(live_nodes, 1))
+
+            owners = {
+                row_index: (node_id, lease_expires_at)
+                for row_index, node_id, lease_expires_at in conn.execute(
+                    "SELECT row_index, node_id, expires_at FROM row_leases WHERE sheet_key = ?",
+                    (self.sheet_key,),
+                )
+            }
+            mine = [
+                index for index in run_indexes
+                if index in owners and owners[index][0] == self.node_id
+            ]
+            free = [
+                index for index in run_indexes
+                if index not in owners or (owners[index][0] != self.node_id and owners[index][1] <= now)
+            ]
+
+            # Keep the lowest rows we already own, give the rest back
+            mine.sort()
+            keep = mine[:share]
+            release = mine[share:]
+            take = sorted(free)[:max(share - len(keep), 0)]
+
+            conn.executemany(
+                "DELETE FROM row_leases WHERE sheet_key = ? AND row_index = ? AND node_id = ?",
+                [(self.sheet_key, index, self.node_id) for index in release],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO row_leases VALUES (?, ?, ?, ?)",
+                [(self.sheet_key, index, self.node_id, expires_at) for index in keep + take],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        owned = sorted(keep + take)
+        logger.info(
+            "Node %s: %s/%s rows (%s live nodes)",
+            self.node_id,
+            len(owned),
+            len(run_indexes),
+            live_nodes,
+        )
+        return owned
+
+    def renew(
+        self,
+        now: float | None = None,
+    ) -> int:
+        """Extend the node heartbeat and every lease this node still holds. Returns the number of leases."""
+        now = time.time() if now is None else now
+        expires_at = now + self.ttl
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT OR REPLACE INTO lease_nodes VALUES (?, ?, ?)",
+                    (self.sheet_key, self.node_id, expires_at),
+                )
+                renewed = conn.execute(
+                    "UPDATE row_leases SET expires_at = ? WHERE sheet_key = ? AND node_id = ?",
+                    (expires_at, self.sheet_key, self.node_id),
+                ).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+        return renewed
+
+    def release_all(self) -> None:
+        """Stop the heartbeat and give every row back, so peers take them over without waiting for the TTL."""
+        self._stop.set()
+        with self._lock:
+            self._release()
+        logger.info("Node %s released its rows", self.node_id)
+
+    def set_sheet_key(
+        self,
+        sheet_key: str,
+    ) -> None:
+        """Give back the rows of the previous sheet; the next ``claim`` leases rows of ``sheet_key``."""
+        with self._lock:
+            if sheet_key == self.sheet_key:
+                return
+            self._release()
+            logger.info("Node %s now leases rows of %s", self.node_id, sheet_key)
+            self.sheet_key = sheet_key
+
+    def _release(self) -> None:
+        # Called with self._lock held
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM row_leases WHERE sheet_key = ? AND node_id = ?",
+                (self.sheet_key, self.node_id),
+            )
+            conn.execute(
+                "DELETE FROM lease_nodes WHERE sheet_key = ? AND node_id = ?",
+                (self.sheet_key, self.node_id),
+            )
+        finally:
+            conn.close()
+
+    def _start_heartbeat(self) -> None:
+        if self._heartbeat is not None and self._heartbeat.is_alive():
+            return
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._run_heartbeat, name="row-lease-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _run_heartbeat(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                self.renew()
+            except Exception as e:
+                logger.warning("Renewing the row leases failed: %s", e)
+
+    @staticmethod
+    def sheet_key_from_env() -> str:
+        return f"{os.environ['SPREADSHEET_KEY']}/{os.environ['SHEET_NAME']}"
+
+    @staticmethod
+    def from_env() -> "RowLeaseStore | None":
+        db_path = os.getenv("SHARD_LEASE_DB")
+        if not db_path:
+            return None
+        return RowLeaseStore(
+            db_path=db_path,
+            sheet_key=RowLeaseStore.sheet_key_from_env(),
+            node_id=os.getenv("SHARD_NODE_ID") or None,
+            ttl=float(os.getenv("SHARD_LEASE_TTL", "600")),
+        )
@@ -0,0 +1,52 @@
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Generic, Iterable, Iterator, TypeVar
+
+from app.utils.tracing import ContextThreadPoolExecutor
+
+T = TypeVar("T")
+
+
+class RowPipeline(Generic[T]):
+    """
+    Bounded-lookahead producer/consumer over sheet rows.
+
+    ``fetch`` (Sheets references, itemku listing, order-site prices) runs
+    on a producer pool of ``depth`` threads for up to ``depth`` rows ahead
+    of the row currently being decided and pushed by the consumer. Rows are
+    yielded in order.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int], T],
+        depth: int = 1,
+    ) -> None:
+        self.fetch = fetch
+        self.depth = depth
+
+    def run(
+        self,
+        indexes: Iterable[int],
+    ) -> Iterator[tuple[int, Future[T]]]:
+        pending: deque[tuple[int, Future[T]]] = deque()
+        index_iter = iter(indexes)
+
+        with ContextThreadPoolExecutor(max_workers=self.depth, thread_name_prefix="prefetch") as executor:
+            def fill() -> None:
+                while len(pending) < self.depth:
+                    index = next(index_iter, None)
+                    if index is None:
+                        return
+                    pending.append((index, executor.submit(self.fetch, index)))
+
+            fill()
+            try:
+                while pending:
+                    index, future = pending.popleft()
+                    fill()
+                    yield index, future
+            finally:
+                # Consumer stopped early: don't start rows nobody will decide
+                for _, future in pending:
+                    future.cancel()
@@ -0,0 +1,134 @@
+import heapq
+import time
+from typing import Callable, Iterator
+
+
+class RowScheduler:
+    """
+    Priority queue of sheet rows keyed by their next due time.
+
+    Each row's RELAX_TIME is treated as its minimum refresh interval,
+    measured from the moment the row was started, instead of a sleep after
+    the row. Rows removed from the sheet (CHECK != 1) are dropped lazily.
+
+    Due times are on ``clock`` (monotonic), the restored checkpoint is on
+    ``wall_clock``.
+    """
+
+    def __init__(
+        self,
+        default_interval: int = 60,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.default_interval = default_interval
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self._heap: list[tuple[float, int]] = []
+        self._due: dict[int, float] = {}
+        self.intervals: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._due
+
+    def sync(
+        self,
+        indexes: list[int],
+        now: float | None = None,
+    ) -> None:
+        now = self.clock() if now is None else now
+        active = set(indexes)
+        for index in list(self._due):
+            if index not in active:
+                del self._due[index]
+                self.intervals.pop(index, None)
+        for index in indexes:
+            if index not in self._due:
+                self._push(index, now)
+
+    def restore(
+        self,
+        last_refresh: dict[int, tuple[float, int | None]],
+    ) -> None:
+        """
+        Seed due times from a checkpoint of wall-clock start times, so rows
+        refreshed within their interval before a restart are not redone.
+        """
+        wall_now = self.wall_clock()
+        now = self.clock()
+        for index, (started_at, interval) in last_refresh.items():
+            if interval is not None:
+                self.intervals[index] = interval
+            interval = self.intervals.get(index, self.default_interval)
+            remaining = max(started_at + interval - wall_now, 0.0)
+            self._push(index, now + remaining)
+
+    def next_due_time(self) -> float | None:
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return self._heap[0][0]
+
+    def pop_due(
+        self,
+        now: float | None = None,
+    ) -> int | None:
+        now = self.clock() if now is None else now
+        self._drop_stale()
+        if not self._heap or self._heap[0][0] > now:
+            return None
+        _, index = heapq.heappop(self._heap)
+        del self._due[index]
+        return index
+
+    def reschedule(
+        self,
+        index: int,
+        interval: int | None = None,
+        started_at: float | None = None,
+    ) -> None:
+        if interval is not None:
+            self.intervals[index] = interval
+        interval = self.intervals.get(index, self.default_interval)
+        started_at = self.clock() if started_at is None else started_at
+        self._push(index, started_at + interval)
+
+    def due_rows(self) -> Iterator[int]:
+        """
+        Yield rows as they come due, each at most once. The generator stops
+        when no remaining row is due yet, which is the end of a round.
+        """
+        seen: set[int] = set()
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > self.clock():
+                return
+            if self._heap[0][1] in seen:
+                return
+            index = self.pop_due()
+            seen.add(index)
+            yield index
+
+    def seconds_until_next(self) -> float | None:
+        next_due = self.next_due_time()
+        if next_due is None:
+            return None
+        return max(next_due - self.clock(), 0.0)
+
+    def _push(
+        self,
+        index: int,
+        due: float,
+    ) -> None:
+        self._due[index] = due
+        heapq.heappush(self._heap, (due, index))
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            due, index = self._heap[0]
+            if self._due.get(index) == due:
+                return
+            heapq.heappop(self._heap)
@@ -1,3 +1,4 @@
+import logging
 import pathlib
 import time
 
@@ -11,6 +12,8 @@ from webdriver_manager.chrome import ChromeDriverManager
 import constants
 from app.decorator.retry import retry
 
+logger = logging.getLogger(__name__)
+
 PATH_TO_EXTENSION = pathlib.Path(__file__).parent.parent.joinpath(
     "extensions/rektcaptcha"
 )
@@ -53,7 +56,7 @@ class SeleniumUtil:
         try:
             self.driver.get(url)
         except WebDriverException as e:
-            print(f"Error navigating to {url}: {e}")
+            logger.warning("Error navigating to %s: %s", url, e)
             raise WebDriverException("Block by site")
 
     def get_page_src(self, url: str, css_selector: str) -> str:
@@ -63,7 +66,7 @@ class SeleniumUtil:
                 EC.presence_of_element_located((By.CSS_SELECTOR, css_selector))
             )
         except TimeoutException:
-            print(f"[Warning] Timeout waiting for selector {css_selector}, continuing anyway...")
+            logger.warning("Timeout waiting for selector %s, continuing anyway...", css_selector)
 
         return self.driver.page_source
 
@@ -0,0 +1,28 @@
+from gspread.http_client import HTTPClient
+
+from app.shared.consts import SHEETS_API_URL
+
+GOOGLE_SHEETS_API_URL = "https://sheets.googleapis.com"
+
+
+def sheets_url(
+    url: str,
+) -> str:
+    """Rewrite a Sheets API URL onto SHEETS_API_URL when it is set."""
+    if SHEETS_API_URL and url.startswith(GOOGLE_SHEETS_API_URL):
+        return SHEETS_API_URL.rstrip("/") + url[len(GOOGLE_SHEETS_API_URL):]
+    return url
+
+
+class SheetsHTTPClient(HTTPClient):
+    """gspread HTTP client that honours SHEETS_API_URL."""
+
+    def request(self, method, endpoint, *args, **kwargs):
+        return super().request(method, sheets_url(endpoint), *args, **kwargs)
+
+
+def google_api_client_options() -> dict | None:
+    """``client_options`` for ``googleapiclient.discovery.build``."""
+    if SHEETS_API_URL:
+        return {"api_endpoint": SHEETS_API_URL.rstrip("/") + "/"}
+    return None
@@ -1,4 +1,4 @@
-import concurrent.futures
+import logging
 import os
 import re
 from enum import Enum
@@ -7,6 +7,7 @@ from typing import Optional, Tuple, List, TypeVar, Type, Any
 import gspread
 from pydantic import BaseModel, ValidationError
 
+import constants
 from app.decorator.retry import retry
 from app.decorator.time_execution import time_execution
 from app.models.crwl_api_models import Product
@@ -20,6 +21,11 @@ from app.utils.ggsheet import (
     GSheet,
 )
 from app.utils.google_api import StockManager
+from app.utils.host_limits import host_limiter
+from app.utils.offer_archive import archive_offers
+from app.utils.tracing import shared_executor
+
+logger = logging.getLogger(__name__)
 
 
 class ExtraInfor:
@@ -161,11 +167,13 @@ def g2g_lowest_price(
     return G2GOfferItem.min_offer_item(filtered_g2g_offer_items)
 
 
+@time_execution(source="g2g", none_outcome="empty")
 def _process_g2g(row: Row, gsheet: GSheet) -> Optional[Tuple[float, str]]:
     try:
-        print("Starting G2G fetch...")
+        logger.debug("Starting G2G fetch...")
         g2g_offer_items = g2g_extract_offer_items(row.g2g.G2G_PRODUCT_COMPARE)
-        print(f"Found {len(g2g_offer_items)} G2G offer items")
+        logger.info("Found %s G2G offer items", len(g2g_offer_items))
+        archive_offers("g2g", row.row_index, g2g_offer_items)
         filtered_g2g_offer_items = G2GOfferItem.filter_valid_g2g_offer_item(
             g2g=row.g2g,
             g2g_blacklist=row.g2g.get_blacklist(gsheet),
@@ -177,19 +185,20 @@ def _process_g2g(row: Row, gsheet: GSheet) -> Optional[Tuple[float, str]]:
                 round(g2g_min_offer_item.price_per_unit * row.g2g.G2G_PROFIT, 4),
                 g2g_min_offer_item.seller_name
             )
-            print(f"G2G min price calculated: {g2g_min_price}")
+            logger.info("G2G min price calculated: %s", g2g_min_price)
             return g2g_min_price
         else:
-            print("No valid G2G offer items")
+            logger.info("No valid G2G offer items")
             return None
     except Exception as e:
-        print(f"Error processing G2G: {e}")
+        logger.warning("Error processing G2G: %s", e)
         return None
 
 
+@time_execution(source="fun", none_outcome="empty")
 def _process_fun(row: Row, gsheet: GSheet) -> Optional[Tuple[float, str]]:
     try:
-        print("Starting FUN fetch...")
+        logger.debug("Starting FUN fetch...")
         fun_offer_items = fun_extract_offer_items(
             row.fun.FUN_PRODUCT_COMPARE,
             [
@@ -200,7 +209,8 @@ def _process_fun(row: Row, gsheet: GSheet) -> Optional[Tuple[float, str]]:
             ] if i is not None
             ],
         )
-        print(f"Found {len(fun_offer_items)} FUN offer items")
+        logger.info("Found %s FUN offer items", len(fun_offer_items))
+        archive_offers("fun", row.row_index, fun_offer_items)
         filtered_fun_offer_items = FUNOfferItem.filter_valid_fun_offer_items(
             fun=row.fun,
             fun_offer_items=fun_offer_items,
@@ -215,19 +225,20 @@ def _process_fun(row: Row, gsheet: GSheet) -> Optional[Tuple[float, str]]:
                     4),
                 fun_min_offer_item.seller
             )
-            print(f"FUN min price calculated: {fun_min_price}")
+            logger.info("FUN min price calculated: %s", fun_min_price)
             return fun_min_price
         else:
-            print("No valid FUN offer items")
+            logger.info("No valid FUN offer items")
             return None
     except Exception as e:
-        print(f"Error processing FUN: {e}")
+        logger.warning("Error processing FUN: %s", e)
         return None
 
 
+@time_execution(source="bij", none_outcome="empty")
 def _process_bij(bij: BIJ, gsheet: GSheet, hostdata: dict) -> Optional[Tuple[float, str]]:
     try:
-        print("Starting BIJ fetch...")
+        logger.debug("Starting BIJ fetch...")
         CNY_RATE = getCNYRate()
         _black_list = bij.get_blacklist(gsheet)
         bij_min_offer_item = None
@@ -236,9 +247,9 @@ def _process_bij(bij: BIJ, gsheet: GSheet, hostdata: dict) -> Optional[Tuple[flo
                 bij_min_offer_item = bij_lowest_price(hostdata, bij, black_list=_black_list)
                 break
             except Exception as e:
-                print(f"Attempt {attempt + 1} failed for BIJ. Error: {e}")
+                logger.warning("Attempt %s failed for BIJ. Error: %s", attempt + 1, e)
                 if attempt == 1:
-                    print("Error when getting BIJ after retries", e)
+                    logger.warning("Error when getting BIJ after retries: %s", e)
                     raise  # Ném lại lỗi sau khi hết số lần thử
 
         if bij_min_offer_item:
@@ -246,129 +257,147 @@ def _process_bij(bij: BIJ, gsheet: GSheet, hostdata: dict) -> Optional[Tuple[flo
                 round(bij_min_offer_item.money * bij.BIJ_PROFIT * bij.HESONHANDONGIA3 * CNY_RATE, 4),
                 bij_min_offer_item.username
             )
-            print(f"BIJ min price calculated: {bij_min_price}")
+            logger.info("BIJ min price calculated: %s", bij_min_price)
             return bij_min_price
         else:
-            print("No valid BIJ offer items")
+            logger.info("No valid BIJ offer items")
             return None
     except Exception as e:
-        print(f"Error processing BIJ: {e}")
+        logger.warning("Error processing BIJ: %s", e)
         return None
 
 
+@time_execution(source="sheets", none_outcome="empty")
 def _process_price1_sheet(row: Row) -> Optional[Tuple[float, str]]:
     try:
-        print("Starting SheetPrice1 sheet...")
+        logger.debug("Starting SheetPrice1 sheet...")
         for attempt in range(2):
             try:
                 min_price = (row.s1.get_price()
                              * row.s1.SHEET_PROFIT
                              * row.s1.QUYDOIDONVI, "Get directly from sheet1")
-                print(f"\nSheetPrice1 min price: {min_price}")
+                logger.info("SheetPrice1 min price: %s", min_price)
                 return min_price
             except Exception as e:
-                print(f"Attempt {attempt + 1} failed for SheetPrice1. Error: {e}")
+                logger.warning("Attempt %s failed for SheetPrice1. Error: %s", attempt + 1, e)
                 if attempt == 1:
-                    print("Error when getting SheetPrice1 after retries", e)
+                    logger.warning("Error when getting SheetPrice1 after retries: %s", e)
                     raise
                 return None
         return None
     except Exception as e:
-        print(f"Error processing PRICE1: {e}")
+        logger.warning("Error processing PRICE1: %s", e)
         return None
 
 
+@time_execution(source="sheets", none_outcome="empty")
 def _process_price2_sheet(row: Row) -> Optional[Tuple[float, str]]:
     try:
-        print("Starting SheetPrice2 sheet...")
+        logger.debug("Starting SheetPrice2 sheet...")
         for attempt in range(2):
             try:
                 min_price = (row.s2.get_price()
                              * row.s2.SHEET_PROFIT
                              * row.s2.QUYDOIDONVI, "Get directly from sheet2")
-                print(f"\nSheetPrice2 min price: {min_price}")
+                logger.info("SheetPrice2 min price: %s", min_price)
                 return min_price
             except Exception as e:
-                print(f"Attempt {attempt + 1} failed for SheetPrice2. Error: {e}")
+                logger.warning("Attempt %s failed for SheetPrice2. Error: %s", attempt + 1, e)
                 if attempt == 1:
-                    print("Error when getting SheetPrice2 after retries", e)
+                    logger.warning("Error when getting SheetPrice2 after retries: %s", e)
                     raise
                 return None
         return None
     except Exception as e:
-        print(f"Error processing SheetPrice2: {e}")
+        logger.warning("Error processing SheetPrice2: %s", e)
         return None
 
 
+@time_execution(source="sheets", none_outcome="empty")
 def _process_price3_sheet(row: Row) -> Optional[Tuple[float, str]]:
     try:
-        print("Starting PRICE3 sheet...")
+        logger.debug("Starting PRICE3 sheet...")
         for attempt in range(2):
             try:
                 min_price = (row.s3.get_price()
                              * row.s3.SHEET_PROFIT
                              * row.s3.QUYDOIDONVI, "Get directly from sheet3")
-                print(f"\nSheetPrice3 min price: {min_price}")
+                logger.info("SheetPrice3 min price: %s", min_price)
                 return min_price
             except Exception as e:
-                print(f"Attempt {attempt + 1} failed for SheetPrice3. Error: {e}")
+                logger.warning("Attempt %s failed for SheetPrice3. Error: %s", attempt + 1, e)
                 if attempt == 1:
-                    print("Error when getting SheetPrice3 after retries", e)
+                    logger.warning("Error when getting SheetPrice3 after retries: %s", e)
                     raise
                 return None
         return None
     except Exception as e:
-        print(f"Error processing SheetPrice3: {e}")
+        logger.warning("Error processing SheetPrice3: %s", e)
         return None
 
 
+@time_execution(source="sheets", none_outcome="empty")
 def _process_price4_sheet(row: Row) -> Optional[Tuple[float, str]]:
     try:
-        print("Starting SheetPrice4 sheet...")
+        logger.debug("Starting SheetPrice4 sheet...")
         for attempt in range(2):
             try:
                 min_price = (row.s4.get_price()
                              * row.s4.SHEET_PROFIT
                              * row.s4.QUYDOIDONVI, "Get directly from sheet4")
-                print(f"\nSheetPrice4 min price: {min_price}")
+                logger.info("SheetPrice4 min price: %s", min_price)
                 return min_price
             except Exception as e:
-                print(f"Attempt {attempt + 1} failed for SheetPrice4. Error: {e}")
+                logger.warning("Attempt %s failed for SheetPrice4. Error: %s", attempt + 1, e)
                 if attempt == 1:
-                    print("Error when getting SheetPrice4 after retries", e)
+                    logger.warning("Error when getting SheetPrice4 after retries: %s", e)
                     raise
                 return None
         return None
     except Exception as e:
-        print(f"Error processing SheetPrice4: {e}")
+        logger.warning("Error processing SheetPrice4: %s", e)
         return None
 
 
+@time_execution(source="dd", none_outcome="empty")
 def _process_dd(row: Row, gsheet: GSheet) -> Optional[Tuple[float, str]]:
     try:
-        print("Starting DD fetch...")
+        logger.debug("Starting DD fetch...")
         dd_min_offer_item = None
         for attempt in range(2):
             try:
                 dd_min_offer_item = get_dd_min_price(row.dd)
                 break
             except Exception as e:
-                print(f"Attempt {attempt + 1} failed for DD. Error: {e}")
+                logger.warning("Attempt %s failed for DD. Error: %s", attempt + 1, e)
                 if attempt == 1:
-                    print("Error when getting DD after retries", e)
+                    logger.warning("Error when getting DD after retries: %s", e)
                     raise
         return dd_min_offer_item
     except Exception as e:
-        print(f"Error processing DD: {e}")
+        logger.warning("Error processing DD: %s", e)
         return None
 
 
+def get_usd_idr_rate() -> float:
+    try:
+        RATE_SHEET_ID = os.getenv("RATE_SHEET_ID")
+        RATE_SHEET_NAME = os.getenv("RATE_SHEET_NAME")
+        CELL_RATE_USD = os.getenv("CELL_RATE_USD")
+        rate_sheet = StockManager(RATE_SHEET_ID)
+        return rate_sheet.get_cell_float_value(f"'{RATE_SHEET_NAME}'!{CELL_RATE_USD}")
+    except Exception:
+        logger.warning("Error fetching exchange rate from Google Sheet, using default rate 16326.")
+        return 16326
+
+
 @retry(retries=2, delay=0.1)
-@time_execution
+@time_execution(source="order_sites", none_outcome="empty")
 def calculate_price_stock_fake(
     gsheet: GSheet,
     row: Row,
-    hostdata: dict,
+    hostdata: dict | None = None,
+    rate: float | None = None,
 ) -> Tuple[Optional[Tuple[float, str]], List[Optional[Tuple[float, str]]]]:  # Trả về tuple(min_price, list_all_prices)
     # print("DEBUG: Starting calculate_price_stock_fake...")
     g2g_future = None
@@ -382,113 +411,114 @@ def calculate_price_stock_fake(
 
     results = {}  # Dictionary để lưu kết quả theo nguồn
 
-    # Sử dụng ThreadPoolExecutor để chạy song song
-    # max_workers=3 để giới hạn số luồng bằng số nguồn dữ liệu
-    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-        # Submit G2G task
-        if row.g2g.G2G_CHECK == 1:
-            print("Submitting G2G task...")
-            g2g_future = executor.submit(_process_g2g, row, gsheet)
-
-        # Submit FUN task
-        if row.fun.FUN_CHECK == 1:
-            print("Submitting FUN task...")
-            fun_future = executor.submit(_process_fun, row, gsheet)
-
-        # Submit BIJ task
-        if row.bij.BIJ_CHECK == 1:
-            print("Submitting BIJ task...")
-            bij_future = executor.submit(_process_bij, row.bij, gsheet, hostdata)
-
-        if row.dd.DD_CHECK == 1:
-            print("Submitting DD task...")
-            dd_future = executor.submit(_process_dd, row, gsheet)
-
-        if row.s1.SHEET_CHECK == 1:
-            print("Submitting SheetPrice1 task...")
-            s1_future = executor.submit(_process_price1_sheet, row)
-
-        if row.s2.SHEET_CHECK == 1:
-            print("Submitting SheetPrice2 task...")
-            s2_future = executor.submit(_process_price2_sheet, row)
-
-        if row.s3.SHEET_CHECK == 1:
-            print("Submitting SheetPrice3 task...")
-            s3_future = executor.submit(_process_price3_sheet, row)
-
-        if row.s4.SHEET_CHECK == 1:
-            print("Submitting SheetPrice4 task...")
-            s4_future = executor.submit(_process_price4_sheet, row)
-
-        if g2g_future:
-            try:
-                results['g2g'] = g2g_future.result()  # Lấy kết quả từ luồng G2G
-                print(f"G2G Result received: {results['g2g']} USD")
-            except Exception as e:
-                print(f"G2G task failed with exception: {e}")
-                results['g2g'] = None
-        else:
+    # Order sites run in a pool shared by all rows, its threads keep their HTTP sessions
+    executor = shared_executor("order-sites", int(os.getenv("ORDER_SITE_THREADS", "16")))
+    # Submit G2G task
+    if row.g2g.G2G_CHECK == 1:
+        logger.debug("Submitting G2G task...")
+        g2g_future = executor.submit(_process_g2g, row, gsheet)
+
+    # Submit FUN task
+    if row.fun.FUN_CHECK == 1:
+        logger.debug("Submitting FUN task...")
+        fun_future = executor.submit(_process_fun, row, gsheet)
+
+    # Submit BIJ task
+    if row.bij.BIJ_CHECK == 1:
+        logger.debug("Submitting BIJ task...")
+        if hostdata is None:
+            hostdata = constants.get_bij_host_data()
+        bij_future = executor.submit(_process_bij, row.bij, gsheet, hostdata)
+
+    if row.dd.DD_CHECK == 1:
+        logger.debug("Submitting DD task...")
+        dd_future = executor.submit(_process_dd, row, gsheet)
+
+    if row.s1.SHEET_CHECK == 1:
+        logger.debug("Submitting SheetPrice1 task...")
+        s1_future = executor.submit(_process_price1_sheet, row)
+
+    if row.s2.SHEET_CHECK == 1:
+        logger.debug("Submitting SheetPrice2 task...")
+        s2_future = executor.submit(_process_price2_sheet, row)
+
+    if row.s3.SHEET_CHECK == 1:
+        logger.debug("Submitting SheetPrice3 task...")
+        s3_future = executor.submit(_process_price3_sheet, row)
+
+    if row.s4.SHEET_CHECK == 1:
+        logger.debug("Submitting SheetPrice4 task...")
+        s4_future = executor.submit(_process_price4_sheet, row)
+
+    if g2g_future:
+        try:
+            results['g2g'] = g2g_future.result()  # Lấy kết quả từ luồng G2G
+            logger.debug("G2G Result received: %s USD", results['g2g'])
+        except Exception as e:
+            logger.warning("G2G task failed with exception: %s", e)
             results['g2g'] = None
+    else:
+        results['g2g'] = None
 
-        if fun_future:
-            try:
-                results['fun'] = fun_future.result()  # Lấy kết quả từ luồng FUN
-                print(f"FUN Result received: {results['fun']} USD")
-            except Exception as e:
-                print(f"FUN task failed with exception: {e}")
-                results['fun'] = None
-        else:
+    if fun_future:
+        try:
+            results['fun'] = fun_future.result()  # Lấy kết quả từ luồng FUN
+            logger.debug("FUN Result received: %s USD", results['fun'])
+        except Exception as e:
+            logger.warning("FUN task failed with exception: %s", e)
             results['fun'] = None
+    else:
+        results['fun'] = None
 
-        if bij_future:
-            try:
-                results['bij'] = bij_future.result()  # Lấy kết quả từ luồng BIJ
-                print(f"BIJ Result received: {results['bij']} USD")
-            except Exception as e:
-                print(f"BIJ task failed with exception: {e}")
-                results['bij'] = None
-        else:
+    if bij_future:
+        try:
+            results['bij'] = bij_future.result()  # Lấy kết quả từ luồng BIJ
+            logger.debug("BIJ Result received: %s USD", results['bij'])
+        except Exception as e:
+            logger.warning("BIJ task failed with exception: %s", e)
             results['bij'] = None
+    else:
+        results['bij'] = None
 
-        if dd_future:
-            try:
-                results['dd'] = dd_future.result()  # Lấy kết quả từ luồng DD
-                print(f"DD Result received: {results['dd']} USD")
-            except Exception as e:
-                print(f"DD task failed with exception: {e}")
-                results['dd'] = None
+    if dd_future:
+        try:
+            results['dd'] = dd_future.result()  # Lấy kết quả từ luồng DD
+            logger.debug("DD Result received: %s USD", results['dd'])
+        except Exception as e:
+            logger.warning("DD task failed with exception: %s", e)
+            results['dd'] = None
 
-        if s1_future:
-            try:
-                results['s1'] = s1_future.result()
-                print(f"S1 Result received: {results['s1']} USD")
-            except Exception as e:
-                print(f"S1 task failed with exception: {e}")
-                results['s1'] = None
+    if s1_future:
+        try:
+            results['s1'] = s1_future.result()
+            logger.debug("S1 Result received: %s USD", results['s1'])
+        except Exception as e:
+            logger.warning("S1 task failed with exception: %s", e)
+            results['s1'] = None
 
-        if s2_future:
-            try:
-                results['s2'] = s2_future.result()
-                print(f"S2 Result received: {results['s2']} USD")
-            except Exception as e:
-                print(f"S2 task failed with exception: {e}")
-                results['s2'] = None
+    if s2_future:
+        try:
+            results['s2'] = s2_future.result()
+            logger.debug("S2 Result received: %s USD", results['s2'])
+        except Exception as e:
+            logger.warning("S2 task failed with exception: %s", e)
+            results['s2'] = None
 
-        if s3_future:
-            try:
-                results['s3'] = s3_future.result()
-                print(f"S3 Result received: {results['s3']} USD")
-            except Exception as e:
-                print(f"S3 task failed with exception: {e}")
-                results['s3'] = None
+    if s3_future:
+        try:
+            results['s3'] = s3_future.result()
+            logger.debug("S3 Result received: %s USD", results['s3'])
+        except Exception as e:
+            logger.warning("S3 task failed with exception: %s", e)
+            results['s3'] = None
 
-        if s4_future:
-            try:
-                results['s4'] = s4_future.result()
-                print(f"S4 Result received: {results['s4']} USD")
-            except Exception as e:
-                print(f"S4 task failed with exception: {e}")
-                results['s4'] = None
+    if s4_future:
+        try:
+            results['s4'] = s4_future.result()
+            logger.debug("S4 Result received: %s USD", results['s4'])
+        except Exception as e:
+            logger.warning("S4 task failed with exception: %s", e)
+            results['s4'] = None
 
     g2g_min_price_usd = results.get('g2g')
     fun_min_price_usd = results.get('fun')
@@ -499,16 +529,9 @@ def calculate_price_stock_fake(
     s3_min_price_usd = results.get('s3')
     s4_min_price_usd = results.get('s4')
     # convert all this price if not None from usd to idr
-    try:
-        RATE_SHEET_ID = os.getenv("RATE_SHEET_ID")
-        RATE_SHEET_NAME = os.getenv("RATE_SHEET_NAME")
-        CELL_RATE_USD = os.getenv("CELL_RATE_USD")
-        rate_sheet = StockManager(RATE_SHEET_ID)
-        rate = rate_sheet.get_cell_float_value(f"'{RATE_SHEET_NAME}'!{CELL_RATE_USD}")
-    except Exception:
-        print("Error fetching exchange rate from Google Sheet, using default rate 16326.")
-        rate = 16326
-    print(f"Exchange rate used: {rate} IDR/USD")
+    if rate is None:
+        rate = get_usd_idr_rate()
+    logger.info("Exchange rate used: %s IDR/USD", rate)
     g2g_min_price = convert_usd_to_idr(g2g_min_price_usd, rate)
     fun_min_price = convert_usd_to_idr(fun_min_price_usd, rate)
     bij_min_price = convert_usd_to_idr(bij_min_price_usd, rate)
@@ -529,11 +552,11 @@ def calculate_price_stock_fake(
     valid_prices = [p for p in all_prices if p is not None and p[0] > 0]
 
     if not valid_prices:
-        print("No valid prices found from any source.")
+        logger.info("No valid prices found from any source.")
         final_min_price = None
     else:
         final_min_price = min(valid_prices, key=lambda x: x[0])
-        print(f"Overall minimum price: {final_min_price}")
+        logger.info("Overall minimum price: %s", final_min_price)
 
     return final_min_price, valid_prices
 
@@ -632,7 +655,8 @@ def _get_models_from_row(
     try:
         # `batch_get` trả về một danh sách các ma trận giá trị.
         # Ví dụ: [['A1_val']], [['B1_val']], [[]] (cho ô trống)
-        query_results = worksheet.batch_get(all_ranges)
+        with host_limiter.limit("sheets"):
+            query_results = worksheet.batch_get(all_ranges)
     except Exception as e:
         raise ValueError(f"Lỗi khi thực hiện batch_get từ Google Sheet: {e}")
 
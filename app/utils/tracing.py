@@ -0,0 +1,242 @@
+import logging
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from app.utils.paths import SRC_PATH
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    row: int | None
+    started_at: float
+    duration: float = 0.0
+    status: str = "ok"
+    attrs: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "row": self.row,
+            "ts": round(self.started_at, 3),
+            "duration": round(self.duration, 4),
+            "status": self.status,
+            **self.attrs,
+        }
+
+
+def current_row() -> int | None:
+    """Row of the innermost open span in this context."""
+    span = _current_span.get()
+    return span.row if span is not None else None
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in a copy of the submitter's context, so spans keep their parent."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+_shared_executors: dict[str, ContextThreadPoolExecutor] = {}
+_shared_executors_lock = threading.Lock()
+
+
+def shared_executor(
+    name: str,
+    max_workers: int,
+) -> ContextThreadPoolExecutor:
+    """
+    Process-wide pool reused by every row. Its threads outlive the row, so
+    the per-thread ``host_limiter`` sessions keep their connections open.
+    Tasks must not wait on other tasks of the same pool.
+    """
+    with _shared_executors_lock:
+        executor = _shared_executors.get(name)
+        if executor is None:
+            executor = _shared_executors[name] = ContextThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix=name,
+            )
+        return executor
+
+
+class Tracer:
+    """
+    Nested timing spans per row. The current span lives in a contextvar, so
+    children opened in a ``ContextThreadPoolExecutor`` are attached to the
+    stage that submitted them.
+
+    Finished spans are appended to a JSON-lines file on ``flush`` and kept
+    for the end-of-round ``round_report``. The file is rolled over like the
+    log once it would grow past ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        path: str | None,
+        enabled: bool = True,
+        max_round_spans: int = 200000,
+        max_bytes: int = 20 * 1024 * 1024,
+        backup_count: int = 5,
+    ) -> None:
+        self.path = path
+        self.enabled = enabled
+        self.max_round_spans = max_round_spans
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._unexported: list[Span] = []
+        self._round: list[Span] = []
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        row: int | None = None,
+        **attrs,
+    ) -> Iterator[Span | None]:
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex[:16],
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            row=row if row is not None else (parent.row if parent else None),
+            started_at=time.time(),
+            attrs={"thread": threading.current_thread().name, **attrs},
+        )
+        token = _current_span.set(span)
+        started_at = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attrs["error"] = repr(e)[:200]
+            raise
+        finally:
+            span.duration = time.perf_counter() - started_at
+            _current_span.reset(token)
+            with self._lock:
+                if self.path:
+                    self._unexported.append(span)
+                if len(self._round) < self.max_round_spans:
+                    self._round.append(span)
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._unexported = self._unexported, []
+        if not spans or not self.path:
+            return
+        data = "".join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n" for span in spans)
+        try:
+            with self._export_lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                if self._should_rollover(len(data.encode("utf-8"))):
+                    self._rollover()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(data)
+        except OSError as e:
+            logger.warning("Trace export failed: %s", e)
+
+    def _should_rollover(
+        self,
+        size: int,
+    ) -> bool:
+        if self.max_bytes <= 0:
+            return False
+        try:
+            return os.path.getsize(self.path) + size > self.max_bytes
+        except FileNotFoundError:
+            return False
+
+    def _rollover(self) -> None:
+        # Same names as RotatingFileHandler: traces.jsonl.1 is the newest backup
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def round_report(
+        self,
+        top_n: int = 5,
+    ) -> str:
+        """Slowest rows (with their slowest stage) and slowest stages of the round, then reset."""
+        with self._lock:
+            spans, self._round = self._round, []
+        if not spans:
+            return ""
+
+        # Leaf spans (external calls, decisions) are what actually took the time
+        parents = {span.parent_id for span in spans if span.parent_id is not None}
+        leaves: dict[str, list[Span]] = {}
+        for span in spans:
+            if span.parent_id is not None and span.span_id not in parents:
+                leaves.setdefault(span.trace_id, []).append(span)
+
+        rows: dict[int, list[Span]] = {}
+        stages: dict[str, list[float]] = {}
+        for span in spans:
+            if span.parent_id is None and span.row is not None:
+                rows.setdefault(span.row, []).append(span)
+            elif span.parent_id is not None:
+                stages.setdefault(span.name, []).append(span.duration)
+
+        lines = [f"SLOWEST ROWS (top {top_n}):"]
+        ranked_rows = sorted(rows.items(), key=lambda item: -sum(s.duration for s in item[1]))
+        for row, roots in ranked_rows[:top_n]:
+            total = sum(root.duration for root in roots)
+            row_stages = [leaf for root in roots for leaf in leaves.get(root.trace_id, [])]
+            slowest = max(row_stages, key=lambda s: s.duration, default=None)
+            detail = f", slowest stage {slowest.name} {slowest.duration:.1f}s" if slowest else ""
+            errors = sum(1 for root in roots if root.status == "error")
+            lines.append(f"  row {row}: {total:.1f}s{detail}" + (f", {errors} failed" if errors else ""))
+
+        lines.append(f"SLOWEST STAGES (top {top_n} by total time):")
+        ranked_stages = sorted(stages.items(), key=lambda item: -sum(item[1]))
+        for name, durations in ranked_stages[:top_n]:
+            lines.append(
+                f"  {name}: total {sum(durations):.1f}s, {len(durations)} calls, "
+                f"avg {sum(durations) / len(durations):.2f}s, max {max(durations):.1f}s"
+            )
+        return "\n".join(lines)
+
+    @staticmethod
+    def from_env() -> "Tracer":
+        return Tracer(
+            path=os.getenv("TRACE_FILE", str(SRC_PATH.joinpath("logs", "traces.jsonl"))) or None,
+            enabled=os.getenv("TRACING", "1") == "1",
+            # TRACE_MAX_MB and TRACE_BACKUP_COUNT default to the log's limits
+            max_bytes=int(float(os.getenv("TRACE_MAX_MB") or os.getenv("LOG_MAX_MB", "20")) * 1024 * 1024),
+            backup_count=int(os.getenv("TRACE_BACKUP_COUNT") or os.getenv("LOG_BACKUP_COUNT", "5")),
+        )
+
+
+tracer = Tracer.from_env()
@@ -50,6 +50,13 @@ def update_with_comparing_seller_message(
     return note_message, _last_update_message
 
 
+def push_failed_message(
+    attempts: int,
+    error: str | None,
+) -> str:
+    return f"Cập nhật giá thất bại sau {attempts} lần thử: {error}\n"
+
+
 # def no_need_update_message(
 #     my_seller: str,
 #     price: float,
@@ -0,0 +1,51 @@
+"""
+Cold vs warm UC Chrome startup with the persistent profile.
+
+Launches the browser twice on a fresh profile directory. The first launch
+starts from an empty profile and the second one reuses its cookies and
+cache. Both are timed until #__NEXT_DATA__ of the first page is available.
+
+    python -m benchmarks.bench_browser_startup [--url URL] [--runs 2]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from seleniumbase import SB
+
+from app.processes.crwl import navigate_fast
+from app.utils.browser_profile import browser_options
+
+
+def launch_and_load(
+    profile_dir: str,
+    url: str,
+) -> tuple[float, float]:
+    started_at = time.perf_counter()
+    with SB(**browser_options(profile_dir=profile_dir)) as sb:
+        sb.activate_cdp_mode("https://www.itemku.com/")
+        launched_at = time.perf_counter()
+        navigate_fast(sb, url, timeout=30)
+        loaded_at = time.perf_counter()
+    return launched_at - started_at, loaded_at - started_at
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="https://itemku.com/g/growtopia/lock?page=1&sort=1")
+    parser.add_argument("--runs", type=int, default=2)
+    args = parser.parse_args()
+
+    profile_dir = tempfile.mkdtemp(prefix="itemku_profile_")
+    try:
+        for run in range(args.runs):
+            label = "cold" if run == 0 else "warm"
+            launched, loaded = launch_and_load(profile_dir, args.url)
+            print(f"{label}: browser ready {launched:.2f}s, first page {loaded:.2f}s")
+    finally:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
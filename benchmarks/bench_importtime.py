@@ -0,0 +1,103 @@
+"""
+Cold import time of the entry modules, measured with ``python -X importtime``
+in fresh interpreters so nothing is cached in ``sys.modules``.
+
+    python -m benchmarks.bench_importtime [--module app.main_process]
+        [--runs 5] [--top 15] [--target-ms 1500]
+
+Prints the best run per module and the slowest imports of that run (by
+self time and by cumulative time of the top-level imports). With
+``--target-ms`` it exits non-zero when a module takes longer to import, so
+cold start can be kept in check for quick restarts and CLI tools.
+
+Importing must not touch the network: the spreadsheet, Sheets API client,
+browser and BIJ host data are all initialized on first use.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = ["constants", "app.utils.gsheet", "app.main_process", "main"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    total_us: int = 0
+    # (self_us, cumulative_us, depth, name) in import order
+    entries: list[tuple[int, int, int, str]] = field(default_factory=list)
+
+
+def profile_import(
+    module: str,
+) -> ImportProfile:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    profile = ImportProfile(module)
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us = int(match.group(1)), int(match.group(2))
+        depth = (len(match.group(3)) - 1) // 2
+        profile.entries.append((self_us, cumulative_us, depth, match.group(4)))
+        profile.total_us += self_us
+    return profile
+
+
+def report(
+    profile: ImportProfile,
+    top_n: int,
+) -> None:
+    print(f"{profile.module}: {profile.total_us / 1000:.1f} ms, {len(profile.entries)} modules")
+    print(f"  TOP {top_n} BY SELF TIME:")
+    for self_us, _, _, name in sorted(profile.entries, reverse=True)[:top_n]:
+        print(f"    {self_us / 1000:8.1f} ms  {name}")
+
+    # Depth 1 is what the module imports itself, each charged with what it pulled in first
+    direct = [(cumulative_us, name) for _, cumulative_us, depth, name in profile.entries if depth == 1]
+    print(f"  TOP {top_n} DIRECT IMPORTS BY CUMULATIVE TIME:")
+    for cumulative_us, name in sorted(direct, reverse=True)[:top_n]:
+        print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", action="append", help="Module to import, repeatable")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module, the best run is kept")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target-ms", type=float, default=None, help="Fail when an import takes longer")
+    args = parser.parse_args()
+
+    over_target = []
+    for module in args.module or DEFAULT_MODULES:
+        profiles = [profile_import(module) for _ in range(args.runs)]
+        best = min(profiles, key=lambda profile: profile.total_us)
+        report(best, args.top)
+        print()
+        if args.target_ms is not None and best.total_us / 1000 > args.target_ms:
+            over_target.append(f"{module} {best.total_us / 1000:.1f} ms")
+
+    if over_target:
+        print(f"Over the {args.target_ms:.0f} ms target: {', '.join(over_target)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Micro-benchmark for the itemku JWT signing path.
+
+    python -m benchmarks.bench_jwt_signer [--number 20000] [--batch 100]
+"""
+import argparse
+import os
+import timeit
+
+os.environ.setdefault("ITEMKU_API_KEY", "bench-api-key")
+os.environ.setdefault("ITEMKU_SECRET_KEY", "bench-secret-key")
+
+from app.processes.itemku_api import JwtSigner, generate_jwt_token  # noqa: E402
+
+NONCE = "1760000000"
+PAYLOAD = {"product_id": 3210076, "new_price": 8300}
+
+
+def report(
+    name: str,
+    seconds: float,
+    number: int,
+) -> None:
+    per_call_us = seconds / number * 1e6
+    print(f"{name:<28} {per_call_us:8.2f} us/token  {number / seconds:10.0f} tokens/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    signer = JwtSigner.from_env()
+    assert signer.sign(NONCE, PAYLOAD) == generate_jwt_token(NONCE, PAYLOAD)
+
+    seconds = timeit.timeit(lambda: generate_jwt_token(NONCE, PAYLOAD), number=args.number)
+    report("generate_jwt_token", seconds, args.number)
+
+    seconds = timeit.timeit(lambda: signer.sign(NONCE, PAYLOAD), number=args.number)
+    report("JwtSigner.sign", seconds, args.number)
+
+    payloads = [{"product_id": i, "new_price": 8300 + i} for i in range(args.batch)]
+    rounds = max(args.number // args.batch, 1)
+    seconds = timeit.timeit(lambda: signer.sign_batch(NONCE, payloads), number=rounds)
+    report(f"JwtSigner.sign_batch({args.batch})", seconds, rounds * args.batch)
+
+
+if __name__ == "__main__":
+    main()
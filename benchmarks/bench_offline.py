@@ -0,0 +1,250 @@
+"""
+Offline benchmarks for every parser and decision path, run against the
+recorded fixtures in ``benchmarks/fixtures`` (see ``record_fixtures``).
+No browser, network or sheet access is needed.
+
+    python -m benchmarks.bench_offline [--number 20] [--filter g2g]
+        [--save-baseline] [--compare] [--threshold 20]
+
+``--save-baseline`` stores the timings in ``benchmarks/baseline.json``;
+``--compare`` prints the change against it and exits non-zero when any
+benchmark got slower than ``--threshold`` percent.
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable
+
+from bs4 import BeautifulSoup
+from gspread.worksheet import Worksheet
+
+from app.models.crwl_api_models import CrwlAPIRes
+from app.models.gsheet_model import DD, FUN, G2G, Product
+from app.processes.crwl import (
+    extract_next_data,
+    find_game_id,
+    find_item_info_group_id,
+    find_item_info_id,
+    find_item_type_id,
+    find_keyword,
+    find_server_id,
+)
+from app.processes.pricing import decide_price
+from app.utils.biji_extract import ShopDemandResponse, get_the_lowest_price
+from app.utils.dd_utils import FilterParams, _filter_valid_offer_item, parse_dd373_listings
+from app.utils.fun_extract import FUNOfferItem, fun_offer_items_from_soup
+from app.utils.g2g_extract import G2GOfferItem, extract_offer_items_from_response
+from app.utils.stock_fake import get_row
+from benchmarks.record_fixtures import (
+    BIJ_SHOP_DEMAND,
+    DD_LISTINGS,
+    FIXTURES_DIR,
+    FUN_LOTS,
+    G2G_OFFERS,
+    ITEMKU_HTML,
+    ITEMKU_PRODUCTS,
+    SELLERS,
+    SHEET_ROW,
+)
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+BLACKLIST = SELLERS[:5]
+
+
+class FixtureWorksheet(Worksheet):
+    """A worksheet whose ``batch_get`` answers from a recorded payload."""
+
+    def __init__(
+        self,
+        payload: list,
+    ) -> None:
+        self.payload = payload
+
+    def batch_get(self, ranges, **kwargs):
+        return self.payload
+
+
+def load(
+    name: str,
+) -> str:
+    path = FIXTURES_DIR / name
+    if not path.exists():
+        sys.exit(f"{path} is missing, run: python -m benchmarks.record_fixtures")
+    return path.read_text(encoding="utf-8")
+
+
+def itemku_cases() -> dict[str, Callable]:
+    html = load(ITEMKU_HTML)
+    products_json = load(ITEMKU_PRODUCTS)
+    offers = CrwlAPIRes.model_validate_json(products_json).data.data
+    product = Product.model_construct(
+        index=5,
+        DONGIAGIAM_MIN=100,
+        DONGIAGIAM_MAX=500,
+        INCLUDE_KEYWORD="crystal",
+        EXCLUDE_KEYWORD="welkin",
+    )
+
+    def parse_next_data():
+        next_data = extract_next_data(BeautifulSoup(html, "html.parser"))
+        return (
+            find_game_id(next_data),
+            find_item_type_id(next_data),
+            find_item_info_id(next_data),
+            find_server_id(next_data),
+            find_item_info_group_id(next_data),
+            find_keyword(next_data),
+        )
+
+    def decide():
+        return decide_price(
+            product=product,
+            offers=offers,
+            min_price=8000,
+            max_price=30000,
+            blacklist=BLACKLIST,
+            order_site_min_price=(12000, "order_seller", "g2g"),
+            rng=random.Random(0),
+        )
+
+    return {
+        "itemku.parse_next_data": parse_next_data,
+        "itemku.parse_products": lambda: CrwlAPIRes.model_validate_json(products_json),
+        "itemku.decide_price": decide,
+    }
+
+
+def g2g_cases() -> dict[str, Callable]:
+    response = json.loads(load(G2G_OFFERS))
+    items = extract_offer_items_from_response(response)
+    g2g = G2G.model_construct(index=5, G2G_DELIVERY_TIME=24, G2G_STOCK=100, G2G_MINUNIT=10)
+
+    def filter_min():
+        valid = G2GOfferItem.filter_valid_g2g_offer_item(g2g, items, BLACKLIST)
+        return G2GOfferItem.min_offer_item(valid)
+
+    return {
+        "g2g.parse": lambda: extract_offer_items_from_response(response),
+        "g2g.filter_min": filter_min,
+    }
+
+
+def fun_cases() -> dict[str, Callable]:
+    html = load(FUN_LOTS)
+    filters = ["f-method_trade", "desc_raccoon"]
+    items = fun_offer_items_from_soup(BeautifulSoup(html, "html.parser"), filters)
+    fun = FUN.model_construct(index=5, FUN_STOCK=100)
+
+    def filter_min():
+        valid = FUNOfferItem.filter_valid_fun_offer_items(fun, items, BLACKLIST)
+        return FUNOfferItem.min_offer_item(valid)
+
+    return {
+        "fun.parse": lambda: fun_offer_items_from_soup(BeautifulSoup(html, "html.parser"), filters),
+        "fun.filter_min": filter_min,
+    }
+
+
+def dd373_cases() -> dict[str, Callable]:
+    html = load(DD_LISTINGS)
+    listings = parse_dd373_listings(html)
+    dd = DD.model_construct(index=5, DD_STOCKMIN=30000, DD_LEVELMIN=3)
+    filter_params = FilterParams()
+    filter_params.stock_min = dd.DD_STOCKMIN
+    filter_params.level_min = dd.DD_LEVELMIN
+
+    return {
+        "dd373.parse": lambda: parse_dd373_listings(html),
+        "dd373.filter": lambda: _filter_valid_offer_item(listings, filter_params),
+    }
+
+
+def bijiaqi_cases() -> dict[str, Callable]:
+    text = load(BIJ_SHOP_DEMAND)
+    items = ShopDemandResponse.model_validate_json(text).list
+
+    return {
+        "bijiaqi.parse": lambda: ShopDemandResponse.model_validate_json(text),
+        "bijiaqi.lowest_price": lambda: get_the_lowest_price(items, "邮寄", 100, 100000, BLACKLIST),
+    }
+
+
+def sheets_cases() -> dict[str, Callable]:
+    worksheet = FixtureWorksheet(json.loads(load(SHEET_ROW)))
+
+    return {
+        "sheets.get_row": lambda: get_row(worksheet, 5),
+    }
+
+
+def run(
+    cases: dict[str, Callable],
+    number: int,
+    repeat: int,
+) -> dict[str, float]:
+    """Best-of-``repeat`` microseconds per call for each case."""
+    results = {}
+    for name, case in cases.items():
+        case()
+        seconds = min(timeit.repeat(case, number=number, repeat=repeat))
+        results[name] = seconds / number * 1e6
+    return results
+
+
+def compare(
+    results: dict[str, float],
+    threshold: float,
+) -> bool:
+    if not BASELINE_PATH.exists():
+        sys.exit(f"{BASELINE_PATH} is missing, run with --save-baseline first")
+    baseline = json.loads(BASELINE_PATH.read_text())
+
+    regressed = False
+    print(f"\n{'benchmark':<26} {'baseline':>12} {'now':>12} {'change':>8}")
+    for name, us in results.items():
+        if name not in baseline:
+            print(f"{name:<26} {'-':>12} {us:10.1f}us {'new':>8}")
+            continue
+        change = (us - baseline[name]) / baseline[name] * 100
+        flag = ""
+        if change > threshold:
+            regressed = True
+            flag = "  REGRESSION"
+        print(f"{name:<26} {baseline[name]:10.1f}us {us:10.1f}us {change:+7.1f}%{flag}")
+    return not regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Allowed slowdown in percent")
+    args = parser.parse_args()
+
+    cases: dict[str, Callable] = {}
+    for build in (itemku_cases, g2g_cases, fun_cases, dd373_cases, bijiaqi_cases, sheets_cases):
+        cases.update(build())
+    cases = {name: case for name, case in cases.items() if args.filter in name}
+
+    results = run(cases, args.number, args.repeat)
+    for name, us in results.items():
+        print(f"{name:<26} {us:10.1f} us/call  {1e6 / us:10.0f} calls/s")
+
+    if args.save_baseline:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        baseline.update({name: round(us, 2) for name, us in results.items()})
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {BASELINE_PATH}")
+
+    if args.compare and not compare(results, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
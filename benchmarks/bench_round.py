@@ -0,0 +1,78 @@
+"""
+End-to-end round against the local stand-ins of ``fake_services``: starts
+the fakes in-process, runs ``main.py <mode>`` in the generated work
+directory and reports the wall time and the requests each service saw.
+
+    python -m benchmarks.bench_round [--rows 20] [--mode dry-run]
+        [--workers 1] [--latency 0.2] [--set g2g.latency=1.5]
+
+``--mode dry-run`` (default) decides every row without pushing, ``once``
+runs a full round including the pushes and Note writes to the fake sheet.
+A browser is still launched, pointed at the fake itemku pages.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.fake_services import (
+    SERVICES,
+    SRC_DIR,
+    FakeServices,
+    ServiceProfile,
+    parse_overrides,
+    write_workdir,
+)
+from benchmarks.synthetic_sheet import SPREADSHEET_ID, build_sheets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--mode", choices=("dry-run", "once"), default="dry-run")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--offers", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--set", action="append", default=[], help="Per service, e.g. g2g.latency=1.5")
+    parser.add_argument("--workdir", default=str(SRC_DIR / "storage" / "loadtest"))
+    args = parser.parse_args()
+
+    profiles = {
+        service: ServiceProfile(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+        for service in SERVICES
+    }
+    profiles["oauth"] = ServiceProfile()
+    parse_overrides(args.set, profiles)
+
+    base_url = f"http://{args.host}:{args.port}"
+    services = FakeServices(profiles, offers=args.offers, seed=args.seed)
+    services.sheets.load(SPREADSHEET_ID, build_sheets(args.rows, base_url, seed=args.seed))
+    services.serve(args.host, args.port)
+    workdir = Path(args.workdir)
+    write_workdir(workdir, base_url)
+
+    command = [sys.executable, str(SRC_DIR / "main.py"), args.mode, "--workers", str(args.workers)]
+    started_at = time.perf_counter()
+    try:
+        result = subprocess.run(command, cwd=workdir, env={**os.environ, "PYTHONPATH": str(SRC_DIR)})
+    finally:
+        elapsed = time.perf_counter() - started_at
+        services.shutdown()
+
+    print(f"{args.mode}: {args.rows} rows in {elapsed:.1f}s ({args.rows / elapsed * 60:.1f} rows/min), "
+          f"exit code {result.returncode}")
+    print(json.dumps(services.snapshot(), indent=2))
+    if result.returncode != 0:
+        sys.exit(result.returncode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+"""
+Local stand-ins for every external service the loop talks to, for
+end-to-end load tests without touching itemku, G2G, FunPay, DD373,
+bijiaqi or Google:
+
+    python -m benchmarks.fake_services --rows 100 [--port 8765]
+        [--latency 0.2] [--jitter 0.05] [--error-rate 0.01]
+        [--set g2g.latency=1.5 --set sheets.error_rate=0.05]
+        [--offers 200] [--workdir storage/loadtest]
+
+It serves a synthetic ``--rows`` row sheet (see ``synthetic_sheet``) and
+writes a ``setting.env``, a throwaway service-account key and bijiaqi host
+data into ``--workdir``. Run ``main.py`` from that directory to do a round
+against the fakes. Request counts per service are printed on exit and
+served on ``/__stats``.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+from urllib.parse import parse_qs, unquote, urlparse
+
+from benchmarks.record_fixtures import (
+    bijiaqi_shop_demand,
+    dd373_listings,
+    funpay_lots,
+    g2g_offers,
+    itemku_next_data,
+    itemku_products,
+)
+from benchmarks.synthetic_sheet import SPREADSHEET_ID, build_sheets, sheet_env
+
+SRC_DIR = Path(__file__).parent.parent
+
+SERVICES = ("itemku_web", "itemku", "tokoku", "g2g", "funpay", "dd373", "bijiaqi", "oauth", "sheets")
+
+
+@dataclass
+class ServiceProfile:
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+
+    def delay(
+        self,
+        rng: random.Random,
+    ) -> float:
+        return max(0.0, rng.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+
+
+def _column_number(
+    letters: str,
+) -> int:
+    number = 0
+    for letter in letters.upper():
+        number = number * 26 + ord(letter) - ord("A") + 1
+    return number
+
+
+def _column_letters(
+    number: int,
+) -> str:
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+_CELL = re.compile(r"^([A-Za-z]*)(\d*)$")
+
+
+class FakeSheets:
+    """In-memory spreadsheets answering the Sheets v4 values API."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._spreadsheets: dict[str, dict[str, dict[tuple[int, int], str]]] = {}
+
+    def load(
+        self,
+        spreadsheet_id: str,
+        sheets: dict[str, dict[tuple[int, int], str]],
+    ) -> None:
+        with self._lock:
+            self._spreadsheets[spreadsheet_id] = {title: dict(cells) for title, cells in sheets.items()}
+
+    def metadata(
+        self,
+        spreadsheet_id: str,
+    ) -> dict | None:
+        with self._lock:
+            sheets = self._spreadsheets.get(spreadsheet_id)
+            if sheets is None:
+                return None
+            return {
+                "spreadsheetId": spreadsheet_id,
+                "properties": {"title": spreadsheet_id, "locale": "en_US", "timeZone": "Asia/Jakarta"},
+                "sheets": [
+                    {
+                        "properties": {
+                            "sheetId": index,
+                            "title": title,
+                            "index": index,
+                            "sheetType": "GRID",
+                            "gridProperties": {
+                                "rowCount": max([row for row, _ in cells] + [1000]),
+                                "columnCount": max([col for _, col in cells] + [26]),
+                            },
+                        },
+                    }
+                    for index, (title, cells) in enumerate(sheets.items())
+                ],
+            }
+
+    def _resolve(
+        self,
+        spreadsheet_id: str,
+        a1: str,
+    ) -> tuple[str, dict[tuple[int, int], str], int, int, int, int]:
+        sheets = self._spreadsheets[spreadsheet_id]
+        if "!" in a1:
+            title, cells = a1.rsplit("!", 1)
+            title = title.strip("'").replace("''", "'")
+        elif a1.strip("'") in sheets:
+            title, cells = a1.strip("'"), ""
+        else:
+            title, cells = next(iter(sheets)), a1
+        data = sheets.setdefault(title, {})
+
+        max_row = max([row for row, _ in data] + [1])
+        max_col = max([col for _, col in data] + [1])
+        start, _, end = cells.partition(":")
+        start_col, start_row = _CELL.match(start).groups() if start else ("", "")
+        end_col, end_row = _CELL.match(end).groups() if end else (start_col, start_row) if start else ("", "")
+        return (
+            title,
+            data,
+            int(start_row) if start_row else 1,
+            _column_number(start_col) if start_col else 1,
+            int(end_row) if end_row else max_row,
+            _column_number(end_col) if end_col else max_col,
+        )
+
+    def get(
+        self,
+        spreadsheet_id: str,
+        a1: str,
+        major_dimension: str = "ROWS",
+    ) -> dict:
+        with self._lock:
+            title, data, row1, col1, row2, col2 = self._resolve(spreadsheet_id, a1)
+            if major_dimension == "COLUMNS":
+                matrix = [[data.get((row, col), "") for row in range(row1, row2 + 1)] for col in range(col1, col2 + 1)]
+            else:
+                matrix = [[data.get((row, col), "") for col in range(col1, col2 + 1)] for row in range(row1, row2 + 1)]
+
+        # Like the real API, trailing empty cells and rows are left out
+        for line in matrix:
+            while line and line[-1] == "":
+                line.pop()
+        while matrix and not matrix[-1]:
+            matrix.pop()
+
+        value_range = {
+            "range": f"'{title}'!{_column_letters(col1)}{row1}:{_column_letters(col2)}{row2}",
+            "majorDimension": major_dimension,
+        }
+        if matrix:
+            value_range["values"] = matrix
+        return value_range
+
+    def update(
+        self,
+        spreadsheet_id: str,
+        a1: str,
+        values: list[list],
+    ) -> int:
+        with self._lock:
+            _, data, row1, col1, _, _ = self._resolve(spreadsheet_id, a1)
+            updated = 0
+            for row_offset, line in enumerate(values):
+                for col_offset, value in enumerate(line):
+                    data[(row1 + row_offset, col1 + col_offset)] = "" if value is None else str(value)
+                    updated += 1
+            return updated
+
+
+class FakeServices:
+    def __init__(
+        self,
+        profiles: dict[str, ServiceProfile],
+        offers: int = 200,
+        seed: int = 42,
+    ) -> None:
+        self.profiles = profiles
+        self.offers = offers
+        self.seed = seed
+        self.sheets = FakeSheets()
+        self.stats: Counter = Counter()
+        self._stats_lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._routes: list[tuple[str, re.Pattern, str, Callable]] = [
+            ("GET", re.compile(r"^/itemku/"), "itemku_web", self._itemku_page),
+            ("GET", re.compile(r"^/v1/product$"), "itemku", self._itemku_products),
+            ("GET", re.compile(r"^/v1/foreign-exchange/rate$"), "itemku", self._exchange_rate),
+            ("GET", re.compile(r"^/v1/expansion-country$"), "itemku", lambda *_: (200, {"data": [{"code": "ID"}]})),
+            ("POST", re.compile(r"^/api/product/price/update$"), "tokoku", self._tokoku_update),
+            ("GET", re.compile(r"^/offer/search$"), "g2g", self._g2g_search),
+            ("GET", re.compile(r"^/funpay/"), "funpay", self._funpay_page),
+            ("GET", re.compile(r"^/dd373/"), "dd373", self._dd373_page),
+            ("POST", re.compile(r"^/api/v1/any/shop/home/games$"), "bijiaqi", self._bijiaqi_games),
+            ("POST", re.compile(r"^/api/v1/any/shop/home/servers$"), "bijiaqi", self._bijiaqi_servers),
+            ("POST", re.compile(r"^/api/shop/demand/listShopDemand$"), "bijiaqi", self._bijiaqi_demand),
+            ("POST", re.compile(r"^/token$"), "oauth", self._oauth_token),
+            ("GET", re.compile(r"^/v4/spreadsheets/([^/]+)/values:batchGet$"), "sheets", self._sheets_batch_get),
+            ("POST", re.compile(r"^/v4/spreadsheets/([^/]+)/values:batchUpdate$"), "sheets", self._sheets_batch_update),
+            ("GET", re.compile(r"^/v4/spreadsheets/([^/]+)/values/(.+)$"), "sheets", self._sheets_values_get),
+            ("PUT", re.compile(r"^/v4/spreadsheets/([^/]+)/values/(.+)$"), "sheets", self._sheets_values_update),
+            ("GET", re.compile(r"^/v4/spreadsheets/([^/:]+)$"), "sheets", self._sheets_metadata),
+            ("GET", re.compile(r"^/__stats$"), "stats", lambda *_: (200, self.snapshot())),
+        ]
+
+    def _data_rng(
+        self,
+        path: str,
+    ) -> random.Random:
+        # Same page, same offers; --seed changes them all
+        return random.Random(f"{self.seed}:{path}")
+
+    # --- itemku / tokoku ---
+
+    def _itemku_page(self, path, query, body, match):
+        return 200, itemku_next_data(self._data_rng(path)), "text/html; charset=utf-8"
+
+    def _itemku_products(self, path, query, body, match):
+        return 200, itemku_products(self._data_rng(json.dumps(query, sort_keys=True)), self.offers)
+
+    def _exchange_rate(self, path, query, body, match):
+        return 200, {"data": [{"exchange_rate": 16250.0, "source_currency": "USD", "target_currency": "IDR"}]}
+
+    def _tokoku_update(self, path, query, body, match):
+        payload = json.loads(body or b"{}")
+        return 200, {"success": True, "data": payload, "message": "OK", "statusCode": "SUCCESS"}
+
+    # --- competitors ---
+
+    def _g2g_search(self, path, query, body, match):
+        return 200, g2g_offers(self._data_rng(json.dumps(query, sort_keys=True)), self.offers)
+
+    def _funpay_page(self, path, query, body, match):
+        return 200, funpay_lots(self._data_rng(path), self.offers), "text/html; charset=utf-8"
+
+    def _dd373_page(self, path, query, body, match):
+        return 200, dd373_listings(self._data_rng(path), self.offers), "text/html; charset=utf-8"
+
+    def _bijiaqi_games(self, path, query, body, match):
+        return 200, [{"id": 10, "name": "魔兽世界", "code": "wow"}]
+
+    def _bijiaqi_servers(self, path, query, body, match):
+        game_id = json.loads(body or b"{}").get("gameId", 10)
+        return 200, [{"id": i, "parentId": game_id, "name": f"Server {i} - Alliance", "type": "server"} for i in range(1, 51)]
+
+    def _bijiaqi_demand(self, path, query, body, match):
+        payload = json.loads(body or b"{}")
+        rng = self._data_rng(f"{payload.get('gameId')}:{payload.get('attrIdIndexes')}")
+        return 200, bijiaqi_shop_demand(rng, min(self.offers, int(payload.get("limit", 100))))
+
+    # --- Google ---
+
+    def _oauth_token(self, path, query, body, match):
+        return 200, {"access_token": f"fake-{uuid.uuid4().hex}", "expires_in": 3600, "token_type": "Bearer"}
+
+    def _sheets_metadata(self, path, query, body, match):
+        metadata = self.sheets.metadata(match.group(1))
+        if metadata is None:
+            return 404, {"error": {"code": 404, "message": "Requested entity was not found.", "status": "NOT_FOUND"}}
+        return 200, metadata
+
+    def _sheets_values_get(self, path, query, body, match):
+        major_dimension = query.get("majorDimension", ["ROWS"])[0]
+        return 200, self.sheets.get(match.group(1), unquote(match.group(2)), major_dimension)
+
+    def _sheets_batch_get(self, path, query, body, match):
+        major_dimension = query.get("majorDimension", ["ROWS"])[0]
+        return 200, {
+            "spreadsheetId": match.group(1),
+            "valueRanges": [self.sheets.get(match.group(1), a1, major_dimension) for a1 in query.get("ranges", [])],
+        }
+
+    def _sheets_batch_update(self, path, query, body, match):
+        payload = json.loads(body or b"{}")
+        updated = sum(self.sheets.update(match.group(1), item["range"], item["values"]) for item in payload.get("data", []))
+        return 200, {"spreadsheetId": match.group(1), "totalUpdatedCells": updated}
+
+    def _sheets_values_update(self, path, query, body, match):
+        payload = json.loads(body or b"{}")
+        updated = self.sheets.update(match.group(1), unquote(match.group(2)), payload.get("values", []))
+        return 200, {"spreadsheetId": match.group(1), "updatedCells": updated}
+
+    # --- server ---
+
+    def handle(
+        self,
+        method: str,
+        raw_path: str,
+        body: bytes,
+    ) -> tuple[int, bytes, str]:
+        parsed = urlparse(raw_path)
+        query = parse_qs(parsed.query)
+        for route_method, pattern, service, handler in self._routes:
+            match = pattern.match(parsed.path)
+            if route_method != method or match is None:
+                continue
+
+            profile = self.profiles.get(service, ServiceProfile())
+            with self._rng_lock:
+                delay = profile.delay(self._rng)
+                failed = self._rng.random() < profile.error_rate
+            if delay:
+                time.sleep(delay)
+            with self._stats_lock:
+                self.stats[(service, "error" if failed else "ok")] += 1
+            if failed:
+                return 503, b'{"error": "injected failure"}', "application/json"
+
+            status, content, *content_type = handler(parsed.path, query, body, match)
+            if isinstance(content, str):
+                return status, content.encode("utf-8"), content_type[0] if content_type else "text/plain"
+            return status, json.dumps(content, ensure_ascii=False).encode("utf-8"), "application/json"
+
+        with self._stats_lock:
+            self.stats[("unknown", f"{method} {parsed.path}")] += 1
+        return 404, b'{"error": "no fake for this endpoint"}', "application/json"
+
+    def snapshot(self) -> dict:
+        with self._stats_lock:
+            return {f"{service}.{outcome}": count for (service, outcome), count in sorted(self.stats.items())}
+
+    def serve(
+        self,
+        host: str,
+        port: int,
+    ) -> None:
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload, content_type = services.handle(method, self.path, body)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def do_PUT(self):
+                self._respond("PUT")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fake-services", daemon=True).start()
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+def write_service_account_key(
+    path: Path,
+    token_uri: str,
+) -> None:
+    """A throwaway service-account key whose token endpoint is the fake ``/token``."""
+    import rsa
+
+    _, private_key = rsa.newkeys(2048)
+    path.write_text(json.dumps({
+        "type": "service_account",
+        "project_id": "loadtest",
+        "private_key_id": uuid.uuid4().hex,
+        "private_key": private_key.save_pkcs1().decode("ascii"),
+        "client_email": "loadtest@loadtest.iam.gserviceaccount.com",
+        "client_id": "1",
+        "auth_uri": token_uri,
+        "token_uri": token_uri,
+    }, indent=2))
+
+
+def write_workdir(
+    workdir: Path,
+    base_url: str,
+) -> dict[str, str]:
+    """Key, bijiaqi host data and setting.env for running main.py inside ``workdir``."""
+    workdir.mkdir(parents=True, exist_ok=True)
+    keys_path = workdir / "keys.json"
+    if not keys_path.exists():
+        write_service_account_key(keys_path, f"{base_url}/token")
+
+    # constants.BIJ_HOST_DATA is read from storage/output.json relative to the working directory
+    (workdir / "storage").mkdir(exist_ok=True)
+    (workdir / "storage" / "output.json").write_text(json.dumps([
+        {"gameid": "10", "hostid": str(i), "hostname": f"Server {i} - Alliance", "language": ""}
+        for i in range(1, 51)
+    ]))
+
+    env = {
+        "CRWL_API_BASE_URL": f"{base_url}/v1",
+        "ITEMKU_API_BASE_URL": f"{base_url}/api",
+        "G2G_API_URL": f"{base_url}/offer/search",
+        "BIJIAQI_BASE_URL": base_url,
+        "SHEETS_API_URL": base_url,
+        "BROWSER_HOME_URL": f"{base_url}/itemku/",
+        "KEYS_PATH": str(keys_path.resolve()),
+        "ITEMKU_API_KEY": "loadtest-api-key",
+        "ITEMKU_SECRET_KEY": "loadtest-secret-key",
+        "PRICE_HISTORY_DB": str((workdir / "price_history.db").resolve()),
+        "OFFER_ARCHIVE_DIR": str((workdir / "offer_archive").resolve()),
+        "ROUND_JOURNAL_DB": str((workdir / "round_journal.db").resolve()),
+        "TRACE_FILE": str((workdir / "traces.jsonl").resolve()),
+        **sheet_env(),
+    }
+    (workdir / "setting.env").write_text("".join(f"{key}={value}\n" for key, value in env.items()))
+    return env
+
+
+def parse_overrides(
+    overrides: list[str],
+    profiles: dict[str, ServiceProfile],
+) -> None:
+    for override in overrides:
+        key, _, value = override.partition("=")
+        service, _, attribute = key.partition(".")
+        if service not in profiles or attribute not in ("latency", "jitter", "error_rate"):
+            raise SystemExit(f"Bad --set {override!r}, expected <service>.<latency|jitter|error_rate>=<value>")
+        setattr(profiles[service], attribute, float(value))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake external services for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--offers", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--set", action="append", default=[], help="Per service, e.g. g2g.latency=1.5")
+    parser.add_argument("--workdir", default=str(SRC_DIR / "storage" / "loadtest"))
+    args = parser.parse_args()
+
+    profiles = {
+        service: ServiceProfile(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+        for service in SERVICES
+    }
+    # Token and sheet metadata calls happen once per client, keep them instant
+    profiles["oauth"] = ServiceProfile()
+    parse_overrides(args.set, profiles)
+
+    base_url = f"http://{args.host}:{args.port}"
+    services = FakeServices(profiles, offers=args.offers, seed=args.seed)
+    services.sheets.load(SPREADSHEET_ID, build_sheets(args.rows, base_url, seed=args.seed))
+    services.serve(args.host, args.port)
+
+    workdir = Path(args.workdir)
+    write_workdir(workdir, base_url)
+    print(f"Fake services on {base_url} with a {args.rows} row sheet")
+    print(f"Run a round with:  cd {workdir} && python {SRC_DIR / 'main.py'}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        services.shutdown()
+        print(json.dumps(services.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
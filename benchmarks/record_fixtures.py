@@ -0,0 +1,317 @@
+"""
+Writes the fixtures used by ``bench_offline`` into ``benchmarks/fixtures``.
+
+By default the fixtures are synthesized (deterministic, no network), shaped
+like the real responses each parser reads. Any source given a URL is
+recorded from the live site instead:
+
+    python -m benchmarks.record_fixtures [--offers 200]
+        [--g2g-url URL] [--fun-url URL] [--dd-url URL]
+        [--bij-game ID --bij-server ID]
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+ITEMKU_HTML = "itemku_next_data.html"
+ITEMKU_PRODUCTS = "itemku_products.json"
+G2G_OFFERS = "g2g_offers.json"
+FUN_LOTS = "funpay_lots.html"
+DD_LISTINGS = "dd373_listings.html"
+BIJ_SHOP_DEMAND = "bijiaqi_shop_demand.json"
+SHEET_ROW = "sheet_row.json"
+
+SERVERS = ["Asia", "Europe", "America", "TW, HK, MO"]
+SELLERS = [f"seller_{i:03d}" for i in range(60)]
+
+
+def itemku_next_data(
+    rng: random.Random,
+) -> str:
+    item_types = []
+    for type_id in range(1, 9):
+        item_types.append({
+            "id": type_id,
+            "name": f"Item Type {type_id}",
+            "slug": f"item-type-{type_id}",
+            "game_id": 321,
+            "game_name": "Genshin Impact",
+            "game_slug": "genshin-impact",
+            "item_info": [
+                {
+                    "id": type_id * 100 + info_id,
+                    "name": f"Info {info_id}",
+                    "item_info_group_id": type_id * 10,
+                    "slug": f"info-{type_id}-{info_id}",
+                    "is_highest_sales": info_id == 1,
+                }
+                for info_id in range(1, 13)
+            ],
+            "item_info_group": [],
+        })
+    next_data = {
+        "page": "/[game_name]/[item_name]",
+        "props": {
+            "pageProps": {
+                "gameInfo": {
+                    "game": {"game_id": 321, "game_name": "Genshin Impact", "game_slug": "genshin-impact"},
+                    "has_game_page": 1,
+                    "has_server": 1,
+                    "item_type": item_types,
+                    "server": [{"id": i, "name": name} for i, name in enumerate(SERVERS, start=1)],
+                },
+                "exchangeRate": {
+                    "exchange_rate": 16250.0,
+                    "source_currency": "USD",
+                    "target_currency": "IDR",
+                },
+            },
+        },
+        "query": {
+            "page": 1,
+            "server": rng.randint(1, len(SERVERS)),
+            "game_name": "genshin-impact",
+            "item_name": "item-type-3",
+            "item_info_name": "info-3-7",
+            "sort": 1,
+        },
+    }
+    filler = "".join(f'<div class="card"><span>Product {i}</span></div>' for i in range(300))
+    return (
+        "<!DOCTYPE html><html><head><title>itemku</title></head><body>"
+        f'<div id="__next">{filler}</div>'
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'
+        "</body></html>"
+    )
+
+
+def itemku_products(
+    rng: random.Random,
+    offers: int,
+) -> dict:
+    products = []
+    for i in range(offers):
+        server = rng.choice(SERVERS)
+        products.append({
+            "id": 3200000 + i,
+            "name": f"{rng.choice(['Genesis Crystal', 'Welkin Moon', 'Primogem'])} {rng.randint(60, 6480)} {server}",
+            "min_order": 1,
+            "price": rng.randint(40, 400) * 100,
+            "server_name": server,
+            "stock": rng.randint(0, 500),
+            "base_unit": 1,
+            "seller": {"id": 9000 + i % len(SELLERS), "shop_name": SELLERS[i % len(SELLERS)]},
+        })
+    return {
+        "success": True,
+        "data": {
+            "total_item": offers,
+            "item_per_page": offers,
+            "current_page": 1,
+            "data": products,
+            "metadata": [],
+        },
+        "message": "OK",
+        "statusCode": "SUCCESS",
+    }
+
+
+def g2g_offers(
+    rng: random.Random,
+    offers: int,
+) -> dict:
+    return {
+        "payload": {
+            "results": [
+                {
+                    "username": rng.choice(SELLERS),
+                    "delivery_speed_details": [{"delivery_time": rng.choice([1, 2, 6, 12, 24, 48])}],
+                    "converted_unit_price": round(rng.uniform(0.8, 40.0), 6),
+                    "available_qty": rng.randint(0, 5000),
+                    "min_qty": rng.choice([1, 1, 5, 10, 100]),
+                }
+                for _ in range(offers)
+            ],
+        },
+    }
+
+
+def funpay_lots(
+    rng: random.Random,
+    offers: int,
+) -> str:
+    methods = ["Trade", "Mail", "Face to face"]
+    filters = (
+        '<select class="form-control showcase-filter-input" name="f-method">'
+        + "".join(f'<option value="{i}">{method}</option>' for i, method in enumerate(methods, start=1))
+        + "</select>"
+        + '<select class="form-control showcase-filter-input" name="server">'
+        + "".join(f'<option value="{i}">{server}</option>' for i, server in enumerate(SERVERS, start=1))
+        + "</select>"
+    )
+    items = []
+    for _ in range(offers):
+        method = rng.randint(1, len(methods))
+        server = rng.randint(1, len(SERVERS))
+        pet = rng.choice(["Raccoon", "Dragon", "Unicorn", "Kitsune"])
+        amount = f"{rng.randint(1, 20000):,}".replace(",", " ")
+        items.append(
+            f'<a href="https://funpay.com/en/lots/offer?id={rng.randint(10 ** 7, 10 ** 8)}" '
+            f'class="tc-item" data-f-method="{method}" data-server="{server}">'
+            f'<div class="tc-desc"><div class="tc-desc-text">{pet} pet, fast delivery, {rng.randint(1, 99)} lvl</div></div>'
+            f'<div class="tc-user"><div class="media-user"><div class="media-body">'
+            f'<div class="media-user-name">{rng.choice(SELLERS)}</div></div></div></div>'
+            f'<div class="tc-amount">{amount}</div>'
+            f'<div class="tc-price"><div>{rng.uniform(0.1, 90):.2f} <span class="unit">$</span></div></div>'
+            "</a>"
+        )
+    return (
+        "<!DOCTYPE html><html><body>"
+        f'<div class="showcase-filters">{filters}</div>'
+        f'<div class="tc showcase-table">{"".join(items)}</div>'
+        "</body></html>"
+    )
+
+
+def dd373_listings(
+    rng: random.Random,
+    offers: int,
+) -> str:
+    items = []
+    for i in range(offers):
+        amount = rng.choice([10000, 30000, 50000, 100000])
+        price = round(amount * rng.uniform(0.04, 0.09), 2)
+        per_yuan = amount / price
+        items.append(
+            '<div class="goods-list-item">'
+            f'<a class="goods-list-title" href="/detail-{rng.randint(10 ** 9, 10 ** 10)}.html">{amount}金={price:.2f}元</a>'
+            f'<div class="game-qufu-attr"><a>{rng.choice(SERVERS)}</a><a>联盟</a></div>'
+            f'<div class="goods-price"><span>{price:.2f}</span></div>'
+            f'<div class="kucun"><span>{rng.randint(1, 50)}</span></div>'
+            f'<div class="width233"><p>1元={per_yuan:.4f}钻</p><p>1钻={1 / per_yuan:.4f}元</p></div>'
+            '<div class="game-reputation">' + '<i class="icon-heart"></i>' * rng.randint(1, 5) + "</div>"
+            f'<div class="shop-btn-group"><a class="im-buy-btn" href="//www.dd373.com/order-{i}.html">购买</a></div>'
+            "</div>"
+        )
+    return f'<!DOCTYPE html><html><body><div class="goods-list">{"".join(items)}</div></body></html>'
+
+
+def bijiaqi_shop_demand(
+    rng: random.Random,
+    offers: int,
+) -> dict:
+    return {
+        "total": offers,
+        "currentPage": 1,
+        "pageSize": offers,
+        "list": [
+            {
+                "id": str(10 ** 6 + i),
+                "title": f"{rng.choice(SERVERS)} 金币",
+                "price": round(rng.uniform(0.01, 0.2), 4),
+                "sumQuantity": rng.randint(1000, 100000),
+                "minQuantity": rng.choice([100, 500, 1000]),
+                "effectiveQuantity": rng.randint(100, 100000),
+                "unit": "金",
+                "deliveryMethodLabel": rng.choice(["邮寄", "面交", "拍卖"]),
+                "guaranteed": rng.random() < 0.5,
+                "deposit": "0",
+                "gameCode": "wow",
+                "gameName": "魔兽世界",
+                "attrNameIndexes": "",
+                "createdAt": "2025-06-01 12:00:00",
+                "merchant": {
+                    "id": str(i % len(SELLERS)),
+                    "userId": str(5000 + i % len(SELLERS)),
+                    "storeName": SELLERS[i % len(SELLERS)],
+                    "orderCompletionRate": round(rng.uniform(0.8, 1.0), 3),
+                    "orderSettlementOfSecond": rng.randint(60, 3600),
+                    "online": rng.random() < 0.7,
+                    "createdAt": "2024-01-01 00:00:00",
+                },
+            }
+            for i in range(offers)
+        ],
+    }
+
+
+def sheet_row(
+    rng: random.Random,
+) -> list:
+    """``worksheet.batch_get`` result for the ranges ``stock_fake.get_row`` asks for."""
+    from app.models.gsheet_model import G2G, FUN, BIJ, DD, PriceSheet1, PriceSheet2, PriceSheet3, PriceSheet4
+
+    values = []
+    for model_cls in [G2G, FUN, BIJ, DD, PriceSheet1, PriceSheet2, PriceSheet3, PriceSheet4]:
+        for field_name in model_cls.mapping_fields():
+            annotation = str(model_cls.model_fields[field_name].annotation)
+            if "int" in annotation:
+                value = str(rng.randint(1, 100))
+            elif "float" in annotation:
+                value = f"{rng.uniform(0.5, 2.0):.3f}"
+            else:
+                value = f"{field_name.lower()}_value"
+            # Blank cells come back as empty matrices
+            values.append([[value]] if rng.random() > 0.1 else [])
+    return values
+
+
+def record_live(
+    args: argparse.Namespace,
+) -> dict[str, object]:
+    recorded: dict[str, object] = {}
+    if args.g2g_url:
+        from app.utils.g2g_extract import fetch_g2g_offers
+        recorded[G2G_OFFERS] = fetch_g2g_offers(args.g2g_url)
+    if args.fun_url or args.dd_url:
+        import requests
+        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+        if args.fun_url:
+            recorded[FUN_LOTS] = requests.get(args.fun_url, cookies={"cy": "usd"}, headers=headers).text
+        if args.dd_url:
+            recorded[DD_LISTINGS] = requests.get(args.dd_url, headers=headers).text
+    if args.bij_game and args.bij_server:
+        from app.utils.biji_extract import GameService
+        response = GameService().fetch_shop_demand(args.bij_game, args.bij_server)
+        if response is not None:
+            recorded[BIJ_SHOP_DEMAND] = response.model_dump(by_alias=True)
+    return recorded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offers", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--g2g-url")
+    parser.add_argument("--fun-url")
+    parser.add_argument("--dd-url")
+    parser.add_argument("--bij-game", type=int)
+    parser.add_argument("--bij-server", type=int)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    fixtures: dict[str, object] = {
+        ITEMKU_HTML: itemku_next_data(rng),
+        ITEMKU_PRODUCTS: itemku_products(rng, args.offers),
+        G2G_OFFERS: g2g_offers(rng, args.offers),
+        FUN_LOTS: funpay_lots(rng, args.offers),
+        DD_LISTINGS: dd373_listings(rng, args.offers),
+        BIJ_SHOP_DEMAND: bijiaqi_shop_demand(rng, args.offers),
+        SHEET_ROW: sheet_row(rng),
+    }
+    fixtures.update(record_live(args))
+
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    for name, content in fixtures.items():
+        path = FIXTURES_DIR / name
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False, indent=1)
+        path.write_text(content, encoding="utf-8")
+        print(f"{path.relative_to(FIXTURES_DIR.parent.parent)}: {len(content) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Synthetic N-row control sheet for load tests against ``fake_services``.
+
+Every row is enabled (CHECK=1) and points its competitor URLs, order sites
+and min/max/stock/blacklist cells at the fake services, so a ``main``
+round exercises the same calls as production.
+"""
+import random
+
+from gspread.utils import a1_to_rowcol
+
+from app.models.gsheet_model import BIJ, DD, FUN, G2G, PriceSheet1, PriceSheet2, PriceSheet3, PriceSheet4, Product
+
+SPREADSHEET_ID = "loadtest-sheet"
+MAIN_SHEET = "Sheet1"
+PRICES_SHEET = "Prices"
+BLACKLIST_SHEET = "Blacklist"
+RATES_SHEET = "Rates"
+
+FIRST_ROW = 2
+
+
+def _column(letter: str) -> int:
+    return a1_to_rowcol(f"{letter}1")[1]
+
+
+def _row_values(
+    row: int,
+    base_url: str,
+    rng: random.Random,
+) -> dict[type, dict[str, object]]:
+    blacklist = {"sheet": BLACKLIST_SHEET, "cell": "A1:A20"}
+    order_site = {
+        "SHEET_CHECK": 1 if row % 4 == 0 else 0,
+        "SHEET_PROFIT": 1.0,
+        "HE_SO_NHAN": 1.0,
+        "QUYDOIDONVI": 1.0,
+        "ID_SHEET_PRICE": SPREADSHEET_ID,
+        "SHEET_PRICE": PRICES_SHEET,
+        "CELL_PRICE": f"E{row}",
+    }
+    return {
+        Product: {
+            "CHECK": 1,
+            "Product_name": f"Load test product {row}",
+            "Product_link": f"{base_url}/tokoku/dagangan/{3_000_000 + row}/edit",
+            "CHECK_PRODUCT_COMPARE": 1,
+            "PRODUCT_COMPARE": f"{base_url}/itemku/genshin-impact/item-type-3?row={row}",
+            "DONGIAGIAM_MIN": 100,
+            "DONGIAGIAM_MAX": 500,
+            "DONGIA_LAMTRON": 100,
+            "IDSHEET_MIN": SPREADSHEET_ID,
+            "SHEET_MIN": PRICES_SHEET,
+            "CELL_MIN": f"B{row}",
+            "IDSHEET_MAX": SPREADSHEET_ID,
+            "SHEET_MAX": PRICES_SHEET,
+            "CELL_MAX": f"C{row}",
+            "IDSHEET_STOCK": SPREADSHEET_ID,
+            "SHEET_STOCK": PRICES_SHEET,
+            "CELL_STOCK": f"D{row}",
+            "IDSHEET_BLACKLIST": SPREADSHEET_ID,
+            "SHEET_BLACKLIST": blacklist["sheet"],
+            "CELL_BLACKLIST": blacklist["cell"],
+            "RELAX_TIME": 60,
+            "INCLUDE_KEYWORD": "crystal" if row % 3 == 0 else None,
+        },
+        G2G: {
+            "G2G_CHECK": 1,
+            "G2G_PROFIT": 1.05,
+            "G2G_PRODUCT_COMPARE": "https://www.g2g.com/categories/genshin-impact-top-up/offer/group?fa=x&sort=lowest_price",
+            "G2G_DELIVERY_TIME": 24,
+            "G2G_STOCK": 10,
+            "G2G_MINUNIT": 100,
+            "G2G_QUYDOIDONVI": 1.0,
+            "G2G_IDSHEET_BLACKLIST": SPREADSHEET_ID,
+            "G2G_SHEET_BLACKLIST": blacklist["sheet"],
+            "G2G_CELL_BLACKLIST": blacklist["cell"],
+        },
+        FUN: {
+            "FUN_CHECK": 1,
+            "FUN_PROFIT": 1.05,
+            "FUN_DISCOUNTFEE": 1.0,
+            "FUN_PRODUCT_COMPARE": f"{base_url}/funpay/lots/{row}/",
+            "FACTION": None,
+            "FUN_FILTER21": "f-method_trade",
+            "FUN_HESONHANDONGIA": 1.0,
+            "FUN_STOCK": 1,
+            "FUN_IDSHEET_BLACKLIST": SPREADSHEET_ID,
+            "FUN_SHEET_BLACKLIST": blacklist["sheet"],
+            "FUN_CELL_BLACKLIST": blacklist["cell"],
+        },
+        BIJ: {
+            "BIJ_CHECK": 1 if row % 2 == 0 else 0,
+            "BIJ_PROFIT": 1.05,
+            "BIJ_NAME": "1",
+            "BIJ_SERVER": str(rng.randint(1, 50)),
+            "BIJ_DELIVERY_METHOD": "邮寄",
+            "BIJ_STOCKMIN": 100,
+            "BIJ_STOCKMAX": 100000,
+            "HESONHANDONGIA3": 1.0,
+            "BIJ_IDSHEET_BLACKLIST": SPREADSHEET_ID,
+            "BIJ_SHEET_BLACKLIST": blacklist["sheet"],
+            "BIJ_CELL_BLACKLIST": blacklist["cell"],
+        },
+        DD: {
+            "DD_CHECK": 1,
+            "DD_PROFIT": 1.05,
+            "DD_QUYDOIDONVI": 1.0,
+            "DD_PRODUCT_COMPARE": f"{base_url}/dd373/s-{row}-0-0.html",
+            "DD_STOCKMIN": 30000,
+            "DD_LEVELMIN": 2,
+        },
+        PriceSheet1: order_site,
+        PriceSheet2: {**order_site, "SHEET_CHECK": 0},
+        PriceSheet3: {**order_site, "SHEET_CHECK": 0},
+        PriceSheet4: {**order_site, "SHEET_CHECK": 0},
+    }
+
+
+def build_sheets(
+    rows: int,
+    base_url: str,
+    seed: int = 42,
+) -> dict[str, dict[tuple[int, int], str]]:
+    """Cells of every worksheet of ``SPREADSHEET_ID``, keyed by (row, col)."""
+    rng = random.Random(seed)
+    main: dict[tuple[int, int], str] = {}
+    prices: dict[tuple[int, int], str] = {}
+
+    for model_cls in (Product, G2G, FUN, BIJ, DD, PriceSheet1, PriceSheet2, PriceSheet3, PriceSheet4):
+        for field_name, letter in model_cls.mapping_fields().items():
+            main[(1, _column(letter))] = field_name
+
+    for row in range(FIRST_ROW, FIRST_ROW + rows):
+        for model_cls, values in _row_values(row, base_url, rng).items():
+            mapping = model_cls.mapping_fields()
+            for field_name, value in values.items():
+                if value is not None:
+                    main[(row, _column(mapping[field_name]))] = str(value)
+
+        min_price = rng.randint(80, 200) * 100
+        prices[(row, 2)] = str(min_price)
+        prices[(row, 3)] = str(min_price + rng.randint(50, 150) * 100)
+        prices[(row, 4)] = str(rng.randint(10, 500))
+        prices[(row, 5)] = f"{rng.uniform(0.5, 3.0):.4f}"
+
+    return {
+        MAIN_SHEET: main,
+        PRICES_SHEET: prices,
+        BLACKLIST_SHEET: {(i, 1): f"seller_{i - 1:03d}" for i in range(1, 6)},
+        RATES_SHEET: {(1, 1): "16250", (2, 1): "2250"},
+    }
+
+
+def sheet_env() -> dict[str, str]:
+    """Environment pointing the rate lookups and the main worksheet at the synthetic sheet."""
+    return {
+        "SPREADSHEET_KEY": SPREADSHEET_ID,
+        "SHEET_NAME": MAIN_SHEET,
+        "RATE_SHEET_ID": SPREADSHEET_ID,
+        "RATE_SHEET_NAME": RATES_SHEET,
+        "CELL_RATE_USD": "A1",
+        "CNY_RATE_SPREADSHEET_ID": SPREADSHEET_ID,
+        "CNY_RATE_SHEET_NAME": RATES_SHEET,
+        "CNY_RATE_CELL": "A2",
+    }
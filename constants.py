@@ -28,6 +28,22 @@ def read_file_with_encoding(file_path, encoding='utf-8'):
         return None
 
 
-BIJ_HOST_DATA = read_file_with_encoding(DATA_PATH, encoding='utf-8')
+_bij_host_data = None
+
+
+def get_bij_host_data():
+    """Bijiaqi game/server map from DATA_PATH, parsed on first use."""
+    global _bij_host_data
+    if _bij_host_data is None:
+        _bij_host_data = read_file_with_encoding(DATA_PATH, encoding='utf-8')
+    return _bij_host_data
+
+
+def __getattr__(name):
+    # BIJ_HOST_DATA is ~1 MB of JSON, only parse it when a BIJ row needs it
+    if name == "BIJ_HOST_DATA":
+        return get_bij_host_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 TEMPLATE_FOLDER = os.path.join(os.path.dirname(__file__), "storage", "pa_template")
@@ -1,19 +1,57 @@
+import argparse
+import importlib
+import logging
 import os
+import signal
+import sys
 
+from concurrent.futures import Future, as_completed
+from dataclasses import dataclass
 from datetime import datetime
 import time
 
 from dotenv import load_dotenv
+
+# Before the app imports: several modules read their settings at import
+load_dotenv("setting.env")
+
 from gspread.worksheet import Worksheet
-from seleniumbase import SB
 
 
-from app.utils.gsheet import worksheet
+from app.utils.gsheet import get_worksheet, reset as reset_gsheet
 from app.models.gsheet_model import Product
-from app.main_process import process
+from app.main_process import process, fetch_row_inputs, is_dry_run, RowInputs
+from app.processes.itemku_api import itemku_api
+from app.processes.price_push_queue import price_push_queue
 from pydantic import ValidationError
+from app.shared.exceptions import BrowserError
+from app.utils.browser_supervisor import BrowserSupervisor
+from app.utils.config_watcher import get_config_watcher
+from app.utils.credentials import credential_manager
+from app.utils.host_limits import host_limiter
+from app.utils.log_pipeline import configure_logging, set_round
+from app.utils.memory_watchdog import memory_watchdog
+from app.utils.metrics import (
+    round_rows_per_minute,
+    row_last_seconds,
+    row_seconds,
+    rows_total,
+    serve_from_env as serve_metrics,
+)
+from app.utils.page_pool import PagePool
+from app.utils.row_lease import RowLeaseStore
+from app.utils.offer_archive import get_offer_archive
+from app.utils.price_history import get_price_history
+from app.utils.profiler import round_profiler
+from app.utils.round_journal import get_round_journal
+from app.utils.row_pipeline import RowPipeline
+from app.utils.row_scheduler import RowScheduler
+from app.utils.tracing import ContextThreadPoolExecutor, tracer
 from app.utils.update_messages import last_update_message
 
+logger = logging.getLogger(__name__)
+
+
 def get_run_indexes(sheet: Worksheet) -> list[int]:
     run_indexes = []
     check_col = sheet.col_values(2)
@@ -33,74 +71,428 @@ def get_run_indexes(sheet: Worksheet) -> list[int]:
     return run_indexes
 
 
-def main(sb):
-    load_dotenv("setting.env")
-    run_indexes = get_run_indexes(worksheet)
-    print(f"Run index: {run_indexes}")
-    for index in run_indexes:
-        print(f"INDEX (ROW): {index}")
-        try:
-            product = Product.get(worksheet, index)
-
-            process(sb, product, index)
-            print(f"Sleep for {product.RELAX_TIME}s")
-            time.sleep(product.RELAX_TIME)
-        except ValidationError as e:
-            print(f"VALIDATION ERROR AT ROW: {index}")
-            print(e.errors())
-            try:
-                now = datetime.now()
-                worksheet.batch_update(
-                    [
-                        {
-                            "range": f"D{index}",
-                            "values": [
-                                [
-                                    f"{last_update_message(now)}: VALIDATION ERROR AT ROW: {index}"
-                                ]
-                            ],
-                        }
-                    ]
-                )
-            except Exception as e:
-                print(e)
-                time.sleep(10)
+row_scheduler = RowScheduler(
+    default_interval=int(os.getenv("ROW_DEFAULT_INTERVAL", "60")),
+)
 
-        except Exception as e:
-            print(f"FAILED AT ROW: {index}")
-            print(e)
-            try:
-                now = datetime.now()
-                worksheet.batch_update(
-                    [
-                        {
-                            "range": f"D{index}",
-                            "values": [[f"{last_update_message(now)}: FAILED: {e}"]],
-                        }
-                    ]
-                )
-            except Exception as e1:
-                print(e1)
-                time.sleep(10)
-
-        time.sleep(4)
-
-    print(f"Sleep for {os.getenv('RELAX_TIME_EACH_ROUND', '10')}s")
-    time.sleep(
-        int(
-            os.getenv(
-                "RELAX_TIME_EACH_ROUND",
-                "10",
+# Set by start_scheduling(), SHARD_LEASE_DB enables sharding rows between several nodes
+row_lease_store: RowLeaseStore | None = None
+
+
+@dataclass
+class RowRun:
+    index: int
+    started_at: float
+    wall_started_at: float
+    elapsed: float = 0.0
+    interval: int | None = None
+    ok: bool = False
+
+
+def write_row_error(
+    index: int,
+    message: str,
+) -> None:
+    if is_dry_run():
+        return
+    try:
+        now = datetime.now()
+        with host_limiter.limit("sheets"):
+            get_worksheet().batch_update(
+                [
+                    {
+                        "range": f"D{index}",
+                        "values": [[f"{last_update_message(now)}: {message}"]],
+                    }
+                ]
             )
+    except Exception as e:
+        logger.warning("Writing the error note of row %s failed: %s", index, e)
+        time.sleep(10)
+
+
+def prefetch_row(
+    page_pool: PagePool,
+    index: int,
+) -> tuple[Product, RowInputs]:
+    with tracer.span("row.prefetch", row=index):
+        product = Product.get(get_worksheet(), index)
+        return product, fetch_row_inputs(page_pool, product, index)
+
+
+def process_row(
+    page_pool: PagePool,
+    index: int,
+    prefetched: Future | None = None,
+) -> RowRun:
+    logger.debug("INDEX (ROW): %s", index)
+    row_run = RowRun(index=index, started_at=time.monotonic(), wall_started_at=time.time())
+    with tracer.span("row", row=index) as span:
+        run_row(page_pool, row_run, prefetched)
+        if span is not None and not row_run.ok:
+            span.status = "error"
+
+    row_run.elapsed = time.monotonic() - row_run.started_at
+    return row_run
+
+
+def run_row(
+    page_pool: PagePool,
+    row_run: RowRun,
+    prefetched: Future | None = None,
+) -> None:
+    index = row_run.index
+    try:
+        if prefetched is not None:
+            product, inputs = prefetched.result()
+        else:
+            product, inputs = Product.get(get_worksheet(), index), None
+        row_run.interval = product.RELAX_TIME
+
+        process(page_pool, product, index, inputs)
+        row_run.ok = True
+    except ValidationError as e:
+        logger.warning("VALIDATION ERROR AT ROW: %s: %s", index, e.errors())
+        write_row_error(index, f"VALIDATION ERROR AT ROW: {index}")
+
+    except Exception as e:
+        logger.warning("FAILED AT ROW: %s: %s", index, e)
+        if not page_pool.is_alive():
+            # Leave the row unscheduled so it runs first after the relaunch
+            raise BrowserError(f"Browser died at row {index}: {e}") from e
+        write_row_error(index, f"FAILED: {e}")
+
+
+def finish_row(
+    round_id: int,
+    row_run: RowRun,
+) -> None:
+    # RELAX_TIME is the row's refresh interval, counted from when it started
+    row_scheduler.reschedule(row_run.index, interval=row_run.interval, started_at=row_run.started_at)
+    get_round_journal().complete_row(
+        round_id,
+        row_run.index,
+        started_at=row_run.wall_started_at,
+        interval=row_run.interval,
+        ok=row_run.ok,
+    )
+
+    outcome = "ok" if row_run.ok else "error"
+    rows_total.inc(row=row_run.index, outcome=outcome)
+    row_seconds.observe(row_run.elapsed, outcome=outcome)
+    row_last_seconds.set(row_run.elapsed, row=row_run.index)
+    tracer.flush()
+
+
+def run_due_rows(
+    page_pool: PagePool,
+    round_id: int,
+    workers: int,
+) -> list[RowRun]:
+    if workers <= 1:
+        # With ROW_PREFETCH_DEPTH=n the next n rows are fetched while a row is decided
+        depth = int(os.getenv("ROW_PREFETCH_DEPTH", "0"))
+        if depth > 0:
+            pipeline = RowPipeline(lambda index: prefetch_row(page_pool, index), depth=depth)
+            due = pipeline.run(row_scheduler.due_rows())
+        else:
+            due = ((index, None) for index in row_scheduler.due_rows())
+
+        row_runs = []
+        for index, prefetched in due:
+            row_run = process_row(page_pool, index, prefetched)
+            finish_row(round_id, row_run)
+            row_runs.append(row_run)
+            if memory_watchdog.recycle_requested:
+                # Safe point: the remaining due rows run after the recycle
+                break
+        return row_runs
+
+    due_indexes = list(row_scheduler.due_rows())
+    row_runs = []
+    browser_error = None
+    with ContextThreadPoolExecutor(max_workers=workers, thread_name_prefix="row") as executor:
+        futures = [executor.submit(process_row, page_pool, index) for index in due_indexes]
+        # Checkpoint every row as it finishes, a crash mid-round keeps the finished ones
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            try:
+                row_run = future.result()
+            except BrowserError as e:
+                browser_error = e
+                # Rows not started yet stay unscheduled and run first after the relaunch
+                cancel_pending(futures)
+                continue
+            finish_row(round_id, row_run)
+            row_runs.append(row_run)
+            if memory_watchdog.recycle_requested:
+                # Safe point: the rows not started yet run after the recycle
+                cancel_pending(futures)
+    if browser_error is not None:
+        raise browser_error
+    return row_runs
+
+
+def cancel_pending(
+    futures: list[Future],
+) -> None:
+    for future in futures:
+        future.cancel()
+
+
+def print_round_summary(
+    row_runs: list[RowRun],
+    elapsed: float,
+    workers: int,
+) -> None:
+    if not row_runs:
+        return
+    failed = [row_run.index for row_run in row_runs if not row_run.ok]
+    rows_per_minute = len(row_runs) / elapsed * 60 if elapsed > 0 else 0.0
+    round_rows_per_minute.set(rows_per_minute)
+    slowest = max(row_runs, key=lambda row_run: row_run.elapsed)
+    logger.info(
+        "ROUND SUMMARY: %s rows in %.1fs (%.1f rows/min, %s workers), failed: %s, slowest: row %s %.1fs, memory: %s",
+        len(row_runs),
+        elapsed,
+        rows_per_minute,
+        workers,
+        failed,
+        slowest.index,
+        slowest.elapsed,
+        memory_watchdog.summary(),
+    )
+
+
+def print_trace_report() -> None:
+    trace_report = tracer.round_report(top_n=int(os.getenv("TRACE_REPORT_TOP_N", "5")))
+    if trace_report:
+        logger.info("%s", trace_report)
+
+
+def run_round(page_pool: PagePool) -> None:
+    # Round boundary: pick up setting.env edits before the sheet is read
+    get_config_watcher().poll()
+    try:
+        # Keeps the token refresh out of the rows' Sheets calls
+        credential_manager.ensure_fresh()
+    except Exception as e:
+        logger.warning("Service account token refresh failed: %s", e)
+    with host_limiter.limit("sheets"):
+        run_indexes = get_run_indexes(get_worksheet())
+    if row_lease_store is not None:
+        run_indexes = row_lease_store.claim(run_indexes)
+    logger.info("Run index: %s", run_indexes)
+    row_scheduler.sync(run_indexes)
+    if row_scheduler.seconds_until_next() != 0:
+        # Nothing due in this window, the open round carries on with the next one
+        return
+
+    workers = int(os.getenv("ROW_WORKERS", "1"))
+    round_journal = get_round_journal()
+    round_id = round_journal.start_round(run_indexes)
+    set_round(round_id)
+    price_history = get_price_history()
+    if price_history is not None:
+        price_history.begin_round(round_id)
+    offer_archive = get_offer_archive()
+    if offer_archive is not None:
+        offer_archive.begin_round(round_id)
+    round_started_at = time.monotonic()
+    # Touch storage/profile_next_round (or SIGUSR1) to profile this round
+    with round_profiler.round(round_id) as profiled:
+        row_runs = run_due_rows(page_pool, round_id, workers)
+        profiled.rows = len(row_runs)
+    round_journal.finish_round(round_id, run_indexes)
+    print_round_summary(row_runs, time.monotonic() - round_started_at, workers)
+    print_trace_report()
+
+
+def main(page_pool: PagePool):
+    run_round(page_pool)
+
+    # Sleep until the next row is due, but rescan the sheet at least every
+    # RELAX_TIME_EACH_ROUND seconds so new CHECK=1 rows are picked up
+    relax_time = int(os.getenv("RELAX_TIME_EACH_ROUND", "10"))
+    wait = row_scheduler.seconds_until_next()
+    if wait is None or wait > relax_time:
+        wait = relax_time
+    logger.info("Sleep for %.1fs", wait)
+    time.sleep(wait)
+
+
+def price_rows(
+    page_pool: PagePool,
+    indexes: list[int] | None,
+    workers: int,
+) -> list[RowRun]:
+    """
+    Price ``indexes`` (default every CHECK=1 row) once, regardless of when
+    they are due and without recording them in the round journal.
+    """
+    if indexes is None:
+        with host_limiter.limit("sheets"):
+            indexes = get_run_indexes(get_worksheet())
+    logger.info("Run index: %s", indexes)
+
+    started_at = time.monotonic()
+    if workers <= 1:
+        row_runs = [process_row(page_pool, index) for index in indexes]
+    else:
+        with ContextThreadPoolExecutor(max_workers=workers, thread_name_prefix="row") as executor:
+            row_runs = list(executor.map(lambda index: process_row(page_pool, index), indexes))
+    print_round_summary(row_runs, time.monotonic() - started_at, workers)
+    tracer.flush()
+    print_trace_report()
+    return row_runs
+
+
+def flush_writers() -> None:
+    """Wait for queued pushes (and their Note writes), history, archive and trace writes."""
+    price_push_queue.flush()
+    price_history = get_price_history()
+    if price_history is not None:
+        price_history.flush()
+    offer_archive = get_offer_archive()
+    if offer_archive is not None:
+        offer_archive.flush()
+    tracer.flush()
+
+
+def start_scheduling() -> None:
+    """Round state of the run and once modes, read from the journal and lease store on disk."""
+    global row_lease_store
+    # Rows refreshed before a restart are not due again until their RELAX_TIME is up
+    row_scheduler.restore(get_round_journal().last_refresh())
+    row_lease_store = RowLeaseStore.from_env()
+
+
+def watch_settings(
+    browser_supervisor: BrowserSupervisor,
+) -> None:
+    """Re-apply the settings cached by long-lived objects when setting.env changes."""
+    config_watcher = get_config_watcher()
+
+    def apply_pools(keys: set[str]) -> None:
+        price_push_queue.resize(int(os.getenv("PRICE_PUSH_WORKERS", "2")))
+        price_push_queue.max_retries = int(os.getenv("PRICE_PUSH_MAX_RETRIES", "3"))
+        host_limiter.apply_env()
+
+    def apply_intervals(keys: set[str]) -> None:
+        row_scheduler.default_interval = int(os.getenv("ROW_DEFAULT_INTERVAL", "60"))
+        browser_supervisor.max_pages = int(os.getenv("BROWSER_MAX_PAGES", "500"))
+        memory_watchdog.browser_max_mb = float(os.getenv("BROWSER_MAX_RSS_MB", "1500"))
+        memory_watchdog.python_max_mb = float(os.getenv("PYTHON_MAX_RSS_MB", "1000"))
+        memory_watchdog.interval = float(os.getenv("MEMORY_SAMPLE_INTERVAL", "15"))
+        memory_watchdog.recycle_cooldown = float(os.getenv("BROWSER_RECYCLE_COOLDOWN", "300"))
+
+    config_watcher.subscribe(lambda keys: credential_manager.reset(), "KEYS_PATH")
+    config_watcher.subscribe(lambda keys: reset_gsheet(), "SPREADSHEET_KEY", "SHEET_NAME", "KEYS_PATH")
+    if row_lease_store is not None:
+        config_watcher.subscribe(
+            lambda keys: row_lease_store.set_sheet_key(RowLeaseStore.sheet_key_from_env()),
+            "SPREADSHEET_KEY",
+            "SHEET_NAME",
         )
+    config_watcher.subscribe(lambda keys: itemku_api.reset_signer(), "ITEMKU_API_KEY", "ITEMKU_SECRET_KEY")
+    config_watcher.subscribe(apply_pools, "PRICE_PUSH_WORKERS", "PRICE_PUSH_MAX_RETRIES", "HOST_LIMIT_*")
+    config_watcher.subscribe(
+        apply_intervals,
+        "ROW_DEFAULT_INTERVAL",
+        "BROWSER_MAX_PAGES",
+        "BROWSER_MAX_RSS_MB",
+        "PYTHON_MAX_RSS_MB",
+        "MEMORY_SAMPLE_INTERVAL",
+        "BROWSER_RECYCLE_COOLDOWN",
+    )
+
+
+BENCHMARKS = {
+    "offline": "benchmarks.bench_offline",
+    "import": "benchmarks.bench_importtime",
+    "round": "benchmarks.bench_round",
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="itemku price bot")
+    modes = parser.add_subparsers(dest="mode", metavar="MODE")
+
+    modes.add_parser("run", help="price due rows until stopped (default)")
+    once = modes.add_parser("once", help="run one round and exit")
+    row = modes.add_parser("row", help="price the given rows once and exit")
+    row.add_argument("rows", nargs="+", type=int, metavar="ROW")
+    row.add_argument("--dry-run", action="store_true", help="decide the prices without pushing or writing")
+    dry_run = modes.add_parser("dry-run", help="decide prices without pushing or writing the sheet")
+    dry_run.add_argument("rows", nargs="*", type=int, metavar="ROW", help="default: every CHECK=1 row")
+    for mode in (once, row, dry_run):
+        mode.add_argument("--workers", type=int, default=None, help="default: ROW_WORKERS")
+
+    bench = modes.add_parser(
+        "bench",
+        help="offline: parsers on recorded fixtures, import: cold start, round: a round against fake services",
     )
+    bench.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    bench.add_argument("args", nargs=argparse.REMAINDER, help="passed on to the benchmark")
+    return parser
+
 
+def cli(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    mode = args.mode or "run"
 
-while True:
+    if mode == "bench":
+        benchmark = importlib.import_module(BENCHMARKS[args.benchmark])
+        sys.argv = [benchmark.__name__, *args.args]
+        benchmark.main()
+        return
+
+    if mode == "dry-run" or getattr(args, "dry_run", False):
+        os.environ["DRY_RUN"] = "1"
+    if getattr(args, "workers", None) is not None:
+        os.environ["ROW_WORKERS"] = str(args.workers)
+
+    configure_logging()
+    browser_supervisor = BrowserSupervisor(
+        url=os.getenv("BROWSER_HOME_URL", "https://www.itemku.com/"),
+        max_pages=int(os.getenv("BROWSER_MAX_PAGES", "500")),
+    )
+    if mode in ("run", "once"):
+        start_scheduling()
+        watch_settings(browser_supervisor)
     try:
-        with SB(headless=True, uc=True) as sb:
-            url = "https://www.itemku.com/"
-            sb.activate_cdp_mode(url)
-            main(sb)
-    except Exception:
-        time.sleep(30)
+        if mode == "run":
+            serve_metrics()
+            round_profiler.install_signal_handlers()
+            # SIGTERM unwinds like Ctrl+C, so the leases below are released
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+            browser_supervisor.run(main)
+            return
+
+        started_at = time.monotonic()
+        if mode == "once":
+            browser_supervisor.run_once(run_round)
+        else:
+            workers = int(os.getenv("ROW_WORKERS", "1"))
+            browser_supervisor.run_once(lambda page_pool: price_rows(page_pool, args.rows or None, workers))
+        flush_started_at = time.monotonic()
+        flush_writers()
+        finished_at = time.monotonic()
+        logger.info(
+            "%s finished in %.1fs (waiting for background writes %.1fs)",
+            mode,
+            finished_at - started_at,
+            finished_at - flush_started_at,
+        )
+    finally:
+        if row_lease_store is not None:
+            # Peers take the rows over now instead of after SHARD_LEASE_TTL
+            try:
+                row_lease_store.release_all()
+            except Exception as e:
+                logger.warning("Releasing the row leases failed: %s", e)
+
+
+if __name__ == "__main__":
+    cli()
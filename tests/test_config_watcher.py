@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from app.utils.config_watcher import ConfigWatcher
+
+
+@pytest.fixture
+def settings(tmp_path):
+    path = tmp_path / "setting.env"
+    writes = [0]
+
+    def write(**values: str) -> str:
+        path.write_text("".join(f"{key}={value}\n" for key, value in values.items()))
+        # A distinct mtime per write, whatever the filesystem's resolution
+        writes[0] += 1
+        os.utime(path, ns=(writes[0] * 10**9, writes[0] * 10**9))
+        return str(path)
+
+    # poll() writes os.environ directly, so restore it as a whole
+    saved = dict(os.environ)
+    for key in ("ROW_WORKERS", "HOST_LIMIT_G2G", "HOST_LIMIT_FUN", "SHEET_NAME"):
+        os.environ.pop(key, None)
+    yield write
+    os.environ.clear()
+    os.environ.update(saved)
+
+
+def test_changed_keys_are_copied_into_the_environment(settings):
+    watcher = ConfigWatcher(settings(ROW_WORKERS="1", SHEET_NAME="Sheet1"))
+    assert watcher.poll() == set()
+
+    settings(ROW_WORKERS="4", SHEET_NAME="Sheet1")
+    assert watcher.poll() == {"ROW_WORKERS"}
+    assert os.environ["ROW_WORKERS"] == "4"
+    assert "SHEET_NAME" not in os.environ
+    assert watcher.reloads == 1
+    # Unchanged mtime, nothing to do
+    assert watcher.poll() == set()
+
+
+def test_removed_key_falls_back_unless_the_shell_set_it(settings, monkeypatch):
+    watcher = ConfigWatcher(settings(ROW_WORKERS="2", SHEET_NAME="Sheet1"))
+    settings(ROW_WORKERS="3", SHEET_NAME="Sheet2")
+    watcher.poll()
+    monkeypatch.setenv("SHEET_NAME", "FromShell")
+
+    settings()
+    assert watcher.poll() == {"ROW_WORKERS", "SHEET_NAME"}
+    assert "ROW_WORKERS" not in os.environ
+    assert os.environ["SHEET_NAME"] == "FromShell"
+
+
+def test_subscribers_get_only_their_keys(settings):
+    watcher = ConfigWatcher(settings(ROW_WORKERS="1", HOST_LIMIT_G2G="2"))
+    calls = []
+    watcher.subscribe(lambda keys: calls.append(("workers", keys)), "ROW_WORKERS")
+    watcher.subscribe(lambda keys: calls.append(("limits", keys)), "HOST_LIMIT_*")
+    watcher.subscribe(lambda keys: calls.append(("sheet", keys)), "SHEET_NAME")
+
+    settings(ROW_WORKERS="1", HOST_LIMIT_G2G="3", HOST_LIMIT_FUN="1")
+    watcher.poll()
+    assert calls == [("limits", {"HOST_LIMIT_G2G", "HOST_LIMIT_FUN"})]
+
+    calls.clear()
+    settings(ROW_WORKERS="2", HOST_LIMIT_G2G="3", HOST_LIMIT_FUN="1")
+    watcher.poll()
+    assert calls == [("workers", {"ROW_WORKERS"})]
+
+
+def test_failing_subscriber_does_not_stop_the_others(settings):
+    watcher = ConfigWatcher(settings(ROW_WORKERS="1"))
+    calls = []
+
+    def fail(keys: set[str]) -> None:
+        raise RuntimeError("bad value")
+
+    watcher.subscribe(fail, "ROW_WORKERS")
+    watcher.subscribe(lambda keys: calls.append(keys), "ROW_WORKERS")
+    settings(ROW_WORKERS="2")
+
+    assert watcher.poll() == {"ROW_WORKERS"}
+    assert calls == [{"ROW_WORKERS"}]
+    assert os.environ["ROW_WORKERS"] == "2"
@@ -0,0 +1,127 @@
+import time
+import types
+
+import pytest
+
+from app import main_process
+from app.main_process import decision_fingerprint, skip_unchanged_decision
+from app.models.crwl_api_models import Product as CrwlProduct, Seller
+from app.models.gsheet_model import Product
+from app.utils.round_journal import RoundJournal
+
+
+def make_product(**fields) -> Product:
+    return Product.model_construct(
+        index=2,
+        Note="Price 6500",
+        Last_update=None,
+        Product_link="https://tokoku.itemku.com/dagangan/1002/edit",
+        CHECK_PRODUCT_COMPARE=1,
+        DONGIAGIAM_MIN=100,
+        DONGIAGIAM_MAX=500,
+        INCLUDE_KEYWORD="gold",
+        EXCLUDE_KEYWORD="bot",
+        **fields,
+    )
+
+
+def make_offer(
+    price: int,
+    shop_name: str,
+) -> CrwlProduct:
+    return CrwlProduct.model_construct(
+        id=0,
+        name="gold",
+        price=price,
+        seller=Seller.model_construct(id=0, shop_name=shop_name),
+    )
+
+
+OFFERS = [make_offer(6600, "a"), make_offer(6700, "b"), make_offer(6800, "c")]
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    journal = RoundJournal(str(tmp_path / "round_journal.db"))
+    monkeypatch.setattr(main_process, "get_round_journal", lambda: journal)
+    monkeypatch.delenv("DRY_RUN", raising=False)
+    monkeypatch.delenv("DECISION_MEMO", raising=False)
+    monkeypatch.delenv("DECISION_MEMO_MAX_AGE", raising=False)
+    return journal
+
+
+@pytest.fixture
+def sheet_writes(monkeypatch):
+    writes = []
+    monkeypatch.setattr(Product, "update", lambda self: writes.append(("update",)))
+    monkeypatch.setattr(Product, "update_fields", lambda self, *names: writes.append(names))
+    return writes
+
+
+def fingerprint(
+    product: Product | None = None,
+    min_price: int = 6000,
+    max_price: int | None = 9000,
+    competitors: list[CrwlProduct] = OFFERS,
+    od_min_price: float | None = 6400.5,
+) -> str:
+    return decision_fingerprint(product or make_product(), min_price, max_price, competitors, od_min_price)
+
+
+def test_fingerprint_ignores_the_offer_order():
+    assert fingerprint() == fingerprint(competitors=OFFERS[::-1])
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [
+        {"product": make_product().model_copy(update={"Product_link": "https://tokoku.itemku.com/dagangan/9/edit"})},
+        {"product": make_product().model_copy(update={"CHECK_PRODUCT_COMPARE": 0})},
+        {"product": make_product().model_copy(update={"DONGIAGIAM_MIN": 101})},
+        {"product": make_product().model_copy(update={"DONGIAGIAM_MAX": 501})},
+        {"product": make_product().model_copy(update={"INCLUDE_KEYWORD": None})},
+        {"product": make_product().model_copy(update={"EXCLUDE_KEYWORD": "bots"})},
+        {"min_price": 6001},
+        {"max_price": None},
+        {"competitors": OFFERS[:2]},
+        {"competitors": [make_offer(6599, "a"), *OFFERS[1:]]},
+        {"competitors": [make_offer(6600, "z"), *OFFERS[1:]]},
+        {"od_min_price": 6400.0},
+    ],
+)
+def test_any_changed_input_changes_the_fingerprint(changed):
+    assert fingerprint(**changed) != fingerprint()
+
+
+def test_unchanged_decision_skips_the_push_and_note(journal, sheet_writes):
+    product = make_product()
+    journal.record_decision(product.index, fingerprint(), 6500)
+
+    assert skip_unchanged_decision(product, fingerprint())
+    # Only Last_update is written, the Note and price stay as pushed
+    assert sheet_writes == [("Last_update",)]
+    assert product.Note == "Price 6500"
+    assert product.Last_update is not None
+
+
+def test_changed_decision_runs_the_full_path(journal, sheet_writes):
+    product = make_product()
+    journal.record_decision(product.index, fingerprint(), 6500)
+
+    assert not skip_unchanged_decision(product, fingerprint(min_price=6100))
+    assert not skip_unchanged_decision(make_product().model_copy(update={"index": 3}), fingerprint())
+    assert sheet_writes == []
+
+
+def test_memo_max_age_forces_a_refresh(journal, sheet_writes, monkeypatch):
+    product = make_product()
+    journal.record_decision(product.index, fingerprint(), 6500)
+    decided_at = time.time()
+
+    monkeypatch.setattr(main_process, "time", types.SimpleNamespace(time=lambda: decided_at + 3599))
+    assert skip_unchanged_decision(product, fingerprint())
+    monkeypatch.setattr(main_process, "time", types.SimpleNamespace(time=lambda: decided_at + 3601))
+    assert not skip_unchanged_decision(product, fingerprint())
+
+    monkeypatch.setenv("DECISION_MEMO_MAX_AGE", "7200")
+    assert skip_unchanged_decision(product, fingerprint())
@@ -0,0 +1,69 @@
+import base64
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from app.processes.itemku_api import ItemkuAPI, JwtSigner, generate_jwt_token
+
+NONCE = "1760000000"
+PAYLOADS = [
+    {"product_id": 3210076, "new_price": 8300},
+    {"product_id": 42, "new_price": 10, "note": "giá \"mới\""},
+]
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def reference_token(
+    api_key: str,
+    secret_key: str,
+    nonce: str,
+    payload: dict,
+) -> str:
+    """HS256 JWT of the header and payload as itemku expects them, written out by hand."""
+    header = {"X-Api-Key": api_key, "Nonce": nonce, "alg": "HS256"}
+    unsigned_token = f"{b64url(json.dumps(header).encode())}.{b64url(json.dumps(payload).encode())}"
+    signature = hmac.new(secret_key.encode(), unsigned_token.encode(), hashlib.sha256).digest()
+    return f"{unsigned_token}.{b64url(signature)}"
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    monkeypatch.setenv("ITEMKU_API_KEY", "api-key-1")
+    monkeypatch.setenv("ITEMKU_SECRET_KEY", "secret-key-1")
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_sign_matches_a_reference_hs256_token(keys, payload):
+    signer = JwtSigner.from_env()
+    expected = reference_token("api-key-1", "secret-key-1", NONCE, payload)
+
+    assert signer.sign(NONCE, payload) == expected
+    assert generate_jwt_token(NONCE, payload) == expected
+
+
+def test_sign_batch_matches_per_call_signing_across_nonces(keys):
+    signer = JwtSigner.from_env()
+
+    for nonce in (NONCE, "1760000001", NONCE):
+        assert signer.sign_batch(nonce, PAYLOADS) == [
+            reference_token("api-key-1", "secret-key-1", nonce, payload) for payload in PAYLOADS
+        ]
+
+
+def test_reset_signer_picks_up_new_keys(keys, monkeypatch):
+    api = ItemkuAPI()
+    payload = PAYLOADS[0]
+    assert api.signer.sign(NONCE, payload) == reference_token("api-key-1", "secret-key-1", NONCE, payload)
+
+    monkeypatch.setenv("ITEMKU_API_KEY", "api-key-2")
+    monkeypatch.setenv("ITEMKU_SECRET_KEY", "secret-key-2")
+    # Cached until the settings reload resets it
+    assert api.signer.api_key == "api-key-1"
+    api.reset_signer()
+    assert api.signer.api_key == "api-key-2"
+    assert api.signer.sign(NONCE, payload) == reference_token("api-key-2", "secret-key-2", NONCE, payload)
@@ -0,0 +1,106 @@
+import threading
+import time
+
+from app.processes.price_push_queue import PricePushQueue
+
+
+class FakePush:
+    """Records the pushes, fails the first ``failures`` attempts and blocks a product until released."""
+
+    def __init__(
+        self,
+        failures: int = 0,
+    ) -> None:
+        self.failures = failures
+        self.pushes: list[tuple[int, int, float]] = []
+        self.gates: dict[int, threading.Event] = {}
+        self.started = threading.Event()
+
+    def __call__(
+        self,
+        product_id: int,
+        new_price: int,
+    ) -> None:
+        self.pushes.append((product_id, new_price, time.monotonic()))
+        gate = self.gates.get(product_id)
+        if gate is not None:
+            self.started.set()
+            assert gate.wait(5)
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("itemku is down")
+
+
+def test_pending_prices_are_coalesced_to_the_latest():
+    push = FakePush()
+    push.gates[1] = threading.Event()
+    queue = PricePushQueue(push_func=push, workers=1)
+    results = []
+    queue.submit(1, 100)
+    assert push.started.wait(5)
+
+    # The only worker is busy, so these wait in the queue and coalesce
+    for price in (200, 210, 220):
+        queue.submit(2, price, on_done=results.append)
+    push.gates[1].set()
+    assert queue.flush(5)
+    queue.stop(5)
+
+    assert [(product_id, price) for product_id, price, _ in push.pushes] == [(1, 100), (2, 220)]
+    assert [(result.new_price, result.success, result.superseded) for result in results] == [
+        (200, False, True),
+        (210, False, True),
+        (220, True, False),
+    ]
+    assert results[-1].coalesced == 2
+
+
+def test_failed_push_is_retried_with_backoff():
+    push = FakePush(failures=2)
+    queue = PricePushQueue(push_func=push, workers=1, max_retries=3, backoff=0.05)
+    results = []
+    queue.submit(1, 100, on_done=results.append)
+    assert queue.flush(5)
+    queue.stop(5)
+
+    assert len(results) == 1
+    assert results[0].success and results[0].attempts == 3
+    times = [at for _, _, at in push.pushes]
+    assert times[1] - times[0] >= 0.05
+    assert times[2] - times[1] >= 0.1
+
+
+def test_push_gives_up_after_max_retries():
+    push = FakePush(failures=10)
+    queue = PricePushQueue(push_func=push, workers=1, max_retries=2, backoff=0.01)
+    results = []
+    queue.submit(1, 100, on_done=results.append)
+    assert queue.flush(5)
+    queue.stop(5)
+
+    assert len(push.pushes) == 3
+    assert len(results) == 1
+    assert not results[0].success and not results[0].superseded
+    assert results[0].attempts == 3
+    assert results[0].error == "itemku is down"
+
+
+def test_failed_push_replaced_in_flight_is_reported_superseded():
+    push = FakePush(failures=1)
+    push.gates[1] = threading.Event()
+    queue = PricePushQueue(push_func=push, workers=1, max_retries=3, backoff=0.01)
+    results = []
+    queue.submit(1, 100, on_done=results.append)
+    assert push.started.wait(5)
+
+    queue.submit(1, 200, on_done=results.append)
+    push.gates[1].set()
+    assert queue.flush(5)
+    queue.stop(5)
+
+    # The failed 100 is not retried, the newer 200 is pushed instead
+    assert [price for _, price, _ in push.pushes] == [100, 200]
+    assert [(result.new_price, result.success, result.superseded) for result in results] == [
+        (100, False, True),
+        (200, True, False),
+    ]
@@ -0,0 +1,116 @@
+import random
+import sqlite3
+
+from app.models.crwl_api_models import Product as CrwlProduct, Seller
+from app.models.gsheet_model import Product
+from app.processes.pricing import decide_price
+from app.processes.replay import load_snapshots, replay
+from app.utils.price_history import PriceHistoryStore
+
+SEED = 7
+
+
+def make_offer(
+    price: int,
+    shop_name: str,
+    name: str,
+) -> CrwlProduct:
+    return CrwlProduct.model_construct(
+        id=0,
+        name=name,
+        min_order=1,
+        price=price,
+        server_name="asia",
+        stock=10,
+        base_unit=1,
+        seller=Seller.model_construct(id=0, shop_name=shop_name),
+    )
+
+
+def record_round(
+    db_path: str,
+) -> list[int]:
+    """Decide a round of rows like the live loop and record it, returns the pushed prices."""
+    rng = random.Random(SEED)
+    store = PriceHistoryStore(db_path)
+    store.begin_round(1)
+    pushed = []
+    for index in range(2, 12):
+        settings = {
+            "DONGIAGIAM_MIN": 100,
+            "DONGIAGIAM_MAX": 500 + index * 10,
+            "INCLUDE_KEYWORD": "gold" if index % 2 else None,
+            "EXCLUDE_KEYWORD": "bot",
+        }
+        blacklist = [f"shop-{index}"]
+        # The 12 cheapest offers are blacklisted or excluded by keyword, more than a top-10 would keep
+        offers = [make_offer(5000 + rank, f"shop-{index}", "gold") for rank in range(10)]
+        offers += [make_offer(5100 + rank, "other", "gold bot") for rank in range(2)]
+        offers += [make_offer(6000 + rank * 250 + index, f"seller-{rank}", "gold coin") for rank in range(13)]
+        order_site_items = [(6400.5 + index, "od-seller", "g2g"), (0.0, "none", "fun")]
+        product = Product.model_construct(index=index, **settings)
+        decision = decide_price(
+            product=product,
+            offers=offers,
+            min_price=6000 if index % 3 else 7000,
+            max_price=None if index % 4 else 9000,
+            blacklist=blacklist,
+            order_site_min_price=(6400.5 + index, "od-seller", "g2g"),
+            rng=rng,
+        )
+        store.record_row(
+            index=index,
+            product_id=1000 + index,
+            competitors=offers,
+            order_site_items=order_site_items,
+            min_price=6000 if index % 3 else 7000,
+            max_price=None if index % 4 else 9000,
+            od_min_price=6400.5 + index,
+            usd_rate=16000.0,
+            pushed_price=decision.pushed_price,
+            blacklist=blacklist,
+            settings=settings,
+        )
+        pushed.append((decision.pushed_price, decision.target_price, decision.compare_seller))
+    store.flush()
+    return pushed
+
+
+def test_replaying_a_recorded_round_reproduces_the_decisions(tmp_path):
+    db_path = str(tmp_path / "price_history.db")
+    recorded = record_round(db_path)
+
+    report = replay(load_snapshots(db_path), settings={}, seed=SEED)
+
+    assert report.skipped == 0
+    assert [
+        (r.decision.pushed_price, r.decision.target_price, r.decision.compare_seller) for r in report.results
+    ] == recorded
+    assert all(r.decision.pushed_price == r.snapshot.pushed_price for r in report.results)
+
+
+def test_order_site_prices_are_stored_unrounded(tmp_path):
+    db_path = str(tmp_path / "price_history.db")
+    record_round(db_path)
+
+    conn = sqlite3.connect(db_path)
+    od_min_prices = conn.execute("SELECT row_index, od_min_price FROM row_snapshots ORDER BY row_index").fetchall()
+    conn.close()
+
+    assert od_min_prices == [(index, 6400.5 + index) for index in range(2, 12)]
+
+
+def test_compacted_snapshots_are_not_replayed(tmp_path):
+    db_path = str(tmp_path / "price_history.db")
+    record_round(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE row_snapshots SET ts = ts - 30 * 86400 WHERE row_index < 5")
+    conn.execute("UPDATE competitor_offers SET ts = ts - 30 * 86400 WHERE row_index < 5")
+    PriceHistoryStore(db_path, retention_days=60, compact_after_days=7).compact(conn)
+    conn.close()
+
+    report = replay(load_snapshots(db_path), settings={}, seed=SEED)
+
+    assert report.skipped == 3
+    assert sorted(r.snapshot.row_index for r in report.results) == list(range(5, 12))
@@ -0,0 +1,49 @@
+from app.utils.round_journal import RoundJournal
+from app.utils.row_scheduler import RowScheduler
+
+ROWS = [2, 3, 4]
+STARTED_AT = 1_700_000_000.0
+
+
+def test_restart_resumes_the_round_and_skips_its_done_rows(tmp_path):
+    db_path = str(tmp_path / "round_journal.db")
+    journal = RoundJournal(db_path)
+    round_id = journal.start_round(ROWS)
+    journal.complete_row(round_id, 2, started_at=STARTED_AT, interval=60, ok=True)
+    journal.complete_row(round_id, 3, started_at=STARTED_AT, interval=None, ok=False)
+    assert not journal.finish_round(round_id, ROWS)
+
+    # Restarted 10s later: same round, rows 2 and 3 are not due for another 50s
+    restarted = RoundJournal(db_path)
+    scheduler = RowScheduler(default_interval=60, clock=lambda: 0.0, wall_clock=lambda: STARTED_AT + 10)
+    scheduler.restore(restarted.last_refresh())
+    scheduler.sync(ROWS)
+    assert restarted.start_round(ROWS) == round_id
+    assert list(scheduler.due_rows()) == [4]
+    assert scheduler.seconds_until_next() == 50
+
+
+def test_finish_round_closes_only_a_complete_pass(tmp_path):
+    journal = RoundJournal(str(tmp_path / "round_journal.db"))
+    round_id = journal.start_round(ROWS)
+    journal.complete_row(round_id, 2, started_at=STARTED_AT, interval=60, ok=True)
+    journal.complete_row(round_id, 3, started_at=STARTED_AT, interval=60, ok=True)
+
+    # The next scheduler window carries on with the open round
+    assert not journal.finish_round(round_id, ROWS)
+    assert journal.start_round(ROWS) == round_id
+
+    journal.complete_row(round_id, 4, started_at=STARTED_AT + 5, interval=60, ok=False)
+    assert journal.finish_round(round_id, ROWS)
+    assert journal.start_round(ROWS) == round_id + 1
+
+
+def test_last_refresh_keeps_the_latest_start_and_interval(tmp_path):
+    journal = RoundJournal(str(tmp_path / "round_journal.db"))
+    round_id = journal.start_round(ROWS)
+    journal.complete_row(round_id, 2, started_at=STARTED_AT, interval=30, ok=True)
+    journal.complete_row(round_id, 2, started_at=STARTED_AT + 40, interval=None, ok=True)
+    # A push alone is not a refresh
+    journal.record_push(3, product_id=1003, price=6500)
+
+    assert journal.last_refresh() == {2: (STARTED_AT + 40, 30)}
@@ -0,0 +1,76 @@
+import pytest
+
+from app.utils.row_lease import RowLeaseStore
+
+ROWS = [2, 3, 4, 5]
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    stores = []
+
+    def make(
+        node_id: str,
+        sheet_key: str = "sheet/Sheet1",
+    ) -> RowLeaseStore:
+        store = RowLeaseStore(str(tmp_path / "leases.db"), sheet_key, node_id=node_id, ttl=600)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.release_all()
+
+
+def test_each_node_gets_its_fair_share(make_store):
+    rows = [2, 3, 4, 5, 6, 7]
+    nodes = [make_store("a"), make_store("b"), make_store("c")]
+    for now, node in enumerate(nodes, start=1000):
+        node.claim(rows, now=now)
+    owned = [node.claim(rows, now=now) for now, node in enumerate(nodes, start=1010)]
+
+    assert owned == [[2, 3], [4, 5], [6, 7]]
+
+
+def test_node_gives_rows_back_when_a_peer_joins(make_store):
+    a, b = make_store("a"), make_store("b")
+    assert a.claim(ROWS, now=1000) == ROWS
+
+    # b's share is still leased to a until a sees it joined
+    assert b.claim(ROWS, now=1001) == []
+    assert a.claim(ROWS, now=1002) == [2, 3]
+    assert b.claim(ROWS, now=1003) == [4, 5]
+
+
+def test_peer_takes_rows_over_after_the_ttl(make_store):
+    a, b = make_store("a"), make_store("b")
+    a.claim(ROWS, now=1000)
+
+    assert b.claim(ROWS, now=1599) == []
+    assert b.claim(ROWS, now=1601) == ROWS
+
+
+def test_renew_extends_the_leases(make_store):
+    a, b = make_store("a"), make_store("b")
+    a.claim(ROWS, now=1000)
+
+    assert a.renew(now=1500) == len(ROWS)
+    # a is still live and holds its rows past the first TTL
+    assert b.claim(ROWS, now=1700) == []
+
+
+def test_release_all_hands_rows_over_at_once(make_store):
+    a, b = make_store("a"), make_store("b")
+    a.claim(ROWS, now=1000)
+    a.release_all()
+
+    assert b.claim(ROWS, now=1001) == ROWS
+
+
+def test_set_sheet_key_hands_the_old_sheet_over(make_store):
+    a, b = make_store("a"), make_store("b")
+    a.claim(ROWS, now=1000)
+    a.set_sheet_key("other/Sheet1")
+
+    assert b.claim(ROWS, now=1001) == ROWS
+    assert a.claim(ROWS, now=1002) == ROWS
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from app.utils.row_pipeline import RowPipeline
+
+
+def test_prefetch_keeps_depth_rows_in_flight():
+    depth = 2
+    rows = 8
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+    pulled = []
+
+    def fetch(index: int) -> int:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return index
+
+    def indexes():
+        for index in range(rows):
+            pulled.append(index)
+            yield index
+
+    decided = []
+    for index, future in RowPipeline(fetch, depth=depth).run(indexes()):
+        # The row being decided plus at most ``depth`` rows ahead of it
+        assert len(pulled) - len(decided) - 1 == min(depth, rows - len(decided) - 1)
+        decided.append(future.result())
+
+    assert decided == list(range(rows))
+    assert max_running <= depth
+
+
+def test_stopping_early_cancels_rows_not_started():
+    started = []
+    pipeline = RowPipeline(lambda index: started.append(index) or time.sleep(0.05), depth=1)
+
+    for index, future in pipeline.run(range(5)):
+        future.result()
+        break
+
+    # Row 1 may already be running, rows further ahead were never submitted
+    assert started[0] == 0 and max(started) <= 1
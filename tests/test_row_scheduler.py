@@ -0,0 +1,103 @@
+from app.utils.row_scheduler import RowScheduler
+
+
+class FakeClock:
+    def __init__(
+        self,
+        now: float = 0.0,
+    ) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_scheduler(
+    clock: FakeClock,
+    wall_clock: FakeClock | None = None,
+) -> RowScheduler:
+    return RowScheduler(default_interval=60, clock=clock, wall_clock=wall_clock or FakeClock(1_700_000_000))
+
+
+def test_due_rows_come_in_due_time_order():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.sync([9, 3, 5])
+    assert list(scheduler.due_rows()) == [3, 5, 9]
+
+    scheduler.reschedule(9, interval=10, started_at=0)
+    scheduler.reschedule(3, interval=30, started_at=0)
+    scheduler.reschedule(5, interval=20, started_at=0)
+    clock.now = 15
+    assert list(scheduler.due_rows()) == [9]
+    assert scheduler.seconds_until_next() == 5
+    clock.now = 40
+    assert list(scheduler.due_rows()) == [5, 3]
+    assert scheduler.seconds_until_next() is None
+
+
+def test_due_rows_yields_each_row_once_per_round():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.sync([2, 3])
+    clock.now = 5
+
+    due = []
+    for index in scheduler.due_rows():
+        due.append(index)
+        # Due again at once, but not before the next round
+        scheduler.reschedule(index, interval=0)
+    assert due == [2, 3]
+    assert list(scheduler.due_rows()) == [2, 3]
+
+
+def test_sync_adds_new_rows_and_drops_removed_ones():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.sync([2, 3])
+    for index in scheduler.due_rows():
+        scheduler.reschedule(index, interval=30, started_at=0)
+
+    clock.now = 10
+    scheduler.sync([3, 4])
+    assert 2 not in scheduler and 2 not in scheduler.intervals
+    assert len(scheduler) == 2
+    # The new row is due at once, the kept one keeps its due time
+    assert list(scheduler.due_rows()) == [4]
+    clock.now = 30
+    assert list(scheduler.due_rows()) == [3]
+
+
+def test_each_row_keeps_its_own_relax_time():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.reschedule(2, interval=30, started_at=0)
+    scheduler.reschedule(3, interval=120, started_at=0)
+    scheduler.reschedule(4, started_at=0)
+
+    clock.now = 60
+    assert list(scheduler.due_rows()) == [2, 4]
+    # Without a new RELAX_TIME the row keeps the last one it had
+    scheduler.reschedule(2, started_at=60)
+    scheduler.reschedule(4, started_at=50)
+    clock.now = 90
+    assert list(scheduler.due_rows()) == [2]
+    clock.now = 120
+    assert list(scheduler.due_rows()) == [4, 3]
+
+
+def test_restore_continues_the_intervals_from_the_checkpoint():
+    clock = FakeClock(500)
+    wall_clock = FakeClock(10_000)
+    scheduler = make_scheduler(clock, wall_clock)
+    scheduler.restore({
+        2: (9_990, 30),
+        3: (9_900, None),
+        4: (9_000, 300),
+    })
+
+    assert scheduler.intervals == {2: 30, 4: 300}
+    assert list(scheduler.due_rows()) == [3, 4]
+    assert scheduler.seconds_until_next() == 20
+    clock.now = 520
+    assert list(scheduler.due_rows()) == [2]